@@ -0,0 +1,56 @@
+"""Concurrency of the base agent graph against a local fake chat model
+
+Runs many agent invocations at once, a non-blocking graph finishes them in
+about one model latency, a blocking one needs the sum of all latencies.
+
+    python -m benchmarks.async_llm --requests 200 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.fake_llm import FakeChatModel
+from imind_ai.agent.base.graph import create_base_agent
+
+
+async def run(llm: FakeChatModel, requests: int) -> float:
+    agent = create_base_agent(llm, settings=None)
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[agent.ainvoke({"user_input": f"question {i}"}) for i in range(requests)]
+    )
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument(
+        "--blocking-requests",
+        type=int,
+        default=20,
+        help="requests for the blocking baseline, it runs serially",
+    )
+    args = parser.parse_args()
+
+    elapsed = await run(FakeChatModel(latency=args.latency), args.requests)
+    print(
+        f"async    requests={args.requests} latency={args.latency}s "
+        f"wall={elapsed:.3f}s in_flight~{args.requests * args.latency / elapsed:.1f}"
+    )
+
+    elapsed = await run(
+        FakeChatModel(latency=args.latency, blocking=True), args.blocking_requests
+    )
+    print(
+        f"blocking requests={args.blocking_requests} latency={args.latency}s "
+        f"wall={elapsed:.3f}s in_flight~"
+        f"{args.blocking_requests * args.latency / elapsed:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
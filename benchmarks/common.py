@@ -0,0 +1,43 @@
+import resource
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+from imind_ai.agent.workflow.pipeline.context import Context
+from imind_ai.agent.workflow.pipeline.parser import Parser
+from imind_ai.agent.workflow.pipeline.plan import Plan
+from imind_ai.agent.workflow.pipeline.planner import Planner
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def rss_mb() -> float:
+    """Peak resident set size of the process"""
+    # kilobytes on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def current_rss_mb() -> float:
+    """Current resident set size, the peak where /proc is not available"""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        return rss_mb()
+
+
+def plan_workflow(values: Dict[str, Any] | Path) -> Plan:
+    context = Context()
+    Parser.parse(context, values=values)
+    return Planner.plan(context)
@@ -0,0 +1,65 @@
+"""Loading large workflows from YAML and from compiled artifacts
+
+Writes a chain of `--nodes` agent nodes as YAML and times `Parser.parse`
+from the source, compiling it, loading the fresh artifact and loading after
+the source changed, which recompiles the artifact.
+
+    python -m benchmarks.compile_bench --nodes 1000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+os.environ.setdefault("MODEL", "fake:compile")
+os.environ.setdefault("POSTGRES_DSN", "")
+
+from benchmarks.workflow_bench import chain_workflow
+from imind_ai.agent.workflow.pipeline.compiler import Compiler
+from imind_ai.agent.workflow.pipeline.context import Context
+from imind_ai.agent.workflow.pipeline.parser import Parser
+
+
+def parse(source: Path) -> float:
+    start = time.perf_counter()
+    Parser.parse(Context(), values=source)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    source = Path(tempfile.mkdtemp()) / "workflow.yaml"
+    values = chain_workflow(args.nodes)
+    source.write_text(yaml.safe_dump(values), encoding="utf-8")
+
+    timings = {"yaml": min(parse(source) for _ in range(args.repeat))}
+
+    start = time.perf_counter()
+    Compiler.compile(source)
+    timings["compile"] = time.perf_counter() - start
+
+    timings["artifact"] = min(parse(source) for _ in range(args.repeat))
+
+    values["agent"]["name"] = "changed"
+    source.write_text(yaml.safe_dump(values), encoding="utf-8")
+    timings["stale artifact"] = parse(source)
+    timings["recompiled"] = parse(source)
+
+    size = Compiler.artifact_path(source).stat().st_size
+    print(f"{args.nodes} nodes, artifact {size / 1024:.0f}KB")
+    for name, seconds in timings.items():
+        print(f"{name:16} {seconds * 1000:9.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
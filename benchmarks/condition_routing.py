@@ -0,0 +1,123 @@
+"""Condition routing: interpreting the config vs compiled conditions
+
+Builds a condition node with many `elif` branches where only the `else`
+branch matches, the worst case for routing.
+
+    python -m benchmarks.condition_routing --branches 50 --calls 2000
+"""
+
+import argparse
+import time
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+from imind_ai.agent.config.base import ConditionNodeConfig
+from imind_ai.agent.workflow.graph.condition import ConditionNode
+
+
+class State(BaseModel):
+    workflow_input: Dict[str, Any]
+    classifier_output: Optional[Dict[str, Any]] = None
+
+
+def resolve(ref: str, state: BaseModel) -> Any:
+    """The previous reference lookup, without its debug print"""
+    infos = ref.split(".")
+    entity = infos.pop(0)
+    entity = f"{entity}_input" if entity == "workflow" else f"{entity}_output"
+    item = getattr(state, entity)
+    while len(infos) > 0:
+        key = infos.pop(0)
+        item = item.get(key) if isinstance(item, dict) else getattr(item, key)
+    return item
+
+
+def interpret(node: ConditionNode, state: BaseModel):
+    """The previous routing: walk the config on every call"""
+    config = node.config
+    for express in [config.if_express, *(config.elif_express or [])]:
+        is_meet = True
+        for condition in express.condition:
+            operand = resolve(condition.operand, state)
+            right_hand = (
+                condition.value
+                if condition.source == "input"
+                else resolve(condition.reference, state)
+            )
+            logic = node.exec_judgment(condition.operator, operand, right_hand)
+            if express.logic_operator == "or" and logic:
+                return express.next
+            if express.logic_operator == "and" and not logic:
+                is_meet = False
+                break
+        if is_meet:
+            return express.next
+    return config.else_express
+
+
+def build_config(branches: int) -> ConditionNodeConfig:
+    def express(idx: int) -> Dict[str, Any]:
+        return {
+            "logic_operator": "and",
+            "condition": [
+                {
+                    "operator": "eq",
+                    "operand": "classifier.label",
+                    "op_type": "str",
+                    "source": "input",
+                    "value": f"label_{idx}",
+                },
+                {
+                    "operator": "ge",
+                    "operand": "classifier.score",
+                    "op_type": "float",
+                    "source": "input",
+                    "value": "0.5",
+                },
+            ],
+            "next": f"agent_{idx}",
+        }
+
+    return ConditionNodeConfig(
+        **{
+            "id": "route",
+            "name": "route",
+            "type": "condition",
+            "prev": "classifier",
+            "if": express(0),
+            "elif": [express(idx) for idx in range(1, branches)],
+            "else": "fallback",
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--branches", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    node = ConditionNode(build_config(args.branches))
+    state = State(
+        workflow_input={"query": "hello"},
+        classifier_output={"label": "unknown", "score": 0.9},
+    )
+    assert interpret(node, state) == node.route(state) == "fallback"
+
+    for name, route in (
+        ("interpreted", interpret),
+        ("compiled", ConditionNode.route),
+    ):
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            route(node, state)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:<12} branches={args.branches} "
+            f"per_call={elapsed / args.calls * 1e6:.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
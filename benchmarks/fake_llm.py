@@ -0,0 +1,188 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from imind_ai.agent.base.llm import register_chat_model
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic local chat model, used to benchmark agents without a LLM server
+
+    `latency` is the simulated time to first token in seconds, and
+    `tokens_per_second` adds generation time proportional to the completion.
+    With `blocking` the async path sleeps synchronously, which is what
+    calling `invoke` from an async node does to the event loop.
+
+    `script` scripts the turns of a conversation: the n-th model call of a
+    conversation (n = AI messages already in it) answers with `script[n]`,
+    a dict with `content` and/or `tool_calls` (`[{"name": ..., "args": ...}]`).
+    Past the script the model answers with `response`.
+
+    A forced tool choice is answered with a tool call: of the named tool, or
+    for "any" and "required" of the only bound tool, e.g. the output schema
+    of `with_structured_output`, or of the tool taking the `structured` args.
+    Its args are `structured`, or built from the schema of the tool.
+    """
+
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    response: str = "ok"
+    script: List[Dict[str, Any]] = []
+    structured: Optional[Dict[str, Any]] = None
+    blocking: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        # part of the key of cached completions
+        return {
+            "response": self.response,
+            "script": self.script,
+            "structured": self.structured,
+        }
+
+    def get_num_tokens_from_messages(
+        self, messages: List[BaseMessage], tools: Optional[Sequence] = None
+    ) -> int:
+        # whitespace tokens, avoids loading a tokenizer
+        return sum(len(str(message.content).split()) for message in messages)
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Any = None, **kwargs):
+        formatted = [convert_to_openai_tool(tool) for tool in tools]
+        if "ls_structured_output_format" in kwargs and len(formatted) == 1:
+            # with_structured_output, like the OpenAI models, names the schema
+            # so the call is answered with it whatever the script
+            tool_choice = formatted[0]["function"]["name"]
+        return self.bind(tools=formatted, tool_choice=tool_choice, **kwargs)
+
+    def _message(
+        self,
+        messages: List[BaseMessage],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        tool_choice: Any = None,
+    ) -> AIMessage:
+        turn = sum(isinstance(message, AIMessage) for message in messages)
+        step = self.script[turn] if turn < len(self.script) else None
+
+        bound = {tool["function"]["name"] for tool in tools or []}
+        if step is not None and any(
+            call["name"] not in bound for call in step.get("tool_calls", [])
+        ):
+            # e.g. the with_structured_output call, only the schema is bound
+            step = None
+
+        forced = self._forced_tool(tools, tool_choice, scripted=step is not None)
+        if forced is not None:
+            # with_structured_output or the response tool of a single call
+            step = {
+                "tool_calls": [{"name": forced["name"], "args": self._args(forced)}]
+            }
+        step = step or {"content": self.response}
+
+        tool_calls = [
+            {
+                "name": call["name"],
+                "args": call.get("args", {}),
+                "id": f"call_{turn}_{i}",
+            }
+            for i, call in enumerate(step.get("tool_calls", []))
+        ]
+        content = step.get("content", "")
+        prompt_tokens = self.get_num_tokens_from_messages(messages)
+        completion_tokens = max(len(content.split()), len(tool_calls) * 8)
+        return AIMessage(
+            content=content,
+            tool_calls=tool_calls,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+
+    def _forced_tool(
+        self, tools: Optional[List[Dict[str, Any]]], tool_choice: Any, scripted: bool
+    ) -> Optional[Dict[str, Any]]:
+        """The function the model has to call, if any"""
+        if not tools or tool_choice is None:
+            return None
+        functions = {tool["function"]["name"]: tool["function"] for tool in tools}
+        if isinstance(tool_choice, dict):
+            tool_choice = tool_choice.get("function", {}).get("name")
+        if tool_choice in functions:
+            return functions[tool_choice]
+        if tool_choice not in ("any", "required") or scripted:
+            return None
+        if len(functions) == 1:
+            # with_structured_output binds only the schema
+            return next(iter(functions.values()))
+        if self.structured is not None:
+            # the response tool of single call mode is the one taking exactly
+            # the structured args
+            for function in functions.values():
+                properties = function.get("parameters", {}).get("properties", {})
+                if set(properties) == set(self.structured):
+                    return function
+        # past the script the agent tools are not called, or the tool loop of
+        # an agent binding them with tool_choice="any" would never end
+        return None
+
+    def _args(self, function: Dict[str, Any]) -> Dict[str, Any]:
+        if self.structured is not None:
+            return self.structured
+        defaults = {
+            "string": "text",
+            "number": 0.0,
+            "integer": 0,
+            "boolean": False,
+            "array": [],
+            "object": {},
+        }
+        properties = function.get("parameters", {}).get("properties", {})
+        return {
+            name: defaults.get(schema.get("type"), None)
+            for name, schema in properties.items()
+        }
+
+    def _delay(self, message: AIMessage) -> float:
+        delay = self.latency
+        if self.tokens_per_second:
+            delay += message.usage_metadata["output_tokens"] / self.tokens_per_second
+        return delay
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self._message(
+            messages, kwargs.get("tools"), kwargs.get("tool_choice")
+        )
+        time.sleep(self._delay(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> ChatResult:
+        message = self._message(
+            messages, kwargs.get("tools"), kwargs.get("tool_choice")
+        )
+        if self.blocking:
+            time.sleep(self._delay(message))
+        else:
+            await asyncio.sleep(self._delay(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def use_fake_chat_model(**fields: Any) -> None:
+    """Make `model: fake:<anything>` create a `FakeChatModel` with `fields`
+
+    Agents pick their model from the `model` env setting, so this plugs the
+    fake model into `BaseAgent`, `BaseAgentNode` and `Executor` alike, e.g.
+    with the `MODEL=fake:bench` environment variable.
+    """
+    register_chat_model("fake", lambda name, **kwargs: FakeChatModel(**fields))
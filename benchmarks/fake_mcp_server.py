@@ -0,0 +1,52 @@
+"""Local stand-in MCP server for benchmarks and manual tests
+
+    python -m benchmarks.fake_mcp_server                      # stdio
+    python -m benchmarks.fake_mcp_server --transport streamable-http --port 8888
+
+Tools answer deterministically after `--latency` seconds.
+"""
+
+import argparse
+import asyncio
+
+from mcp.server.fastmcp import FastMCP
+
+
+def create_server(latency: float = 0.0, port: int = 8888) -> FastMCP:
+    server = FastMCP("fake", port=port, log_level="WARNING")
+
+    @server.tool()
+    async def echo(text: str) -> str:
+        """Echo the text back"""
+        await asyncio.sleep(latency)
+        return text
+
+    @server.tool()
+    async def add(a: float, b: float) -> float:
+        """Add two numbers"""
+        await asyncio.sleep(latency)
+        return a + b
+
+    @server.tool()
+    async def get_weather(city: str) -> dict:
+        """Get the weather of a city"""
+        await asyncio.sleep(latency)
+        return {"city": city, "temperature": 21.5, "wind_speed": 12.0}
+
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--transport", choices=["stdio", "streamable-http"], default="stdio"
+    )
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    create_server(args.latency, args.port).run(transport=args.transport)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Import time and cold start of the workflow pipeline
+
+Every measurement runs in a fresh interpreter: the import time of the main
+modules, and the cold start of a workflow, i.e. importing `Parser`,
+`Planner` and `Executor`, parsing and planning a chain of agent nodes and
+running it once against the fake chat model.
+
+    python -m benchmarks.import_bench --output imports.json
+    python -m benchmarks.import_bench --compare imports.json --budget 2000
+
+Exits with status 1 when the cold start exceeds `--budget` milliseconds or
+a measurement regressed by more than `--tolerance` against `--compare`.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+# nothing but the standard library above, the parent process must stay cheap
+# and the child measures its own imports
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MODULES = [
+    "imind_ai.agent.config.base",
+    "imind_ai.agent.base.agent",
+    "imind_ai.agent.workflow.pipeline.parser",
+    "imind_ai.agent.workflow.pipeline.planner",
+    "imind_ai.agent.workflow.pipeline.executor",
+]
+
+
+def import_module(name: str) -> Dict[str, float]:
+    start = time.perf_counter()
+    __import__(name)
+    return {"import_ms": (time.perf_counter() - start) * 1000}
+
+
+def cold_start(length: int) -> Dict[str, float]:
+    """Phases of the first run of a workflow in a new process"""
+    import asyncio
+
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    from imind_ai.agent.config.schema import Input
+    from imind_ai.agent.workflow.pipeline.context import Context
+    from imind_ai.agent.workflow.pipeline.executor import Executor
+    from imind_ai.agent.workflow.pipeline.parser import Parser
+    from imind_ai.agent.workflow.pipeline.planner import Planner
+
+    timings["import_ms"] = (time.perf_counter() - start) * 1000
+
+    from benchmarks.fake_llm import use_fake_chat_model
+    from benchmarks.workflow_bench import chain_workflow
+
+    use_fake_chat_model()
+    values = chain_workflow(length)
+
+    start = time.perf_counter()
+    context = Context()
+    Parser.parse(context, values=values)
+    timings["parse_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    plan = Planner.plan(context)
+    timings["plan_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    asyncio.run(Executor.execute(plan, Input(query="cold start")))
+    timings["first_run_ms"] = (time.perf_counter() - start) * 1000
+
+    timings["total_ms"] = sum(timings.values())
+    return timings
+
+
+def child(target: str, length: int) -> None:
+    if target == "cold_start":
+        timings = cold_start(length)
+    else:
+        timings = import_module(target)
+    print(json.dumps(timings))
+
+
+def measure(target: str, repeat: int, length: int) -> Dict[str, float]:
+    """Median timings of `target` over `repeat` fresh interpreters"""
+    env = {
+        **os.environ,
+        "MODEL": os.environ.get("MODEL", "fake:imports"),
+        "POSTGRES_DSN": os.environ.get("POSTGRES_DSN", ""),
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])
+        ),
+    }
+    samples: List[Dict[str, float]] = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.import_bench",
+                "--child",
+                target,
+                "--length",
+                str(length),
+            ],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return {
+        key: statistics.median(sample[key] for sample in samples) for key in samples[0]
+    }
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Regressions of the current results against a baseline"""
+    regressions: List[str] = []
+    for name, metrics in current["results"].items():
+        base = baseline.get("results", {}).get(name, {})
+        for key, value in metrics.items():
+            before = base.get(key)
+            if not before:
+                continue
+            change = (value - before) / before
+            if change > tolerance:
+                regressions.append(
+                    f"{name} {key}: {before:.1f} -> {value:.1f} ({change:+.0%})"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--length", type=int, default=3)
+    parser.add_argument("--budget", type=float, help="cold start budget in ms")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.length)
+        return
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "repeat": args.repeat,
+            "length": args.length,
+        },
+        "results": {},
+    }
+    for target in [*args.modules, "cold_start"]:
+        timings = measure(target, args.repeat, args.length)
+        results["results"][target] = timings
+        print(
+            f"{target:45} "
+            + " ".join(f"{key}={value:8.1f}" for key, value in timings.items())
+        )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    failures: List[str] = []
+    total = results["results"]["cold_start"]["total_ms"]
+    if args.budget is not None and total > args.budget:
+        failures.append(f"cold start {total:.1f}ms over budget {args.budget:.1f}ms")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        failures.extend(compare(baseline, results, args.tolerance))
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
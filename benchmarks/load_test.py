@@ -0,0 +1,300 @@
+"""Replay a trace of workflow inputs against a planned workflow
+
+Each line of the trace is a JSON object with the input of one run, e.g.
+`{"query": "讲个笑话"}`. The trace is replayed against `Executor.execute`
+either open loop at a target rate (`--qps`) or closed loop with a fixed
+number of concurrent clients (`--concurrency`), by default against the fake
+chat model so no LLM server is needed.
+
+    python -m benchmarks.load_test --trace trace.jsonl --qps 50 --duration 60
+    python -m benchmarks.load_test --trace trace.jsonl --concurrency 20 \\
+        --workflow workflow.yaml --output report.json
+
+Reports throughput, latency percentiles, error rate, event loop lag and
+RSS, in total and per `--interval` window, to plan how many workers a
+workflow config needs. Runs with an empty output count as `EmptyOutput`
+errors, and the test exits with status 1 when any run had one.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import current_rss_mb, percentile, plan_workflow, rss_mb
+from benchmarks.fake_llm import use_fake_chat_model
+from imind_ai.agent.base.mcp import MCPManager
+from imind_ai.agent.config.schema import Input
+from imind_ai.agent.workflow.pipeline.executor import Executor
+from imind_ai.agent.workflow.pipeline.plan import Plan
+from imind_ai.agent.workflow.pipeline.planner import Planner
+
+
+class EmptyOutput(Exception):
+    """A run finished with an empty output, e.g. unparsed structured output"""
+
+
+def is_empty(value: Any) -> bool:
+    if isinstance(value, dict):
+        return all(is_empty(item) for item in value.values())
+    if isinstance(value, list):
+        return all(is_empty(item) for item in value)
+    if isinstance(value, str):
+        return not value
+    return value is None
+
+
+class Recorder:
+    """Results of the runs, bucketed in windows of `interval` seconds"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+        self.lags: List[float] = []
+        self.in_flight = 0
+        self.windows: List[Dict[str, Any]] = []
+        self._window = self._new_window()
+
+    def _new_window(self) -> Dict[str, Any]:
+        return {"latencies": [], "errors": 0, "lags": [], "max_in_flight": 0}
+
+    def started(self) -> None:
+        self.in_flight += 1
+        self._window["max_in_flight"] = max(
+            self._window["max_in_flight"], self.in_flight
+        )
+
+    def finished(self, latency: float, error: BaseException | None) -> None:
+        self.in_flight -= 1
+        if error is None:
+            self.latencies.append(latency)
+            self._window["latencies"].append(latency)
+        else:
+            self.errors[type(error).__name__] += 1
+            self._window["errors"] += 1
+
+    def lag(self, seconds: float) -> None:
+        self.lags.append(seconds)
+        self._window["lags"].append(seconds)
+
+    def flush(self) -> Dict[str, Any]:
+        """Close the current window and return its summary"""
+        window, self._window = self._window, self._new_window()
+        latencies = window["latencies"]
+        summary = {
+            "t": round(time.perf_counter() - self.start, 3),
+            "completed": len(latencies),
+            "errors": window["errors"],
+            "throughput_rps": len(latencies) / self.interval,
+            "latency_p50_ms": percentile(latencies, 0.5) * 1000,
+            "latency_p99_ms": percentile(latencies, 0.99) * 1000,
+            "loop_lag_max_ms": max(window["lags"], default=0.0) * 1000,
+            "max_in_flight": window["max_in_flight"],
+            "rss_mb": current_rss_mb(),
+        }
+        self.windows.append(summary)
+        return summary
+
+
+async def monitor(recorder: Recorder, stop: asyncio.Event, verbose: bool):
+    """Measure event loop lag and close the report windows"""
+    tick = 0.05
+    next_flush = time.perf_counter() + recorder.interval
+    while not stop.is_set():
+        before = time.perf_counter()
+        await asyncio.sleep(tick)
+        recorder.lag(max(0.0, time.perf_counter() - before - tick))
+        if time.perf_counter() >= next_flush:
+            next_flush += recorder.interval
+            window = recorder.flush()
+            if verbose:
+                print(
+                    f"t={window['t']:7.1f}s {window['throughput_rps']:7.1f} runs/s "
+                    f"p50={window['latency_p50_ms']:.0f}ms "
+                    f"p99={window['latency_p99_ms']:.0f}ms "
+                    f"errors={window['errors']} "
+                    f"lag={window['loop_lag_max_ms']:.1f}ms "
+                    f"in_flight={window['max_in_flight']} "
+                    f"rss={window['rss_mb']:.0f}MB"
+                )
+
+
+def load_trace(path: Path) -> List[Dict[str, Any]]:
+    with path.open(encoding="utf-8") as trace:
+        inputs = [json.loads(line) for line in trace if line.strip()]
+    if not inputs:
+        raise ValueError(f"{path} 中没有请求")
+    return inputs
+
+
+async def replay(plan: Plan, inputs: List[Dict[str, Any]], args) -> Recorder:
+    recorder = Recorder(args.interval)
+    requests = args.requests or len(inputs)
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    def expired() -> bool:
+        return deadline is not None and time.perf_counter() >= deadline
+
+    async def run(idx: int):
+        recorder.started()
+        begin = time.perf_counter()
+        error = None
+        try:
+            output = await asyncio.wait_for(
+                Executor.execute(plan, Input(**inputs[idx % len(inputs)])),
+                args.timeout,
+            )
+            if is_empty(output.dict()):
+                raise EmptyOutput(f"第{idx}个请求的输出为空")
+        except Exception as e:
+            error = e
+        recorder.finished(time.perf_counter() - begin, error)
+
+    stop = asyncio.Event()
+    monitor_task = asyncio.create_task(monitor(recorder, stop, not args.quiet))
+
+    if args.qps:
+        # open loop: requests arrive on schedule whatever the latency
+        tasks = []
+        start = time.perf_counter()
+        at = 0.0
+        for idx in range(requests):
+            if expired():
+                break
+            delay = start + at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(run(idx)))
+            at += random.expovariate(args.qps) if args.poisson else 1 / args.qps
+        await asyncio.gather(*tasks)
+    else:
+        # closed loop: each client sends its next request when the last ended
+        counter = iter(range(requests))
+
+        async def client():
+            for idx in counter:
+                if expired():
+                    return
+                await run(idx)
+
+        await asyncio.gather(*[client() for _ in range(args.concurrency)])
+
+    stop.set()
+    await monitor_task
+    recorder.flush()
+    return recorder
+
+
+def report(recorder: Recorder, wall: float, args) -> Dict[str, Any]:
+    latencies = recorder.latencies
+    failed = sum(recorder.errors.values())
+    total = len(latencies) + failed
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": {
+                key: str(value) if isinstance(value, Path) else value
+                for key, value in vars(args).items()
+            },
+        },
+        "summary": {
+            "requests": total,
+            "completed": len(latencies),
+            "errors": dict(recorder.errors),
+            "error_rate": failed / total if total else 0.0,
+            "wall_seconds": wall,
+            "throughput_rps": len(latencies) / wall if wall else 0.0,
+            "latency_p50_ms": percentile(latencies, 0.5) * 1000,
+            "latency_p90_ms": percentile(latencies, 0.9) * 1000,
+            "latency_p99_ms": percentile(latencies, 0.99) * 1000,
+            "latency_max_ms": max(latencies, default=0.0) * 1000,
+            "loop_lag_p99_ms": percentile(recorder.lags, 0.99) * 1000,
+            "loop_lag_max_ms": max(recorder.lags, default=0.0) * 1000,
+            "rss_peak_mb": rss_mb(),
+        },
+        "windows": recorder.windows,
+    }
+
+
+async def main(args):
+    if args.backend == "fake":
+        # agents read their model from the env settings when they are built
+        os.environ["MODEL"] = "fake:load"
+        os.environ.setdefault("POSTGRES_DSN", "")
+        use_fake_chat_model(
+            latency=args.latency,
+            tokens_per_second=args.tokens_per_second,
+            response="a short answer from the fake model",
+        )
+
+    inputs = load_trace(args.trace)
+    plan = plan_workflow(args.workflow)
+    await Planner.prewarm(plan)
+
+    try:
+        start = time.perf_counter()
+        recorder = await replay(plan, inputs, args)
+        wall = time.perf_counter() - start
+    finally:
+        await MCPManager.close()
+
+    result = report(recorder, wall, args)
+    summary = result["summary"]
+    print(
+        f"requests={summary['requests']} "
+        f"throughput={summary['throughput_rps']:.1f} runs/s "
+        f"p50={summary['latency_p50_ms']:.0f}ms "
+        f"p90={summary['latency_p90_ms']:.0f}ms "
+        f"p99={summary['latency_p99_ms']:.0f}ms "
+        f"error_rate={summary['error_rate']:.2%} "
+        f"lag_p99={summary['loop_lag_p99_ms']:.1f}ms "
+        f"rss_peak={summary['rss_peak_mb']:.0f}MB"
+    )
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    if summary["errors"].get(EmptyOutput.__name__):
+        print(f"{summary['errors'][EmptyOutput.__name__]} runs had an empty output")
+        sys.exit(1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--trace", type=Path, required=True, help="JSONL inputs")
+    parser.add_argument("--workflow", type=Path, default=Path("workflow.yaml"))
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--qps", type=float, help="open loop arrival rate")
+    mode.add_argument("--concurrency", type=int, default=10, help="closed loop")
+    parser.add_argument(
+        "--poisson", action="store_true", help="exponential inter-arrival times"
+    )
+    parser.add_argument(
+        "--requests", type=int, help="requests to send, the trace is cycled"
+    )
+    parser.add_argument("--duration", type=float, help="stop sending after seconds")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--interval", type=float, default=1.0)
+    parser.add_argument(
+        "--backend",
+        choices=["fake", "configured"],
+        default="fake",
+        help="fake chat model, or the model configured for the workflow",
+    )
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--quiet", action="store_true")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
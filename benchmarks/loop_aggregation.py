@@ -0,0 +1,60 @@
+"""Loop aggregation: recomputing over all items vs incremental accumulators
+
+python -m benchmarks.loop_aggregation --iterations 10000
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from imind_ai.agent.config.base import Aggregation
+from imind_ai.agent.workflow.graph.aggregation import create_accumulator
+
+
+def recompute(agg_type: str, values: List[float]) -> Dict[str, Any]:
+    """The previous algorithm: keep every item and recompute on each lap"""
+    items: List[float] = []
+    ret = None
+    for value in values:
+        items.append(value)
+        if agg_type == "sum":
+            ret = sum(items)
+        elif agg_type == "mean":
+            ret = sum(items) / len(items)
+    return {"items": items, "result": ret}
+
+
+def incremental(agg_type: str, values: List[float]) -> Dict[str, Any]:
+    accumulator = create_accumulator(Aggregation(reference="x", agg_type=agg_type))
+    acc = accumulator.init()
+    ret = None
+    for value in values:
+        acc = accumulator.add(acc, value)
+        ret = accumulator.result(acc)
+    return {"acc": acc, "result": ret}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, nargs="+", default=[10000, 20000])
+    args = parser.parse_args()
+
+    random.seed(0)
+    for iterations in args.iterations:
+        values = [random.random() for _ in range(iterations)]
+        for agg_type in ("sum", "mean"):
+            for name, func in (("recompute", recompute), ("incremental", incremental)):
+                start = time.perf_counter()
+                result = func(agg_type, values)
+                elapsed = time.perf_counter() - start
+                state_size = len(json.dumps(result))
+                print(
+                    f"{name:<12} {agg_type:<5} iterations={iterations} "
+                    f"time={elapsed * 1000:.1f}ms state={state_size}B"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Parse time of large generated workflows
+
+Generates workflows of `--sizes` nodes mixing every node type (agents, map,
+loop aggregation, condition and join nodes) and times validating them into
+a `Config`, reporting the time per node so non-linear growth stands out.
+
+    python -m benchmarks.parse_bench --sizes 100 1000 5000
+"""
+
+import argparse
+import time
+from typing import Any, Dict, List
+
+from benchmarks.workflow_bench import agent_node
+from imind_ai.agent.config.base import Config
+
+
+def block(idx: int) -> List[Dict[str, Any]]:
+    """Five nodes: an agent, a map over its result, an aggregation, a
+    condition looping back to the agent and a join"""
+    agent, mapped, agg, route, join = (
+        f"agent_{idx}",
+        f"map_{idx}",
+        f"agg_{idx}",
+        f"route_{idx}",
+        f"join_{idx}",
+    )
+    prev = "__start__" if idx == 0 else f"join_{idx - 1}"
+    return [
+        {**agent_node(idx, prev, "workflow.query"), "next": mapped},
+        {
+            **agent_node(idx, agent, f"{agent}.result"),
+            "id": mapped,
+            "name": mapped,
+            "type": "map",
+            "items": f"{agent}.result",
+            "input": {
+                "content": {"type": "str", "source": "reference", "reference": "item"}
+            },
+            "next": agg,
+        },
+        {
+            "id": agg,
+            "name": agg,
+            "type": "loop_aggregation",
+            "aggregation": {
+                "results": {"reference": f"{mapped}.results", "agg_type": "list"}
+            },
+            "next": route,
+            "next_type": "condition",
+        },
+        {
+            "id": route,
+            "name": route,
+            "type": "condition",
+            "prev": agg,
+            "if": {
+                "logic_operator": "and",
+                "condition": [
+                    {
+                        "operator": "lt",
+                        "operand": f"{agg}.counter",
+                        "op_type": "int",
+                        "source": "input",
+                        "value": 3,
+                    }
+                ],
+                "next": agent,
+            },
+            "else": join,
+        },
+        {"id": join, "name": join, "type": "join", "wait": "all"},
+    ]
+
+
+def large_workflow(size: int) -> Dict[str, Any]:
+    nodes: List[Dict[str, Any]] = []
+    for idx in range((size + 4) // 5):
+        nodes.extend(block(idx))
+    return {
+        "agent": {
+            "id": f"large-{size}",
+            "env": {},
+            "input": {"query": {"type": "str"}},
+            "output": "",
+        },
+        "nodes": nodes[:size],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        values = large_workflow(size)
+        Config.from_dict(values)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            Config.from_dict(values)
+            best = min(best, time.perf_counter() - start)
+        print(f"{size:6} nodes {best * 1000:9.2f}ms {best / size * 1e6:7.1f}us/node")
+
+
+if __name__ == "__main__":
+    main()
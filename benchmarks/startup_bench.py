@@ -0,0 +1,91 @@
+"""Startup cost of agents and workflow plans
+
+Builds `--agents` BaseAgent instances and as many workflow agent nodes with
+an output schema, once with the memoized settings classes, dynamic models
+and settings.yaml source, and once with those caches cleared before every
+agent, which is what every agent paid before they existed.
+
+    python -m benchmarks.startup_bench --agents 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+os.environ.setdefault("MODEL", "fake:startup")
+os.environ.setdefault("POSTGRES_DSN", "")
+
+from benchmarks.common import ROOT
+from benchmarks.fake_llm import use_fake_chat_model
+from benchmarks.workflow_bench import chain_workflow
+from imind_ai.agent.base.agent import BaseAgent
+from imind_ai.agent.config.base import BaseAgentNodeConfig
+from imind_ai.agent.workflow.graph.base_agent import BaseAgentNode
+from imind_ai.utils import clear_schema_caches
+
+
+SETTINGS_YAML = "\n".join(f"option_{idx}: value {idx}" for idx in range(50))
+
+
+def measure(count: int, build: Callable[[int], Any], cold: bool) -> float:
+    """Mean seconds of `build`, with the schema caches cleared before each
+    call when `cold`"""
+    clear_schema_caches()
+    total = 0.0
+    for idx in range(count):
+        if cold:
+            clear_schema_caches()
+        start = time.perf_counter()
+        build(idx)
+        total += time.perf_counter() - start
+    return total / count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--agents", type=int, default=200)
+    args = parser.parse_args()
+
+    use_fake_chat_model()
+    # agents read settings.yaml from the working directory
+    sys.path.insert(0, str(ROOT))
+    workdir = Path(tempfile.mkdtemp())
+    (workdir / "settings.yaml").write_text(SETTINGS_YAML, encoding="utf-8")
+    os.chdir(workdir)
+
+    def build_agent(idx: int):
+        BaseAgent(id=f"agent-{idx}", env={})
+
+    nodes = [
+        BaseAgentNodeConfig(**node) for node in chain_workflow(args.agents)["nodes"]
+    ]
+
+    def build_node(idx: int):
+        BaseAgentNode(nodes[idx])
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, build, count in [
+        ("agent", build_agent, args.agents),
+        ("agent node", build_node, args.agents),
+    ]:
+        results[name] = {
+            "cold_ms": measure(count, build, cold=True) * 1000,
+            "warm_ms": measure(count, build, cold=False) * 1000,
+        }
+
+    for name, result in results.items():
+        print(
+            f"{name:16} cold={result['cold_ms']:9.2f}ms "
+            f"memoized={result['warm_ms']:9.2f}ms "
+            f"speedup={result['cold_ms'] / result['warm_ms']:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Workflow state and checkpoint size with and without state pruning
+
+Runs a chain of agent nodes and the looping sample workflow with
+`prune_state` on and off against the fake chat model, answering every call
+with a `--result-bytes` structured output, and reports per run the size of
+the final state, the bytes pruned by the nodes, the bytes written to the
+checkpointer and the latency. The runs are measured, the latency includes
+serializing the state and the pruned values for their sizes.
+
+    python -m benchmarks.state_pruning --runs 20 --length 10
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+os.environ.setdefault("MODEL", "fake:pruning")
+os.environ.setdefault("POSTGRES_DSN", "")
+
+from benchmarks.common import ROOT, plan_workflow
+from benchmarks.fake_llm import use_fake_chat_model
+from benchmarks.workflow_bench import chain_workflow
+from imind_ai.agent.config.base import Config
+from imind_ai.agent.config.schema import Input
+from imind_ai.agent.workflow.pipeline.context import RunContext
+from imind_ai.agent.workflow.pipeline.executor import Executor
+from imind_ai.agent.workflow.pipeline.graph_cache import GraphCache
+from imind_ai.agent.workflow.pipeline.run_metrics import RunMetrics
+from langgraph.checkpoint.memory import InMemorySaver
+
+
+def checkpoint_bytes(session_id: str) -> int:
+    """Bytes of the channel values and checkpoints stored for a session"""
+    saver = GraphCache.get_checkpointer()
+    blobs = sum(
+        len(value[1]) for key, value in saver.blobs.items() if key[0] == session_id
+    )
+    checkpoints = sum(
+        len(checkpoint[1]) + len(metadata[1])
+        for namespace in saver.storage.get(session_id, {}).values()
+        for checkpoint, metadata, _ in namespace.values()
+    )
+    return blobs + checkpoints
+
+
+async def run_scenario(values: Dict[str, Any], runs: int) -> Dict[str, float]:
+    plan = plan_workflow(values)
+    await Executor.execute(plan, Input(query="warm up"))
+
+    state, pruned, stored, latencies = [], [], [], []
+    for idx in range(runs):
+        ctx = RunContext()
+        ctx.session_id = f"{plan.fingerprint[:8]}-{idx}"
+        ctx.metrics = RunMetrics()
+        start = time.perf_counter()
+        output = await Executor.execute(plan, Input(query=f"question {idx}"), ctx)
+        latencies.append(time.perf_counter() - start)
+        state.append(output.metrics["state_bytes"])
+        pruned.append(output.metrics["pruned_bytes"])
+        stored.append(checkpoint_bytes(ctx.session_id))
+
+    return {
+        "state_bytes": statistics.fmean(state),
+        "pruned_bytes": statistics.fmean(pruned),
+        "checkpoint_bytes": statistics.fmean(stored),
+        "latency_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--length", type=int, default=10)
+    parser.add_argument("--result-bytes", type=int, default=2000)
+    args = parser.parse_args()
+
+    use_fake_chat_model(structured={"result": "r" * args.result_bytes})
+    # keep the checkpoints after the runs to measure them
+    GraphCache.set_checkpointer(InMemorySaver())
+
+    scenarios = {
+        f"chain-{args.length}": chain_workflow(args.length),
+        "sample": Config.from_file(ROOT / "workflow.yaml").model_dump(by_alias=True),
+    }
+    for name, values in scenarios.items():
+        for prune in (False, True):
+            result = await run_scenario({**values, "prune_state": prune}, args.runs)
+            print(
+                f"{name:10} prune={str(prune):5} "
+                f"state={result['state_bytes']:9.0f}B "
+                f"pruned={result['pruned_bytes']:9.0f}B "
+                f"checkpoints={result['checkpoint_bytes']:9.0f}B "
+                f"latency={result['latency_ms']:7.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,326 @@
+"""End-to-end workflow benchmarks against a fake chat model and MCP server
+
+Runs the sample `workflow.yaml`, synthetic chains of agent nodes, an agent
+fanning out to parallel agents and an agent calling tools of the local fake MCP server, all through `Parser`,
+`Planner` and `Executor`. Reports throughput, p50/p99 latency, the
+per-node overhead (node time not spent in the LLM or in tools) and
+memory, and stores the results as JSON.
+
+    python -m benchmarks.workflow_bench --output results.json
+    python -m benchmarks.workflow_bench --compare results.json
+
+With `--compare` the run is checked against earlier results and exits
+with status 1 when a metric regressed by more than `--tolerance`.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# agents read their model from the env settings, use the fake one and keep
+# the checkpoints in memory
+os.environ.setdefault("MODEL", "fake:bench")
+os.environ.setdefault("POSTGRES_DSN", "")
+
+from benchmarks.common import ROOT, percentile, plan_workflow, rss_mb
+from benchmarks.fake_llm import use_fake_chat_model
+from imind_ai.agent.base.mcp import MCPManager
+from imind_ai.agent.config.schema import Input
+from imind_ai.agent.workflow.pipeline.context import RunContext
+from imind_ai.agent.workflow.pipeline.executor import Executor
+from imind_ai.agent.workflow.pipeline.planner import Planner
+from imind_ai.agent.workflow.pipeline.run_metrics import RunMetrics
+
+
+# lower is better for every metric but throughput
+HIGHER_IS_BETTER = {"throughput_rps"}
+
+
+def agent_node(idx: int, prev: str, reference: str, **extra: Any) -> Dict[str, Any]:
+    return {
+        "id": f"agent_{idx}",
+        "name": f"agent_{idx}",
+        "type": "base_agent",
+        "prev": prev,
+        "system_prompt": "You are a helpful assistant",
+        "input": {
+            "content": {"type": "str", "source": "reference", "reference": reference}
+        },
+        "output": {"result": {"description": "result", "type": "str"}},
+        **extra,
+    }
+
+
+def chain_workflow(length: int) -> Dict[str, Any]:
+    """A chain of agent nodes, each reading the result of the previous one"""
+    nodes = []
+    for idx in range(length):
+        prev = "__start__" if idx == 0 else f"agent_{idx - 1}"
+        reference = "workflow.query" if idx == 0 else f"agent_{idx - 1}.result"
+        node = agent_node(idx, prev, reference)
+        if idx < length - 1:
+            node["next"] = f"agent_{idx + 1}"
+        nodes.append(node)
+
+    return {
+        "agent": {
+            "id": f"chain-{length}",
+            "env": {},
+            "input": {"query": {"type": "str"}},
+            "output": {
+                "content": {
+                    "type": "str",
+                    "source": "reference",
+                    "reference": f"agent_{length - 1}.result",
+                }
+            },
+        },
+        "nodes": nodes,
+    }
+
+
+def fan_out_workflow(width: int) -> Dict[str, Any]:
+    """An agent node fanning out to `width` agent nodes joined by a join node"""
+    branches = [f"agent_{idx}" for idx in range(1, width + 1)]
+    nodes = [agent_node(0, "__start__", "workflow.query", next=branches)]
+    nodes += [
+        agent_node(idx, "agent_0", "agent_0.result", next="join")
+        for idx in range(1, width + 1)
+    ]
+    nodes.append({"id": "join", "name": "join", "type": "join"})
+    return {
+        "agent": {
+            "id": f"fan-out-{width}",
+            "env": {},
+            "input": {"query": {"type": "str"}},
+            "output": {
+                "content": {
+                    "type": "dict",
+                    "source": "reference",
+                    "reference": "join.results",
+                }
+            },
+        },
+        "nodes": nodes,
+    }
+
+
+def mcp_workflow() -> Dict[str, Any]:
+    """One agent node using the tools of the fake MCP server over stdio"""
+    node = agent_node(
+        0,
+        "__start__",
+        "workflow.query",
+        mcp={
+            "fake": {
+                "transport": "stdio",
+                "command": sys.executable,
+                "args": ["-m", "benchmarks.fake_mcp_server"],
+                "cwd": str(ROOT),
+            }
+        },
+    )
+    return {
+        "agent": {
+            "id": "mcp-1",
+            "env": {},
+            "input": {"query": {"type": "str"}},
+            "output": {
+                "content": {
+                    "type": "str",
+                    "source": "reference",
+                    "reference": "agent_0.result",
+                }
+            },
+        },
+        "nodes": [node],
+    }
+
+
+SCENARIOS: Dict[str, Callable[[], Dict[str, Any] | Path]] = {
+    "sample": lambda: ROOT / "workflow.yaml",
+    "chain-5": lambda: chain_workflow(5),
+    "chain-20": lambda: chain_workflow(20),
+    "fan-out-5": lambda: fan_out_workflow(5),
+    "mcp-tools": mcp_workflow,
+}
+
+# fake model behaviour per scenario, the MCP agent calls a tool first
+MODELS: Dict[str, Dict[str, Any]] = {
+    "mcp-tools": {
+        "script": [{"tool_calls": [{"name": "add", "args": {"a": 1, "b": 2}}]}],
+        "structured": {"result": "3"},
+    },
+}
+
+
+async def run_scenario(
+    name: str, runs: int, concurrency: int, model: Dict[str, Any]
+) -> Dict[str, Any]:
+    use_fake_chat_model(**{**model, **MODELS.get(name, {})})
+
+    start = time.perf_counter()
+    plan = plan_workflow(SCENARIOS[name]())
+    await Planner.prewarm(plan)
+    plan_seconds = time.perf_counter() - start
+
+    # warm up the caches of the plan, agents and MCP sessions
+    await Executor.execute(plan, Input(query="warm up"))
+
+    gc.collect()
+    rss_before = rss_mb()
+    latencies: List[float] = []
+    overheads: Dict[str, List[float]] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(idx: int):
+        async with semaphore:
+            ctx = RunContext()
+            ctx.metrics = RunMetrics()
+            begin = time.perf_counter()
+            output = await Executor.execute(plan, Input(query=f"question {idx}"), ctx)
+            latencies.append(time.perf_counter() - begin)
+            for stats in output.metrics["nodes"].values():
+                if stats["calls"]:
+                    overhead = (
+                        stats["wall_seconds"]
+                        - stats["llm_seconds"]
+                        - stats["tool_seconds"]
+                    ) / stats["calls"]
+                    overheads.setdefault(stats["type"], []).append(overhead)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[run(idx) for idx in range(runs)])
+    wall = time.perf_counter() - start
+
+    return {
+        "runs": runs,
+        "concurrency": concurrency,
+        "plan_seconds": plan_seconds,
+        "throughput_rps": runs / wall,
+        "latency_p50_ms": percentile(latencies, 0.5) * 1000,
+        "latency_p99_ms": percentile(latencies, 0.99) * 1000,
+        "latency_mean_ms": statistics.fmean(latencies) * 1000,
+        "node_overhead_ms": {
+            node_type: statistics.fmean(values) * 1000
+            for node_type, values in overheads.items()
+        },
+        "rss_peak_mb": rss_mb(),
+        "rss_growth_mb": rss_mb() - rss_before,
+    }
+
+
+def flatten(metrics: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    values: Dict[str, float] = {}
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            values[f"{prefix}{key}"] = value
+    return values
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Regressions of the current results against a baseline"""
+    regressions: List[str] = []
+    for name, metrics in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        base_values = flatten(base)
+        for key, value in flatten(metrics).items():
+            leaf = key.rsplit(".", 1)[-1]
+            if key not in base_values or leaf in ("runs", "concurrency"):
+                continue
+            if leaf.startswith("rss"):
+                # memory is too noisy for a relative threshold on small numbers
+                continue
+            before = base_values[key]
+            if not before:
+                continue
+            change = (value - before) / before
+            if leaf in HIGHER_IS_BETTER:
+                change = -change
+            if change > tolerance:
+                regressions.append(
+                    f"{name} {key}: {before:.3f} -> {value:.3f} ({change:+.0%})"
+                )
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    model = {
+        "latency": args.latency,
+        "tokens_per_second": args.tokens_per_second,
+        "response": "a short answer from the fake model",
+    }
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {
+                key: str(value) if isinstance(value, Path) else value
+                for key, value in vars(args).items()
+            },
+        },
+        "scenarios": {},
+    }
+
+    try:
+        for name in args.scenarios:
+            metrics = await run_scenario(name, args.runs, args.concurrency, model)
+            results["scenarios"][name] = metrics
+            overhead = ", ".join(
+                f"{node_type}={value:.2f}ms"
+                for node_type, value in metrics["node_overhead_ms"].items()
+            )
+            print(
+                f"{name:10} {metrics['throughput_rps']:8.1f} runs/s "
+                f"p50={metrics['latency_p50_ms']:.1f}ms "
+                f"p99={metrics['latency_p99_ms']:.1f}ms "
+                f"rss={metrics['rss_peak_mb']:.0f}MB overhead: {overhead}"
+            )
+    finally:
+        await MCPManager.close()
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(baseline, results, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
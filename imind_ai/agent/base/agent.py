@@ -1,26 +1,44 @@
+import warnings
+from copy import deepcopy
 from typing import Any, AsyncGenerator, Dict, Optional, Sequence, Type, Tuple
 from uuid import uuid4
 
-from openai import base_url
-from psycopg_pool import AsyncConnectionPool
 from pydantic import BaseModel
 
-from langchain.chat_models import init_chat_model
+from langchain_core.callbacks import Callbacks
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables.config import ensure_config, merge_configs
 from langchain_core.tools import BaseTool
-from langchain_core.messages import AIMessageChunk
+from langchain_core.messages import AIMessage
 from langgraph.checkpoint.memory import InMemorySaver
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.constants import CONFIG_KEY_CHECKPOINTER, CONFIG_KEY_STORE
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.types import Checkpointer
 
 from imind_ai.agent.base.config import Config
-from imind_ai.agent.base.graph import create_base_agent
+from imind_ai.agent.base.graph import StructuredOutputMode, create_base_agent
+from imind_ai.agent.base.llm import create_chat_model, create_llm_cache
 from imind_ai.agent.base.prompt import DEFAULT_PROMPT_TEMPLATE
 from imind_ai.agent.config.schema import Input
 from imind_ai.utils.context import BaseContext
 from imind_ai.utils.settings import build_settings_from_schema, update_schema
 
 
+class DefaultConfig:
+    """`Config.default()` read on first access rather than when the module
+    is imported"""
+
+    def __init__(self):
+        self.cfg: Config | None = None
+
+    def __get__(self, instance: Any, owner: type) -> Config:
+        if self.cfg is None:
+            self.cfg = Config.default()
+        return self.cfg
+
+
 class BaseAgent:
-    cfg = Config.default()
+    cfg = DefaultConfig()
     prompt_template: str = DEFAULT_PROMPT_TEMPLATE
 
     def __init__(
@@ -32,6 +50,8 @@ class BaseAgent:
         system_prompt: str | None = None,
         tools: Optional[Sequence[BaseTool]] = None,
         debug: bool = False,
+        structured_output_mode: StructuredOutputMode = "post_process",
+        llm: BaseChatModel | None = None,
         **kwargs,
     ):
         self.id = id or str(uuid4())
@@ -39,7 +59,9 @@ class BaseAgent:
 
         if env is None:
             env = {}
-        schema = self.get_env_schema()
+        # a copy, the overrides of this agent must not leak into the shared
+        # schema of the other agents
+        schema = deepcopy(self.get_env_schema())
         schema = update_schema(schema, env)
 
         setting_cls = build_settings_from_schema(schema)
@@ -63,19 +85,43 @@ class BaseAgent:
         else:
             checkpointer = None
             self.checkpointer_initialized = True
-        llm = init_chat_model(settings.model, base_url=settings.base_url)
-        self.agent = create_base_agent(
-            llm,
-            settings=settings,
+        self.llm = (
+            llm
+            if llm is not None
+            else create_chat_model(settings.model, base_url=settings.base_url)
+        )
+        llm_cache = create_llm_cache(settings)
+        if llm_cache is not None:
+            # a copy, the given model may be shared with other agents
+            self.llm = self.llm.model_copy(update={"cache": llm_cache})
+        self.output_schema = output_schema
+        self.system_prompt = system_prompt
+        self.debug = debug
+        self.structured_output_mode = structured_output_mode
+        self.agent = self.create_agent(tools, checkpointer)
+
+    def create_agent(
+        self,
+        tools: Optional[Sequence[BaseTool]],
+        checkpointer: Checkpointer | None = None,
+    ) -> CompiledStateGraph:
+        return create_base_agent(
+            self.llm,
+            settings=self.settings,
             tools=tools,
-            output_schema=output_schema,
-            system_prompt=system_prompt,
+            output_schema=self.output_schema,
+            system_prompt=self.system_prompt,
             checkpointer=checkpointer,
-            debug=debug,
+            debug=self.debug,
+            structured_output_mode=self.structured_output_mode,
         )
 
-        self.output_schema = output_schema
-        self.pg_pool = None
+    def update_tools(self, tools: Optional[Sequence[BaseTool]]):
+        """Rebuild the agent for a new tool set, e.g. after MCP tools changed
+
+        Tools are bound to the model once per tool set, not on every LLM turn.
+        """
+        self.agent = self.create_agent(tools, self.agent.checkpointer)
 
     @classmethod
     def get_env_schema(cls) -> Dict[str, Any]:
@@ -96,8 +142,25 @@ class BaseAgent:
     def update_prompt_template(self, template: str):
         self.prompt_template = template
 
-    async def achat(self, user_input: Input, ctx: BaseContext = None) -> Dict | str:
+    async def achat(
+        self,
+        user_input: Input,
+        ctx: BaseContext = None,
+        callbacks: Callbacks = None,
+        checkpointer: Checkpointer | None = None,
+    ) -> Dict | str:
+        """Run the agent once
+
+        `callbacks` are added to the callbacks inherited from the calling
+        runnable, `checkpointer` replaces the agent checkpointer for this call.
+        """
         inputs, config = await self.pre_process(user_input, ctx)
+        if callbacks is not None:
+            config["callbacks"] = merge_configs(
+                ensure_config(), {"callbacks": callbacks}
+            )["callbacks"]
+        if checkpointer is not None:
+            config["configurable"][CONFIG_KEY_CHECKPOINTER] = checkpointer
 
         response = await self.agent.ainvoke(inputs, config=config)
         return response.get("llm_output")
@@ -107,14 +170,24 @@ class BaseAgent:
     ) -> AsyncGenerator[str, None]:
         inputs, config = await self.pre_process(user_input, ctx)
 
+        if (
+            self.output_schema is not None
+            and self.structured_output_mode == "single_call"
+        ):
+            # the structured response arrives as a tool call, nothing to stream
+            response = await self.agent.ainvoke(inputs, config=config)
+            yield response["llm_output"].model_dump_json()
+            return
+
         node_name = "llm_caller" if self.output_schema is None else "post_processor"
 
         async for message_chunk, metadata in self.agent.astream(
             inputs, config=config, stream_mode="messages"
         ):
+            # a cached completion arrives as one whole message
             if (
                 metadata["langgraph_node"] == node_name
-                and isinstance(message_chunk, AIMessageChunk)
+                and isinstance(message_chunk, AIMessage)
                 and len(message_chunk.tool_calls) == 0
                 and message_chunk.content
             ):
@@ -127,26 +200,7 @@ class BaseAgent:
         if self.agent is None:
             raise RuntimeError("The agent was not initialized correctly.")
 
-        if not self.checkpointer_initialized:
-            connection_kwargs = {
-                "autocommit": True,
-                "prepare_threshold": 0,
-            }
-
-            dsn = f"postgresql://{self.settings.postgres_dsn}"
-
-            self.pg_pool = await AsyncConnectionPool(
-                conninfo=dsn,
-                max_size=20,
-                kwargs=connection_kwargs,
-            ).__aenter__()
-
-            checkpointer = AsyncPostgresSaver(self.pg_pool)
-            await checkpointer.setup()
-
-            self.agent.checkpointer = checkpointer
-
-            self.checkpointer_initialized = True
+        checkpointer = await self.init_checkpointer()
 
         ctx = ctx or BaseContext()
         ctx.session_id = ctx.session_id or str(uuid4())
@@ -155,20 +209,49 @@ class BaseAgent:
         configurable = {"thread_id": thread_id}
         if ctx.user_id:
             configurable["user_id"] = ctx.user_id
+        if ctx.store is not None:
+            # per-request store, the compiled agent is shared between requests
+            configurable[CONFIG_KEY_STORE] = ctx.store
+        if checkpointer is not None and checkpointer is not self.agent.checkpointer:
+            configurable[CONFIG_KEY_CHECKPOINTER] = checkpointer
 
         config = {"configurable": configurable}
 
-        self.agent.store = ctx.store
         if isinstance(user_input, Input):
             inputs = {"user_input": self.prompt_template.format(**user_input.dict())}
         else:
             inputs = {"user_input": self.prompt_template.format(user_input=user_input)}
         return inputs, config
 
+    async def init_checkpointer(self) -> Checkpointer | None:
+        """Returns the checkpointer of the agent, with a Postgres DSN the one
+        of the running event loop, connected on first use"""
+        if self.checkpointer_initialized:
+            return self.agent.checkpointer
+
+        from imind_ai.agent.base.postgres import PostgresPoolRegistry
+
+        # pools are bound to their loop, the agent may serve several loops
+        return await PostgresPoolRegistry.get_checkpointer(
+            f"postgresql://{self.settings.postgres_dsn}",
+            min_size=self.settings.postgres_pool_min_size,
+            max_size=self.settings.postgres_pool_max_size,
+        )
+
     async def clone(self):
-        """close the postgres pool"""
-        try:
-            if self.pg_pool:
-                await self.pg_pool.__aexit__(None, None, None)
-        except Exception as e:
-            print(f"关闭连接时发生错误: {str(e)}")
+        """Deprecated, postgres pools are shared by all agents of the process
+        and are no longer closed per agent, use `BaseAgent.shutdown` at
+        process exit"""
+        warnings.warn(
+            "BaseAgent.clone is deprecated and does nothing, "
+            "use BaseAgent.shutdown at process exit",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+
+    @classmethod
+    async def shutdown(cls):
+        """close the shared postgres pools"""
+        from imind_ai.agent.base.postgres import PostgresPoolRegistry
+
+        await PostgresPoolRegistry.close()
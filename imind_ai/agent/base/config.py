@@ -1,7 +1,7 @@
 import os
 from pathlib import Path
 from typing import Any, Dict, Optional, Union
-from openai import BaseModel
+from pydantic import BaseModel
 
 from imind_ai.utils import read_yaml
 
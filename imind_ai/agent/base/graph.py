@@ -1,6 +1,8 @@
 from collections import deque
 from typing import (
+    TYPE_CHECKING,
     Callable,
+    Literal,
     Optional,
     Sequence,
     Type,
@@ -8,19 +10,45 @@ from typing import (
     Tuple,
 )
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
-from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langgraph.graph import StateGraph, START, MessagesState, END
 from langgraph.graph.state import CompiledStateGraph
-from langchain.chat_models.base import BaseChatModel, _ConfigurableModel
-from langchain_core.tools import BaseTool
+from langchain_core.language_models import BaseChatModel
+from langchain_core.tools import BaseTool, StructuredTool
 from langgraph.types import Checkpointer
 from langgraph.store.base import BaseStore
 from langgraph.prebuilt import ToolNode
-from langmem.short_term import SummarizationNode
 from pydantic_settings import BaseSettings
 
+from imind_ai.agent.config.schema import StructuredOutputMode
+from imind_ai.utils.metrics import registry
+from imind_ai.utils.tracing import Lazy, get_tracer
+
+if TYPE_CHECKING:
+    from langchain.chat_models.base import _ConfigurableModel
+
+
+tracer = get_tracer(__name__)
+
+
+structured_output_fallbacks = registry.counter(
+    "structured_output_fallback_total",
+    "single call structured outputs that needed a second LLM call to parse",
+)
+llm_bind_timer = registry.timer(
+    "llm_bind_seconds",
+    "time spent binding tools and output schemas to the chat model",
+)
+
 
 class State(MessagesState):
     user_input: Union[str, Tuple[str, dict]]
@@ -29,7 +57,7 @@ class State(MessagesState):
 
 
 def create_base_agent(
-    llm: Union[BaseChatModel, _ConfigurableModel],
+    llm: Union[BaseChatModel, "_ConfigurableModel"],
     *,
     settings: BaseSettings,
     tools: Optional[Sequence[Union[BaseTool, Callable]]] = None,
@@ -38,8 +66,58 @@ def create_base_agent(
     checkpointer: Optional[Checkpointer] = None,
     store: Optional[BaseStore] = None,
     debug: bool = False,
+    structured_output_mode: StructuredOutputMode = "post_process",
 ) -> CompiledStateGraph:
+    """Create the graph of a base agent
+
+    With `structured_output_mode="single_call"` the output schema is bound as
+    an extra tool to the main LLM call, so the model answers with the
+    structured response directly. The second `with_structured_output` call is
+    only made when that response can not be parsed.
+    """
     tools = tools or []
+
+    # name of the tool that carries the structured response in single call mode
+    response_tool = None
+    if output_schema is not None and structured_output_mode == "single_call":
+        response_tool = convert_to_openai_tool(output_schema)["function"]["name"]
+
+    # bind tools and schemas once per agent instead of on every LLM turn
+    with llm_bind_timer.time():
+        if response_tool is not None:
+            tools_llm = llm.bind_tools([*tools, output_schema], tool_choice="any")
+        elif tools:
+            tools_llm = llm.bind_tools(tools, tool_choice="any")
+        else:
+            tools_llm = llm
+
+        structured_llm = (
+            llm.with_structured_output(output_schema) if output_schema else None
+        )
+    tool_node = ToolNode(tools)
+    if response_tool is not None:
+
+        def defer_response(**kwargs) -> str:
+            """The response tool is only final when called alone, called along
+            with other tools it is answered like them so no tool call is left
+            without a ToolMessage, and the model answers again"""
+            return "请先根据其他工具的结果，再单独调用本工具返回最终结果"
+
+        tool_node = ToolNode(
+            [
+                *tools,
+                StructuredTool.from_function(
+                    func=defer_response,
+                    name=response_tool,
+                    description=output_schema.__doc__ or response_tool,
+                    args_schema=output_schema,
+                ),
+            ]
+        )
+
+    # langmem is only needed once an agent is built
+    from langmem.short_term import SummarizationNode
+
     summarization_model = llm.bind(max_tokens=128)
 
     summarizer = SummarizationNode(
@@ -110,20 +188,53 @@ def create_base_agent(
         else:
             processed_messages = summarized_messages
 
-        if tools:
-            response = llm.bind_tools(tools, tool_choice="any").invoke(
-                processed_messages
-            )
-        else:
-            response = llm.invoke(processed_messages)
+        response = await tools_llm.ainvoke(processed_messages)
 
         return {"messages": [response], "summarized_messages": summarized_messages}
 
+    def parse_response(message: AIMessage) -> Tuple[BaseModel | None, list]:
+        """Parse the structured response of a single call, returns the
+        response (None when parsing fails) and the tool messages answering the
+        response tool call"""
+        tool_calls = [
+            tool_call
+            for tool_call in message.tool_calls
+            if tool_call["name"] == response_tool
+        ]
+        tool_messages = [
+            ToolMessage(content="ok", tool_call_id=tool_call["id"])
+            for tool_call in tool_calls
+        ]
+        for tool_call in tool_calls:
+            try:
+                return output_schema.model_validate(tool_call["args"]), tool_messages
+            except ValidationError:
+                pass
+
+        if isinstance(message.content, str) and message.content:
+            try:
+                return output_schema.model_validate_json(message.content), []
+            except ValidationError:
+                pass
+        return None, tool_messages
+
     async def post_processor(state: State):
         """后处理：根据是否结构化输出设计最终输出"""
-        if output_schema:
-            print("output_schema", output_schema, output_schema.model_json_schema())
-            response = llm.with_structured_output(output_schema).invoke(
+        if response_tool is not None:
+            message = state["messages"][-1]
+            response, tool_messages = parse_response(message)
+            if response is None:
+                structured_output_fallbacks.inc()
+                content = message.content or str(message.tool_calls)
+                response = await structured_llm.ainvoke([HumanMessage(content=content)])
+            return {"messages": tool_messages, "llm_output": response}
+        elif output_schema:
+            tracer.debug(
+                "output schema %s %s",
+                output_schema.__name__,
+                Lazy(output_schema.model_json_schema),
+            )
+            response = await structured_llm.ainvoke(
                 [HumanMessage(content=state["messages"][-1].content)]
             )
         else:
@@ -136,6 +247,10 @@ def create_base_agent(
 
         if not last_message.tool_calls:
             return "post_processor"
+        elif response_tool is not None and all(
+            tool_call["name"] == response_tool for tool_call in last_message.tool_calls
+        ):
+            return "post_processor"
         else:
             return "tools"
 
@@ -143,7 +258,7 @@ def create_base_agent(
     builder.add_node("pre_processor", pre_processor)
     builder.add_node("summarizer", summarizer)
     builder.add_node("llm_caller", llm_caller)
-    builder.add_node("tools", ToolNode(tools))
+    builder.add_node("tools", tool_node)
     builder.add_node("post_processor", post_processor)
     builder.add_edge(START, "pre_processor")
     builder.add_edge("pre_processor", "summarizer")
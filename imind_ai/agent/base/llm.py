@@ -0,0 +1,116 @@
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain.chat_models import init_chat_model
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from imind_ai.utils.cache import Cache, cache_key, shared_cache
+
+
+ChatModelFactory = Callable[..., BaseChatModel]
+
+CHAT_MODEL_FACTORIES: Dict[str, ChatModelFactory] = {}
+
+
+def register_chat_model(provider: str, factory: ChatModelFactory) -> None:
+    """Register a chat model factory for a provider prefix
+
+    `model: "<provider>:<name>"` in the env of an agent then creates the model
+    with `factory(name, **kwargs)` instead of `init_chat_model`, e.g. to run
+    agents and workflows against a local fake model.
+    """
+    CHAT_MODEL_FACTORIES[provider] = factory
+
+
+def unregister_chat_model(provider: str) -> None:
+    CHAT_MODEL_FACTORIES.pop(provider, None)
+
+
+def create_chat_model(model: str, **kwargs: Any) -> BaseChatModel:
+    provider, _, name = model.partition(":")
+    factory = CHAT_MODEL_FACTORIES.get(provider)
+    if factory is not None:
+        return factory(name, **kwargs)
+    return init_chat_model(model, **kwargs)
+
+
+class LLMCache(BaseCache):
+    """LangChain cache of chat completions backed by an `imind_ai` cache
+
+    LangChain keys the completions by the serialized messages and the model
+    string, which holds the model, its base url and the bound tools and
+    output schema. Cached messages are marked with `cached` in their
+    response metadata.
+    """
+
+    def __init__(self, cache: Cache):
+        self.cache = cache
+
+    def key(self, prompt: str, llm_string: str) -> str:
+        """Key of a completion, without the parts of the messages the model
+        does not see: their ids, which are new on every run, and metadata"""
+        try:
+            messages = json.loads(prompt)
+        except ValueError:
+            return cache_key(llm_string, prompt)
+        for message in messages:
+            kwargs = message.get("kwargs") if isinstance(message, dict) else None
+            if isinstance(kwargs, dict):
+                for field in ("id", "response_metadata", "usage_metadata"):
+                    kwargs.pop(field, None)
+        return cache_key(llm_string, messages)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.cache.get(self.key(prompt, llm_string))
+        if value is None:
+            return None
+
+        generations: List[Generation] = []
+        for item in value:
+            message = messages_from_dict([item["message"]])[0]
+            message.response_metadata["cached"] = True
+            generations.append(
+                ChatGeneration(
+                    message=message, generation_info=item.get("generation_info")
+                )
+            )
+        return generations
+
+    def update(
+        self, prompt: str, llm_string: str, return_val: Sequence[Generation]
+    ) -> None:
+        if not all(isinstance(gen, ChatGeneration) for gen in return_val):
+            return
+        self.cache.set(
+            self.key(prompt, llm_string),
+            [
+                {
+                    "message": message_to_dict(gen.message),
+                    "generation_info": gen.generation_info,
+                }
+                for gen in return_val
+            ],
+        )
+
+    def clear(self, **kwargs: Any) -> None:
+        self.cache.clear()
+
+
+def create_llm_cache(settings: Any) -> LLMCache | None:
+    """The completion cache configured by the `llm_cache*` env settings"""
+    backend = getattr(settings, "llm_cache", None) or "none"
+    if backend == "none":
+        return None
+
+    options: Dict[str, Any] = {
+        "ttl": getattr(settings, "llm_cache_ttl", None) or None,
+        "max_entries": getattr(settings, "llm_cache_max_entries", None) or 1024,
+    }
+    if backend == "sqlite":
+        options["path"] = getattr(settings, "llm_cache_path", None) or (
+            ".cache/llm.sqlite"
+        )
+    return LLMCache(shared_cache("llm", backend, **options))
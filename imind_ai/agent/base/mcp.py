@@ -0,0 +1,231 @@
+import asyncio
+import json
+import time
+from hashlib import sha256
+from typing import Any, Dict, List, Tuple
+from weakref import WeakKeyDictionary
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.sessions import Connection, create_session
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp import ClientSession
+
+from imind_ai.utils.tracing import get_tracer
+
+
+tracer = get_tracer(__name__)
+
+
+def connection_key(connection: Dict[str, Any]) -> str:
+    """Canonical key of a server connection (url/transport or stdio command)"""
+    return json.dumps(connection, sort_keys=True, default=str)
+
+
+class MCPSession:
+    """A persistent MCP client session
+
+    The session lives in its own task: the transports of the MCP SDK must be
+    entered and exited by the same task, while the session itself is used by
+    the tasks of many requests.
+    """
+
+    def __init__(self, connection: Connection):
+        self.connection = connection
+        self.session: ClientSession | None = None
+        self._ready: asyncio.Future[ClientSession] | None = None
+        self._closing = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> ClientSession:
+        self._ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run())
+        self.session = await self._ready
+        return self.session
+
+    async def _run(self):
+        try:
+            async with create_session(self.connection) as session:
+                await session.initialize()
+                self._ready.set_result(session)
+                await self._closing.wait()
+        except Exception as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None and not self._task.done()
+
+    async def close(self):
+        self._closing.set()
+        if self._task is not None:
+            await self._task
+
+
+class MCPManager:
+    """Process-wide MCP connection manager
+
+    Sessions are keyed by the running event loop and the server connection
+    config, so nodes and workflows using the same server in a loop share one
+    session. Tool listings are cached for `tools_ttl` seconds while their
+    session is alive, each listing carries a version that changes when the
+    tools of the servers change.
+    """
+
+    tools_ttl: float = 300.0
+
+    # sessions, tool listings and locks by event loop, then by connection key:
+    # sessions run in a task of their loop and asyncio locks belong to one loop
+    _sessions: WeakKeyDictionary = WeakKeyDictionary()
+    _tools: WeakKeyDictionary = WeakKeyDictionary()
+    _locks: WeakKeyDictionary = WeakKeyDictionary()
+
+    @classmethod
+    def _loop_registry(cls, registry: WeakKeyDictionary) -> Dict:
+        """The entries of `registry` for the running event loop"""
+        loop = asyncio.get_running_loop()
+        entries = registry.get(loop)
+        if entries is None:
+            entries = registry.setdefault(loop, {})
+        return entries
+
+    @classmethod
+    def _lock(cls, key: str) -> asyncio.Lock:
+        locks = cls._loop_registry(cls._locks)
+        lock = locks.get(key)
+        if lock is None:
+            lock = locks.setdefault(key, asyncio.Lock())
+        return lock
+
+    @classmethod
+    async def get_session(cls, connection: Connection) -> ClientSession:
+        key = connection_key(connection)
+        async with cls._lock(key):
+            return await cls._get_session(key, connection)
+
+    @classmethod
+    async def _get_session(cls, key: str, connection: Connection) -> ClientSession:
+        sessions = cls._loop_registry(cls._sessions)
+        session = sessions.get(key)
+        if session is not None and session.alive:
+            return session.session
+
+        session = MCPSession(connection)
+        sessions[key] = session
+        try:
+            return await session.start()
+        except Exception:
+            sessions.pop(key, None)
+            raise
+
+    @classmethod
+    def _cached_tools(
+        cls, key: str, refresh: bool
+    ) -> Tuple[float, List[BaseTool], str] | None:
+        """The listing of the server while fresh and its session alive"""
+        if refresh:
+            return None
+        cached = cls._loop_registry(cls._tools).get(key)
+        if cached is None or cached[0] <= time.monotonic():
+            return None
+        session = cls._loop_registry(cls._sessions).get(key)
+        if session is None or not session.alive:
+            return None
+        return cached
+
+    @classmethod
+    async def get_server_tools(
+        cls, connection: Connection, *, refresh: bool = False
+    ) -> Tuple[List[BaseTool], str]:
+        """Tools of one server and the version of the listing, the session is
+        reopened when it died"""
+        key = connection_key(connection)
+
+        cached = cls._cached_tools(key, refresh)
+        if cached is not None:
+            return cached[1], cached[2]
+
+        async with cls._lock(key):
+            cached = cls._cached_tools(key, refresh)
+            if cached is not None:
+                return cached[1], cached[2]
+
+            try:
+                session = await cls._get_session(key, connection)
+                tools = await load_mcp_tools(session)
+            except Exception:
+                # the session may have been dropped by the server, reconnect once
+                await cls._drop_session(key)
+                session = await cls._get_session(key, connection)
+                tools = await load_mcp_tools(session)
+
+            # tools are bound to their session, a new session is a new version
+            digest = sha256(str(id(session)).encode("utf-8"))
+            for tool in tools:
+                schema = tool.args_schema
+                if not isinstance(schema, dict):
+                    schema = schema.model_json_schema() if schema else {}
+                digest.update(tool.name.encode("utf-8"))
+                digest.update(json.dumps(schema, sort_keys=True).encode("utf-8"))
+            version = digest.hexdigest()
+
+            listings = cls._loop_registry(cls._tools)
+            cached = listings.get(key)
+            if cached is not None and cached[2] == version:
+                # unchanged listing, keep the tool objects agents are bound to
+                tools = cached[1]
+
+            listings[key] = (time.monotonic() + cls.tools_ttl, tools, version)
+            return tools, version
+
+    @classmethod
+    async def get_tools(
+        cls, connections: Dict[str, Connection], *, refresh: bool = False
+    ) -> Tuple[List[BaseTool], str]:
+        """Tools of several servers and the version of the combined listing"""
+        results = await asyncio.gather(
+            *[
+                cls.get_server_tools(connection, refresh=refresh)
+                for connection in connections.values()
+            ]
+        )
+
+        tools: List[BaseTool] = []
+        versions: List[str] = []
+        for server_tools, version in results:
+            tools.extend(server_tools)
+            versions.append(version)
+        return tools, sha256("".join(versions).encode("utf-8")).hexdigest()
+
+    @classmethod
+    async def prewarm(cls, connections: Dict[str, Connection]) -> None:
+        """Open the sessions and list the tools ahead of the first request"""
+        await cls.get_tools(connections)
+
+    @classmethod
+    def invalidate(cls, connection: Connection | None = None) -> None:
+        """Expire cached tool listings of one server, or of all servers, in
+        every loop"""
+        for listings in list(cls._tools.values()):
+            if connection is None:
+                listings.clear()
+            else:
+                listings.pop(connection_key(connection), None)
+
+    @classmethod
+    async def _drop_session(cls, key: str) -> None:
+        session = cls._loop_registry(cls._sessions).pop(key, None)
+        if session is not None:
+            try:
+                await session.close()
+            except Exception as e:
+                tracer.warning("关闭MCP连接时发生错误: %s", e)
+
+    @classmethod
+    async def close(cls) -> None:
+        """Close every session of the running loop and forget its cached
+        tools"""
+        for key in list(cls._loop_registry(cls._sessions)):
+            await cls._drop_session(key)
+        cls._loop_registry(cls._tools).clear()
+        cls._loop_registry(cls._locks).clear()
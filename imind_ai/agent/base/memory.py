@@ -8,6 +8,10 @@ from langchain_core.runnables import RunnableConfig
 from langgraph.config import get_config, get_store
 
 from imind_ai.utils import json_to_markdown
+from imind_ai.utils.tracing import get_tracer
+
+
+tracer = get_tracer(__name__)
 
 
 class MemoryType(Enum):
@@ -126,9 +130,8 @@ def system_prompt_with_memory(prompt: str, memory_flag: int | None = None) -> st
                     system_prompt = f"""{system_prompt}
 {content}
 """
-                    print("result1", type(result), result)
+                    tracer.debug("triple memory %s", result)
         if memory_flag & MemoryType.PROFILE.value:
-            print("PROFILE")
             results = store.search(("memories", configurable["user_id"], "profile"))
             if results:
                 item = results[0].value
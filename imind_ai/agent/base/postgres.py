@@ -0,0 +1,153 @@
+import asyncio
+from typing import Dict, Tuple
+from weakref import WeakKeyDictionary
+
+from psycopg_pool import AsyncConnectionPool
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+from imind_ai.utils.tracing import get_tracer
+
+
+tracer = get_tracer(__name__)
+
+
+CONNECTION_KWARGS = {
+    "autocommit": True,
+    "prepare_threshold": 0,
+}
+
+
+class PostgresPoolRegistry:
+    """Process-wide Postgres connection pools and checkpointers keyed by event
+    loop and DSN
+
+    All agents using the same DSN in a loop share one pool, and the
+    checkpointer schema migration (`AsyncPostgresSaver.setup`) runs once per
+    DSN and loop. Pools are bound to the loop they were opened in, so every
+    loop gets its own, and they are dropped with their loop.
+    """
+
+    # pools, their sizes and checkpointers by event loop, then by DSN
+    _pools: WeakKeyDictionary = WeakKeyDictionary()
+    _sizes: WeakKeyDictionary = WeakKeyDictionary()
+    _checkpointers: WeakKeyDictionary = WeakKeyDictionary()
+    # asyncio locks belong to the loop they are first used in, one per loop
+    _locks: "WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+        WeakKeyDictionary()
+    )
+
+    @classmethod
+    def lock(cls) -> asyncio.Lock:
+        """The registry lock of the running event loop"""
+        loop = asyncio.get_running_loop()
+        lock = cls._locks.get(loop)
+        if lock is None:
+            lock = cls._locks.setdefault(loop, asyncio.Lock())
+        return lock
+
+    @classmethod
+    def loop_registry(cls, registry: WeakKeyDictionary) -> Dict:
+        """The entries of `registry` for the running event loop"""
+        loop = asyncio.get_running_loop()
+        entries = registry.get(loop)
+        if entries is None:
+            entries = registry.setdefault(loop, {})
+        return entries
+
+    @classmethod
+    async def get_pool(
+        cls, dsn: str, *, min_size: int = 1, max_size: int = 20
+    ) -> AsyncConnectionPool:
+        """Return the pool of the DSN in the running loop, opening it on first
+        use
+
+        Pool sizes only apply to the first call for a DSN, other sizes are
+        logged and ignored.
+        """
+        pools = cls.loop_registry(cls._pools)
+        pool = pools.get(dsn)
+        if pool is not None:
+            cls.check_sizes(dsn, min_size, max_size)
+            return pool
+
+        async with cls.lock():
+            pool = pools.get(dsn)
+            if pool is not None:
+                cls.check_sizes(dsn, min_size, max_size)
+            else:
+                pool = AsyncConnectionPool(
+                    conninfo=dsn,
+                    min_size=min_size,
+                    max_size=max_size,
+                    kwargs=CONNECTION_KWARGS,
+                    check=AsyncConnectionPool.check_connection,
+                    open=False,
+                )
+                await pool.open()
+                pools[dsn] = pool
+                cls.loop_registry(cls._sizes)[dsn] = (min_size, max_size)
+        return pool
+
+    @classmethod
+    def check_sizes(cls, dsn: str, min_size: int, max_size: int) -> None:
+        sizes = cls.loop_registry(cls._sizes).get(dsn)
+        if sizes is not None and sizes != (min_size, max_size):
+            tracer.warning(
+                "连接池已按min_size=%s, max_size=%s创建，忽略min_size=%s, max_size=%s",
+                *sizes,
+                min_size,
+                max_size,
+            )
+
+    @classmethod
+    async def get_checkpointer(
+        cls, dsn: str, *, min_size: int = 1, max_size: int = 20
+    ) -> AsyncPostgresSaver:
+        """Return the checkpointer of the DSN in the running loop, running its
+        setup only once"""
+        checkpointers = cls.loop_registry(cls._checkpointers)
+        checkpointer = checkpointers.get(dsn)
+        if checkpointer is not None:
+            return checkpointer
+
+        pool = await cls.get_pool(dsn, min_size=min_size, max_size=max_size)
+
+        async with cls.lock():
+            checkpointer = checkpointers.get(dsn)
+            if checkpointer is None:
+                checkpointer = AsyncPostgresSaver(pool)
+                await checkpointer.setup()
+                checkpointers[dsn] = checkpointer
+        return checkpointer
+
+    @classmethod
+    async def check(cls, timeout: float = 5.0) -> Dict[str, bool]:
+        """Health check of every pool of the running loop, maps the DSN to
+        whether it is usable"""
+        status: Dict[str, bool] = {}
+        for dsn, pool in list(cls.loop_registry(cls._pools).items()):
+            try:
+                async with pool.connection(timeout=timeout) as conn:
+                    await conn.execute("SELECT 1")
+                status[dsn] = True
+            except Exception:
+                status[dsn] = False
+        return status
+
+    @classmethod
+    async def close(cls, dsn: str | None = None) -> None:
+        """Close the pool of the DSN, or every pool when no DSN is given, of
+        the running loop"""
+        async with cls.lock():
+            pools = cls.loop_registry(cls._pools)
+            dsns = list(pools) if dsn is None else [dsn]
+            for key in dsns:
+                cls.loop_registry(cls._checkpointers).pop(key, None)
+                cls.loop_registry(cls._sizes).pop(key, None)
+                pool = pools.pop(key, None)
+                if pool is None:
+                    continue
+                try:
+                    await pool.close()
+                except Exception as e:
+                    tracer.warning("关闭连接时发生错误: %s", e)
@@ -1,12 +1,27 @@
 from pathlib import Path
-from typing import List, Literal, Optional, Dict, Any, Union
-from pydantic import BaseModel, Field
+from typing import Annotated, List, Literal, Optional, Dict, Any, Type, Union
+from pydantic import (
+    BaseModel,
+    Field,
+    PlainValidator,
+    SerializeAsAny,
+    field_validator,
+    model_validator,
+)
 from uuid import uuid4
 
-from imind_ai.agent.config.schema import Input, Output, Env
+from imind_ai.agent.config.reference import parse_reference
+from imind_ai.agent.config.schema import Input, Output, Env, StructuredOutputMode
+from imind_ai.agent.config.value_type import ValueType
 from imind_ai.utils import read_yaml
 
-from .helper import AgentInput, AgentOutput, process_depends, process_params
+from .helper import (
+    AgentInput,
+    AgentOutput,
+    process_depends,
+    process_params,
+    process_references,
+)
 
 
 class AgentConfig(BaseModel):
@@ -46,12 +61,22 @@ class AgentConfig(BaseModel):
 
             if isinstance(value, AgentOutput):
                 item = value.model_dump()
-                if value.value_type == "Dict" and isinstance(value.value_schema, dict):
+                if value.type == ValueType.DICT and isinstance(
+                    value.value_schema, dict
+                ):
                     item["value_schema"] = self._output_schema(value.value_schema)  # type: ignore
 
                 schema[key] = item  # type: ignore
         return schema
 
+    def get_input_references(self) -> List[str]:
+        return process_references(self.input)
+
+    def get_output_references(self) -> List[str]:
+        if isinstance(self.output, dict):
+            return process_references(self.output)
+        return []
+
     def get_input_depends(self) -> List[str]:
         return process_depends(self.input)
 
@@ -67,11 +92,50 @@ class AgentConfig(BaseModel):
         return Output(**params)
 
 
+class CacheConfig(BaseModel):
+    backend: str = Field(default="memory", description="memory, sqlite or registered")
+    ttl: Optional[float] = Field(default=None, gt=0, description="seconds")
+    max_entries: int = Field(default=1024, gt=0)
+    max_bytes: Optional[int] = Field(
+        default=None, gt=0, description="serialized size bound of the memory backend"
+    )
+    path: Optional[str] = Field(default=None, description="file of the sqlite backend")
+
+    def options(self) -> Dict[str, Any]:
+        """Keyword arguments of the cache backend"""
+        return self.model_dump(exclude={"backend"}, exclude_none=True)
+
+    @model_validator(mode="after")
+    def check_options(self) -> "CacheConfig":
+        # the backends import the checkpoint serializer, only loaded when a
+        # workflow configures a cache
+        from imind_ai.utils.cache import backend_options
+
+        supported = backend_options(self.backend)
+        if supported is not None:
+            unsupported = set(self.options()) - supported
+            if unsupported:
+                raise ValueError(
+                    f"缓存类型{self.backend}不支持的参数: {', '.join(sorted(unsupported))}"
+                )
+        return self
+
+
 class BaseNodeConfig(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid4()))
     name: str = Field(default="")
-    type: Literal["rag", "sdk", "base_agent", "condition", "loop_aggregation"] = Field(
-        default="base_agent"
+    type: Literal[
+        "rag", "sdk", "base_agent", "condition", "loop_aggregation", "join", "map"
+    ] = Field(default="base_agent")
+    timeout: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="seconds the node may run, a branch of a fan-out that times out is reported to its join instead of failing the run",
+    )
+    max_concurrency: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description="branches of a list `next`, or items of a map node, that may run at once",
     )
 
 
@@ -101,6 +165,26 @@ class BaseAgentNodeConfig(NodeConfig, AgentConfig):
     system_prompt: Optional[str] = None
     mcp: Optional[Dict[str, Union[MCPStreamableHttp, MCPStdIO]]] = None
     debug: bool = False
+    structured_output_mode: StructuredOutputMode = "post_process"
+    cache: Optional[CacheConfig] = Field(
+        default=None,
+        description="memoize the output by input across runs, agents without multi_turn only",
+    )
+
+
+class MapNodeConfig(BaseAgentNodeConfig):
+    type: Literal["map"] = "map"
+    items: str = Field(description="reference to the list to map over")
+    on_error: Literal["fail", "skip", "null"] = Field(
+        default="fail",
+        description="fail the node, drop the result or keep None for a failed item",
+    )
+
+    @field_validator("items")
+    @classmethod
+    def check_items(cls, items: str) -> str:
+        parse_reference(items)
+        return items
 
 
 class ConditionItem(BaseModel):
@@ -113,6 +197,13 @@ class ConditionItem(BaseModel):
     value: Optional[Any] = None
     reference: Optional[str] = None
 
+    @field_validator("operand", "reference")
+    @classmethod
+    def check_reference(cls, reference: Optional[str]) -> Optional[str]:
+        if reference is not None:
+            parse_reference(reference)
+        return reference
+
 
 class Condition(BaseModel):
     logic_operator: Literal["and", "or"]
@@ -121,6 +212,7 @@ class Condition(BaseModel):
 
 
 class ConditionNodeConfig(BaseNodeConfig):
+    type: Literal["condition"] = "condition"
     prev: str
     if_express: Condition = Field(alias="if")
     elif_express: Optional[List[Condition]] = Field(default=None, alias="elif")
@@ -130,19 +222,84 @@ class ConditionNodeConfig(BaseNodeConfig):
 class Aggregation(BaseModel):
     reference: str
     agg_type: str
+    k: int = Field(default=10, gt=0, description="size of top_k")
+    quantile: float = Field(default=0.5, ge=0, le=1, description="quantile to estimate")
 
 
 class LoopAggregationNodeConfig(BaseNodeConfig):
+    type: Literal["loop_aggregation"] = "loop_aggregation"
     aggregation: Dict[str, Aggregation]
     next: Union[str, List[str]]
     next_type: Optional[Literal["condition"]] = None
 
 
+class JoinNodeConfig(NodeConfig):
+    type: Literal["join"] = "join"
+    wait: Literal["all", "any", "first_k"] = Field(
+        default="all",
+        description="continue after all branches, the first one or the first k",
+    )
+    k: int = Field(default=1, gt=0, description="branches to wait for with first_k")
+
+
+NODE_CONFIGS: Dict[str, Type[BaseNodeConfig]] = {
+    "base_agent": BaseAgentNodeConfig,
+    "map": MapNodeConfig,
+    "condition": ConditionNodeConfig,
+    "loop_aggregation": LoopAggregationNodeConfig,
+    "join": JoinNodeConfig,
+    # not planned yet, parsed like agents
+    "rag": BaseAgentNodeConfig,
+    "sdk": BaseAgentNodeConfig,
+}
+
+
+def register_node_config(type: str, cls: Type[BaseNodeConfig]) -> None:
+    """Register the config class of nodes with `type:`, see also
+    `register_node_type` of the workflow graph"""
+    NODE_CONFIGS[type] = cls
+
+
+def validate_node_config(value: Any) -> BaseNodeConfig:
+    """Validate a node with the config class registered for its `type`, a
+    single lookup rather than trying every node config in turn"""
+    if isinstance(value, BaseNodeConfig):
+        return value
+    if not isinstance(value, dict):
+        raise ValueError(f"节点配置必须是字典: {value!r}")
+
+    type = value.get("type", "base_agent")
+    cls = NODE_CONFIGS.get(type)
+    if cls is None:
+        raise ValueError(
+            f"不支持的节点类型: {type}, 可选: {', '.join(sorted(NODE_CONFIGS))}"
+        )
+    return cls.model_validate(value)
+
+
+# serialized with the fields of the actual node config class
+AnyNodeConfig = Annotated[
+    SerializeAsAny[BaseNodeConfig], PlainValidator(validate_node_config)
+]
+
+
 class Config(BaseModel):
     agent: AgentConfig
-    nodes: List[
-        Union[BaseAgentNodeConfig, ConditionNodeConfig, LoopAggregationNodeConfig]
-    ]
+    nodes: List[AnyNodeConfig]
+    max_concurrency: Optional[int] = Field(
+        default=None, gt=0, description="nodes of a workflow run running at once"
+    )
+    cache: Optional[CacheConfig] = Field(
+        default=None, description="cache of the outputs by workflow input"
+    )
+    prune_state: bool = Field(
+        default=True,
+        description="keep node inputs and outputs nothing reads anymore out of the state and its checkpoints, the bytes saved are reported with `metrics`",
+    )
+    metrics: bool = Field(
+        default=False,
+        description="measure every run, including the serialized state sizes, and attach the summary to the output",
+    )
 
     @classmethod
     def from_file(cls, path: Path | None = None) -> "Config":
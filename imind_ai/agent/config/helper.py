@@ -1,18 +1,27 @@
 from typing import Any, Dict, List, Set, Union
 
+from imind_ai.agent.config.reference import parse_reference
 from imind_ai.agent.config.schema import AgentInput, AgentOutput
+from imind_ai.agent.config.value_type import ValueType
 
 
-def process_depends(config: Dict) -> List[str]:
-    """处理输出依赖"""
-    params: Set[str] = set()
+def process_references(config: Dict) -> List[str]:
+    """处理引用：返回配置中所有引用的字符串"""
+    refs: List[str] = []
     for key, val in config.items():
         if isinstance(val, (AgentInput, AgentOutput)):
-            if val.type == "Dict" and isinstance(val.value_schema, dict):
-                params = params.union(set(process_depends(val.value_schema)))  # type: ignore
+            if val.type == ValueType.DICT and isinstance(val.value_schema, dict):
+                refs.extend(process_references(val.value_schema))  # type: ignore
             if val.source == "reference" and val.reference is not None:
-                infos = val.reference.split(".")
-                params.add(infos[0])
+                refs.append(val.reference)
+    return refs
+
+
+def process_depends(config: Dict) -> List[str]:
+    """处理输出依赖"""
+    params: Set[str] = set()
+    for ref in process_references(config):
+        params.add(parse_reference(ref).entity)
     return list(params)
 
 
@@ -26,7 +35,7 @@ def process_params(config: Dict, **kwargs) -> Dict:
     for key, val in config.items():
         if isinstance(val, (AgentInput, AgentOutput)):
             if isinstance(val, AgentOutput):
-                if val.type == "Dict" and isinstance(
+                if val.type == ValueType.DICT and isinstance(
                     val.value_schema, (AgentOutput, dict)
                 ):
                     params[key] = process_params(val.value_schema, **kwargs)  # type: ignore
@@ -46,25 +55,13 @@ def process_params(config: Dict, **kwargs) -> Dict:
 
 def process_reference(ref: str, **kwargs) -> Any:
     """取出引用对象的值
-    引用对象不存在时抛出异常
+    引用的实体不存在时抛出异常，路径不存在时返回None
     """
-    infos = ref.split(".")
-    entity = infos.pop(0)
-    if entity not in kwargs:
+    reference = parse_reference(ref)
+    if reference.entity not in kwargs:
         raise ValueError(f"引用的值不正确，请核实{ref}, {str(kwargs)}")
 
-    item = kwargs[entity]
-
-    while len(infos) > 0:
-        key = infos.pop(0)
-        if isinstance(item, dict):
-            item = item.get(key)
-        else:
-            if hasattr(item, key):
-                item = getattr(item, key)
-            else:
-                raise ValueError(f"引用的值不正确，请核实{ref}")
-    return item
+    return reference.get(kwargs[reference.entity])
 
 
 def case_value(
@@ -72,39 +69,43 @@ def case_value(
     value: Union[AgentInput, AgentOutput],
     params: Dict,
 ) -> None:
-    if value.value is None:
-        params[key] = value.type.default_value()
+    # the configured value, falls back to the default of the field
+    item = getattr(value, "value", None)
+    if item is None:
+        item = value.default
+    if item is None:
+        params[key] = ValueType(value.type).default_value()
         return
 
     if value.type == "int":
-        if isinstance(value.value, int):
-            params[key] = value.value  # type: ignore
+        if isinstance(item, int):
+            params[key] = item  # type: ignore
         else:
-            params[key] = int(value.value)  # type: ignore
+            params[key] = int(item)  # type: ignore
     elif value.type == "float":
-        if isinstance(value.value, float):
-            params[key] = value.value  # type: ignore
+        if isinstance(item, float):
+            params[key] = item  # type: ignore
         else:
-            params[key] = float(value.value)  # type: ignore
+            params[key] = float(item)  # type: ignore
     elif value.type == "bool":
-        if isinstance(value.value, bool):
-            params[key] = value.value  # type: ignore
+        if isinstance(item, bool):
+            params[key] = item  # type: ignore
         else:
-            params[key] = bool(value.value)  # type: ignore
+            params[key] = bool(item)  # type: ignore
     elif value.type == "str":
-        if isinstance(value.value, str):
-            params[key] = value.value  # type: ignore
+        if isinstance(item, str):
+            params[key] = item  # type: ignore
         else:
-            params[key] = str(value.value)  # type: ignore
-    elif value.type.startswith("List"):
-        if isinstance(value.value, list):
-            params[key] = value.value  # type: ignore
+            params[key] = str(item)  # type: ignore
+    elif value.type.startswith("list"):
+        if isinstance(item, list):
+            params[key] = item  # type: ignore
         else:
-            params[key] = list(value.value)  # type: ignore
-    elif value.type == "Dict":
-        if isinstance(value.value, dict):
-            params[key] = value.value  # type: ignore
+            params[key] = list(item)  # type: ignore
+    elif value.type == ValueType.DICT:
+        if isinstance(item, dict):
+            params[key] = item  # type: ignore
         else:
-            params[key] = dict(value.value)  # type: ignore
+            params[key] = dict(item)  # type: ignore
     else:
-        params[key] = value.value
+        params[key] = item
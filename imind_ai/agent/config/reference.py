@@ -0,0 +1,87 @@
+from functools import lru_cache
+from typing import Any, Mapping, Tuple
+
+
+WORKFLOW_ENTITY = "workflow"
+# the current element in the input of a map node
+ITEM_ENTITY = "item"
+
+_MISSING = object()
+
+
+def state_field(entity: str) -> str:
+    """Name of the workflow state field holding the values of an entity
+
+    `workflow` references the workflow input, any other entity the output of
+    the node with that id.
+    """
+    return f"{entity}_input" if entity == WORKFLOW_ENTITY else f"{entity}_output"
+
+
+class Reference:
+    """A parsed reference such as `workflow.query` or `node.items.0.name`
+
+    The first part is the entity (`workflow` or a node id), the rest is a path
+    of dict keys, attributes or list indices. References are parsed once and
+    shared, see `parse_reference`.
+    """
+
+    __slots__ = ("ref", "entity", "field", "path")
+
+    def __init__(self, ref: str):
+        infos = ref.split(".")
+        if not ref or any(not info for info in infos):
+            raise ValueError(f"引用格式不正确: {ref}")
+
+        self.ref = ref
+        self.entity = infos[0]
+        self.field = state_field(self.entity)
+        # (key, index) pairs, index is set when the key can address a list
+        self.path: Tuple[Tuple[str, int | None], ...] = tuple(
+            (info, int(info) if info.lstrip("-").isdigit() else None)
+            for info in infos[1:]
+        )
+
+    def __repr__(self) -> str:
+        return f"Reference({self.ref!r})"
+
+    def get(self, item: Any) -> Any:
+        """Walk the path starting from the value of the entity
+
+        Missing keys, attributes and out of range indices resolve to None
+        instead of raising, a reference to an optional output that was not
+        produced reads as None.
+        """
+        for key, index in self.path:
+            if item is None:
+                return None
+            if isinstance(item, dict):
+                item = item.get(key)
+            elif index is not None and isinstance(item, (list, tuple)):
+                item = item[index] if -len(item) <= index < len(item) else None
+            elif isinstance(item, Mapping):
+                item = item.get(key)
+            else:
+                item = getattr(item, key, None)
+        return item
+
+    def resolve(self, state: Any) -> Any:
+        """Value of the reference in a workflow state (model or dict)
+
+        Raises when the state has no field for the entity, a missing path
+        below it resolves to None, see `get`.
+        """
+        if isinstance(state, dict):
+            item = state.get(self.field, _MISSING)
+        else:
+            item = getattr(state, self.field, _MISSING)
+            if item is _MISSING and isinstance(state, Mapping):
+                item = state.get(self.field, _MISSING)
+        if item is _MISSING:
+            raise ValueError(f"引用的值不正确，请核实{self.ref}")
+        return self.get(item)
+
+
+@lru_cache(maxsize=4096)
+def parse_reference(ref: str) -> Reference:
+    return Reference(ref)
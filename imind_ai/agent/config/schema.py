@@ -2,11 +2,24 @@ from _collections_abc import dict_items, dict_keys, dict_values
 
 from email.policy import default
 from typing import Any, Dict, Literal, Optional, Union
-from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_serializer
-
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    field_validator,
+    model_serializer,
+)
+
+from imind_ai.agent.config.reference import parse_reference
 from imind_ai.agent.config.value_type import ValueType
 
 
+# how an agent with an output schema produces it: a second LLM call after the
+# answer, or the schema bound as a tool of the main call
+StructuredOutputMode = Literal["post_process", "single_call"]
+
+
 # Define a custom class 'IO' that inherits from Pydantic's BaseModel
 class IO(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -97,7 +110,12 @@ class Input(IO):
 
 
 class Output(IO):
-    pass
+    _metrics: Dict[str, Any] | None = PrivateAttr(default=None)
+
+    @property
+    def metrics(self) -> Dict[str, Any] | None:
+        """Summary of the run that produced the output, see `RunMetrics`"""
+        return self._metrics
 
 
 class Env(BaseModel):
@@ -120,6 +138,13 @@ class AgentInput(BaseModel):
     source: Optional[Literal["input", "reference"]] = None
     reference: Optional[str] = None
 
+    @field_validator("reference")
+    @classmethod
+    def check_reference(cls, reference: Optional[str]) -> Optional[str]:
+        if reference is not None:
+            parse_reference(reference)
+        return reference
+
 
 class AgentOutput(BaseModel):
     model_config = ConfigDict(use_enum_values=True)
@@ -131,3 +156,10 @@ class AgentOutput(BaseModel):
     value_schema: Optional[dict[str, "AgentOutput"]] = None
     source: Optional[Literal["input", "reference"]] = None
     reference: Optional[str] = None
+
+    @field_validator("reference")
+    @classmethod
+    def check_reference(cls, reference: Optional[str]) -> Optional[str]:
+        if reference is not None:
+            parse_reference(reference)
+        return reference
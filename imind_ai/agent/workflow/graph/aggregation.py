@@ -0,0 +1,237 @@
+import heapq
+import math
+from typing import Any, Callable, Dict, List, Type
+
+from imind_ai.agent.config.base import Aggregation
+
+
+class Accumulator:
+    """Incremental aggregation over the iterations of a loop
+
+    Each `add` is O(1) (O(k) for top_k, O(n) for list). The running state is
+    a plain dict so it can be stored in the workflow state and checkpointed,
+    `add` returns a new state and leaves `acc`, which is part of the previous
+    workflow state, unchanged.
+    """
+
+    def __init__(self, config: Aggregation):
+        self.config = config
+
+    def init(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def add(self, acc: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def result(self, acc: Dict[str, Any]) -> Any:
+        raise NotImplementedError
+
+
+ACCUMULATORS: Dict[str, Type[Accumulator]] = {}
+
+
+def register(agg_type: str) -> Callable[[Type[Accumulator]], Type[Accumulator]]:
+    """Register an accumulator class for an `agg_type`"""
+
+    def decorator(cls: Type[Accumulator]) -> Type[Accumulator]:
+        ACCUMULATORS[agg_type] = cls
+        return cls
+
+    return decorator
+
+
+def create_accumulator(config: Aggregation) -> Accumulator:
+    cls = ACCUMULATORS.get(config.agg_type)
+    if cls is None:
+        raise ValueError(
+            f"不支持的聚合类型{config.agg_type}, 可选: {', '.join(ACCUMULATORS)}"
+        )
+    return cls(config)
+
+
+@register("list")
+class ListAccumulator(Accumulator):
+    """The only accumulator that keeps the raw items"""
+
+    def init(self) -> Dict[str, Any]:
+        return {"items": []}
+
+    def add(self, acc: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        return {"items": [*acc["items"], value]}
+
+    def result(self, acc: Dict[str, Any]) -> Any:
+        return acc["items"]
+
+
+@register("count")
+class CountAccumulator(Accumulator):
+    def init(self) -> Dict[str, Any]:
+        return {"count": 0}
+
+    def add(self, acc: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        return {"count": acc["count"] + 1}
+
+    def result(self, acc: Dict[str, Any]) -> Any:
+        return acc["count"]
+
+
+@register("sum")
+class SumAccumulator(Accumulator):
+    def init(self) -> Dict[str, Any]:
+        return {"sum": 0}
+
+    def add(self, acc: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        return {"sum": acc["sum"] + value}
+
+    def result(self, acc: Dict[str, Any]) -> Any:
+        return acc["sum"]
+
+
+@register("mean")
+class MeanAccumulator(Accumulator):
+    def init(self) -> Dict[str, Any]:
+        return {"count": 0, "sum": 0}
+
+    def add(self, acc: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        return {"count": acc["count"] + 1, "sum": acc["sum"] + value}
+
+    def result(self, acc: Dict[str, Any]) -> Any:
+        return acc["sum"] / acc["count"] if acc["count"] else None
+
+
+@register("min")
+class MinAccumulator(Accumulator):
+    def init(self) -> Dict[str, Any]:
+        return {"value": None}
+
+    def add(self, acc: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        current = acc["value"]
+        return {"value": value if current is None or value < current else current}
+
+    def result(self, acc: Dict[str, Any]) -> Any:
+        return acc["value"]
+
+
+@register("max")
+class MaxAccumulator(Accumulator):
+    def init(self) -> Dict[str, Any]:
+        return {"value": None}
+
+    def add(self, acc: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        current = acc["value"]
+        return {"value": value if current is None or value > current else current}
+
+    def result(self, acc: Dict[str, Any]) -> Any:
+        return acc["value"]
+
+
+@register("variance")
+class VarianceAccumulator(Accumulator):
+    """Sample variance with Welford's algorithm"""
+
+    def init(self) -> Dict[str, Any]:
+        return {"count": 0, "mean": 0.0, "m2": 0.0}
+
+    def add(self, acc: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        count = acc["count"] + 1
+        delta = value - acc["mean"]
+        mean = acc["mean"] + delta / count
+        m2 = acc["m2"] + delta * (value - mean)
+        return {"count": count, "mean": mean, "m2": m2}
+
+    def result(self, acc: Dict[str, Any]) -> Any:
+        return acc["m2"] / (acc["count"] - 1) if acc["count"] > 1 else 0.0
+
+
+@register("top_k")
+class TopKAccumulator(Accumulator):
+    """The `k` largest items, in descending order"""
+
+    def init(self) -> Dict[str, Any]:
+        return {"heap": []}
+
+    def add(self, acc: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        heap: List[Any] = acc["heap"]
+        if len(heap) < self.config.k:
+            heap = heap.copy()
+            heapq.heappush(heap, value)
+        elif value > heap[0]:
+            heap = heap.copy()
+            heapq.heapreplace(heap, value)
+        return {"heap": heap}
+
+    def result(self, acc: Dict[str, Any]) -> Any:
+        return sorted(acc["heap"], reverse=True)
+
+
+@register("quantile")
+class QuantileAccumulator(Accumulator):
+    """Approximate quantile with the P² algorithm, constant memory"""
+
+    def init(self) -> Dict[str, Any]:
+        q = self.config.quantile
+        return {
+            "heights": [],
+            "positions": [1, 2, 3, 4, 5],
+            "desired": [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5],
+        }
+
+    def add(self, acc: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        heights: List[float] = acc["heights"]
+        if len(heights) < 5:
+            return {**acc, "heights": sorted([*heights, value])}
+
+        q = self.config.quantile
+        heights = heights.copy()
+        positions: List[int] = acc["positions"].copy()
+        desired: List[float] = acc["desired"].copy()
+
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= heights[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i, increment in enumerate((0, q / 2, q, (1 + q) / 2, 1)):
+            desired[i] += increment
+
+        for i in range(1, 4):
+            d = desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or (
+                d <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                step = 1 if d > 0 else -1
+                height = self._parabolic(heights, positions, i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (
+                        positions[i + step] - positions[i]
+                    )
+                heights[i] = height
+                positions[i] += step
+        return {"heights": heights, "positions": positions, "desired": desired}
+
+    @staticmethod
+    def _parabolic(heights: List[float], positions: List[int], i: int, step: int):
+        n, h = positions, heights
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def result(self, acc: Dict[str, Any]) -> Any:
+        heights = acc["heights"]
+        if not heights:
+            return None
+        if len(heights) < 5:
+            # exact quantile of the first observations
+            index = self.config.quantile * (len(heights) - 1)
+            low, high = math.floor(index), math.ceil(index)
+            return heights[low] + (heights[high] - heights[low]) * (index - low)
+        return heights[2]
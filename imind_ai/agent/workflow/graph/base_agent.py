@@ -1,92 +1,193 @@
-from typing import Any, Dict
+import asyncio
+from typing import Any, Dict, List, Set
 
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
 from pydantic import BaseModel
 from imind_ai.agent.base.agent import BaseAgent
 from imind_ai.agent.config.base import BaseAgentNodeConfig
-from imind_ai.agent.config.schema import Output
+from imind_ai.agent.config.reference import state_field
+from imind_ai.agent.config.schema import Input, Output
 from imind_ai.agent.workflow.graph.node import Node
-from imind_ai.agent.workflow.pipeline.context import Context
+from imind_ai.agent.workflow.pipeline.context import RunContext
+from imind_ai.agent.workflow.pipeline.run_metrics import MetricsCallbackHandler
+from langchain_core.callbacks import BaseCallbackHandler
 from imind_ai.utils import create_dynamic_model
+from imind_ai.utils.cache import Cache, cache_key, canonicalize, shared_cache
+from imind_ai.utils.tracing import Lazy, get_tracer
 
-from langchain_mcp_adapters.client import MultiServerMCPClient
+
+tracer = get_tracer(__name__)
 
 
 class BaseAgentNode(Node):
 
-    def __init__(self, config: BaseAgentNodeConfig, ctx: Context):
+    def __init__(self, config: BaseAgentNodeConfig):
         super().__init__(config)
 
-        self.ctx = ctx
+        self.agent: BaseAgent | None = None
+        self.tools_version: str | None = None
+        self._lock = asyncio.Lock()
+        self.depends = config.get_input_depends()
+        self.cache: Cache | None = None
+        # set by the planner when the workflow caches its outputs
+        self.workflow_cached = False
+        if config.cache is not None:
+            self.cache = shared_cache(
+                "workflow_node", config.cache.backend, **config.cache.options()
+            )
 
         if config.mcp is None:
-            output_schema = (
-                create_dynamic_model(config.output)
-                if isinstance(config.output, dict)
-                else None
-            )
+            self.agent = self.create_agent()
 
-            self.agent = BaseAgent(
-                id=config.id,
-                name=config.name,
-                env=config.env,
-                output_schema=output_schema,
-                debug=config.debug,
-            )
+    async def run(self, state: BaseModel, config: RunnableConfig):
+        if self.config.mcp is not None:
+            await self.build_agent()
 
-    async def __call__(self, state: BaseModel):
-        print("BaseAgentNode state", type(state), self.ctx.state)
+        input = self.config.build_input(**self.params(state))
+        tracer.debug("%s input %s", self.id, Lazy(input.dict))
 
-        if not hasattr(self, "agent"):
-            await self.build_agent()
+        output = await self.chat(input, RunContext.from_config(config))
 
-        params: Dict[str, Any] = {}
-        depends = self.config.get_input_depends()
+        return {f"{self.id}_input": input.dict(), f"{self.id}_output": output.dict()}
 
-        for depend in depends:
-            param = getattr(state, depend, None)
+    def params(self, state: BaseModel) -> Dict[str, Any]:
+        """Values of the entities referenced by the input"""
+        params: Dict[str, Any] = {}
+        for depend in self.depends:
+            param = getattr(state, state_field(depend), None)
             if param is not None:
                 params[depend] = param
-
-        input = self.config.build_input(**params)
-        print("input", type(input), input.dict())
-
-        result = await self.agent.achat(input, ctx=self.ctx)
-        print(f"{result=}")
-        print(type(result))
+        return params
+
+    async def chat(self, input: Input, ctx: RunContext, track: str = "") -> Output:
+        """Run the agent on an input, `track` names the trace of the call"""
+        key = None
+        if self.cache is not None:
+            key = self.cache_key(input)
+            cached = self.cache.get(key)
+            if cached is not None:
+                if ctx.metrics is not None:
+                    ctx.metrics.node(self.id, self.type).cache_hits += 1
+                return Output(**cached)
+
+        callbacks: List[BaseCallbackHandler] = []
+        checkpointer = None
+        if ctx.metrics is not None:
+            stats = ctx.metrics.node(self.id, self.type)
+            callbacks.append(MetricsCallbackHandler(stats))
+        if ctx.recorder is not None:
+            track = track or self.id
+            callbacks.append(ctx.recorder.callback_handler(track))
+            checkpointer = await self.agent.init_checkpointer()
+            if checkpointer is not None:
+                checkpointer = ctx.recorder.checkpointer(
+                    checkpointer, f"{track} checkpoints"
+                )
+
+        result = await self.agent.achat(
+            input, ctx=ctx, callbacks=callbacks or None, checkpointer=checkpointer
+        )
+        tracer.debug("%s result %r", self.id, result)
 
         if isinstance(result, dict):
             output = Output(**result)
         elif isinstance(result, BaseModel):
-            data = result.model_dump()
-            print(f"{data=}")
-            output = Output(**data)
+            output = Output(**result.model_dump())
+        elif result is None:
+            # the agent finished without producing the structured output,
+            # e.g. the model never called the response tool
+            tracer.warning("%s 未返回结构化输出", self.id)
+            output = Output()
         else:
             output = Output(_result=result.content)
 
-        print("output", output.dict())
+        tracer.debug("%s output %s", self.id, Lazy(output.dict))
+        if key is not None:
+            self.cache.set(key, dict(output.dict()))
+        return output
 
-        return {f"{self.id}_input": input.dict(), f"{self.id}_output": output.dict()}
+    def cache_key(self, input: Input) -> str:
+        """Key of the output of an input: the node, its model settings,
+        prompt, output schema and tools, and the canonicalized input
 
-    async def build_agent(self):
-        tools = None
-        if self.config.mcp is not None:
-            print("mcp", self.config.mcp)
-            mcp_client = MultiServerMCPClient(
-                self.config.model_dump(exclude_none=True)["mcp"]
-            )
-            tools = await mcp_client.get_tools()
+        The conversation history is not part of the key, nodes of multi-turn
+        agents can not be cached, see `create_agent`.
+        """
+        settings = self.agent.settings.model_dump(
+            exclude={"postgres_dsn", "postgres_pool_min_size", "postgres_pool_max_size"}
+        )
+        return cache_key(
+            self.id,
+            settings,
+            self.config.system_prompt,
+            self.config.model_dump(include={"output", "structured_output_mode"}),
+            self.tools_version,
+            canonicalize(input.dict()),
+        )
+
+    def get_references(self) -> List[str]:
+        return self.config.get_input_references()
 
+    def output_fields(self) -> Set[str] | None:
+        if isinstance(self.config.output, dict):
+            return set(self.config.output)
+        return {"_result"}
+
+    def state_writes(self) -> Set[str]:
+        return {f"{self.id}_input", f"{self.id}_output"}
+
+    def create_agent(self, tools: List[BaseTool] | None = None) -> BaseAgent:
         output_schema = (
             create_dynamic_model(self.config.output)
             if isinstance(self.config.output, dict)
             else None
         )
 
-        self.agent = BaseAgent(
+        agent = BaseAgent(
             id=self.config.id,
             name=self.config.name,
             env=self.config.env,
             output_schema=output_schema,
             tools=tools,
             debug=self.config.debug,
+            structured_output_mode=self.config.structured_output_mode,
         )
+        self.check_cache(agent)
+        return agent
+
+    def check_cache(self, agent: BaseAgent):
+        """Reject multi-turn agents in cached nodes and workflows, their answer
+        depends on the conversation history, which is not part of the keys"""
+        if not agent.settings.multi_turn:
+            return
+        if self.cache is not None:
+            raise ValueError(
+                f"节点{self.id}开启了多轮对话，不支持cache，请在env中将multi_turn设为false"
+            )
+        if self.workflow_cached:
+            raise ValueError(
+                f"工作流开启了cache，节点{self.id}开启了多轮对话，请在env中将multi_turn设为false"
+            )
+
+    async def build_agent(self):
+        """Build the agent with the MCP tools, rebinding them when they changed
+
+        Sessions and tool listings are shared through `MCPManager`, so this
+        is a dictionary lookup unless the cached listing expired.
+        """
+        from imind_ai.agent.base.mcp import MCPManager
+
+        connections = self.config.model_dump(exclude_none=True)["mcp"]
+        tools, version = await MCPManager.get_tools(connections)
+        if version == self.tools_version:
+            return
+
+        async with self._lock:
+            if version == self.tools_version:
+                return
+            if self.agent is None:
+                self.agent = self.create_agent(tools)
+            else:
+                self.agent.update_tools(tools)
+            self.tools_version = version
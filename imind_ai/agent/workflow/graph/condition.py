@@ -1,91 +1,158 @@
-from typing import Any
+import operator
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Set, Tuple, Union
 
+from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel
-from imind_ai.agent.config.base import ConditionNodeConfig
+from imind_ai.agent.config.base import Condition, ConditionItem, ConditionNodeConfig
 from imind_ai.agent.workflow.graph.node import Node
 from imind_ai.agent.workflow.graph.node_mixin import NodeMixin
-
-from imind_ai.agent.workflow.pipeline.context import Context
+from imind_ai.agent.workflow.pipeline.context import RunContext
+
+
+Predicate = Callable[[BaseModel], bool]
+
+
+def _ordered(compare: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    """Ordering comparison, False when a side is None (a missing reference)"""
+    return lambda operand, right_hand: (
+        operand is not None and right_hand is not None and compare(operand, right_hand)
+    )
+
+
+# missing references resolve to None, the operators treat None as an absent
+# value instead of raising
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": _ordered(operator.lt),
+    "gt": _ordered(operator.gt),
+    "le": _ordered(operator.le),
+    "ge": _ordered(operator.ge),
+    "ct": lambda operand, right_hand: right_hand is not None and operand in right_hand,
+    "nc": lambda operand, right_hand: right_hand is None or operand not in right_hand,
+    "sw": lambda operand, right_hand: (
+        operand is not None
+        and right_hand is not None
+        and str(operand).startswith(right_hand)
+    ),
+    "ew": lambda operand, right_hand: (
+        operand is not None
+        and right_hand is not None
+        and str(operand).endswith(right_hand)
+    ),
+    "em": lambda operand, right_hand: True if operand else False,
+    "nem": lambda operand, right_hand: False if operand else True,
+}
+
+
+def coerce_value(value: Any, op_type: str) -> Any:
+    """Convert a literal value of a condition to its `op_type`"""
+    if value is None:
+        return None
+    if op_type == "int":
+        return value if isinstance(value, int) else int(value)
+    elif op_type == "float":
+        return value if isinstance(value, float) else float(value)
+    elif op_type == "bool":
+        if isinstance(value, str):
+            return value.strip().lower() in ("true", "1", "yes")
+        return bool(value)
+    elif op_type == "str":
+        return value if isinstance(value, str) else str(value)
+    elif op_type.startswith("list"):
+        return value if isinstance(value, list) else list(value)
+    elif op_type == "dict":
+        return value if isinstance(value, dict) else dict(value)
+    return value
 
 
 class ConditionNode(Node, NodeMixin):
-    def __init__(self, config: ConditionNodeConfig, ctx: Context):
+    conditional = True
+
+    def __init__(self, config: ConditionNodeConfig):
         super().__init__(config)
         self.prev = config.prev
-        self.ctx = ctx
 
-    def __call__(self, state: BaseModel):
-        if_express = self.config.if_express
+        # conditions are compiled once at plan time, routing only runs closures
+        self.branches: List[Tuple[Predicate, Union[str, List[str]]]] = [
+            (self.compile_condition(config.if_express), config.if_express.next)
+        ]
+        for elif_express in config.elif_express or []:
+            self.branches.append(
+                (self.compile_condition(elif_express), elif_express.next)
+            )
+
+    def __call__(self, state: BaseModel, config: RunnableConfig):
+        ctx = RunContext.from_config(config)
+        if ctx.metrics is None and ctx.recorder is None:
+            return self.route(state)
+
+        start = perf_counter()
+        try:
+            return self.route(state)
+        finally:
+            end = perf_counter()
+            if ctx.recorder is not None:
+                ctx.recorder.complete(self.id, self.id, start, end, self.type)
+            if ctx.metrics is not None:
+                stats = ctx.metrics.node(self.id, self.type)
+                stats.calls += 1
+                stats.wall_seconds += end - start
+
+    def route(self, state: BaseModel) -> Union[str, List[str]]:
+        for predicate, next in self.branches:
+            if predicate(state):
+                return next
+        return self.config.else_express
 
-        is_meet = True
-        for condition in if_express.condition:
+    def get_references(self) -> List[str]:
+        refs: List[str] = []
+        for express in [self.config.if_express, *(self.config.elif_express or [])]:
+            for item in express.condition:
+                refs.append(item.operand)
+                if item.source == "reference" and item.reference is not None:
+                    refs.append(item.reference)
+        return refs
 
-            operand = self.process_reference(condition.operand, state)
+    def output_fields(self) -> Set[str] | None:
+        return set()
 
-            right_hand = (
-                condition.value
-                if condition.source == "input"
-                else self.process_reference(condition.reference, state)
-            )
+    def compile_condition(self, condition: Condition) -> Predicate:
+        items = tuple(self.compile_item(item) for item in condition.condition)
+        if not items:
+            return lambda state: True
+        if len(items) == 1:
+            return items[0]
 
-            logic = self.exec_judgment(condition.operator, operand, right_hand)
-            if if_express.logic_operator == "or" and logic:
-                return if_express.next
-            if if_express.logic_operator == "and" and not logic:
-                is_meet = False
-                break
+        if condition.logic_operator == "or":
 
-        if is_meet:
-            return if_express.next
+            def predicate(state: BaseModel) -> bool:
+                for item in items:
+                    if item(state):
+                        return True
+                return False
 
-        elif_express = self.config.elif_express or []
+        else:
 
-        for elif_condition in elif_express:
-            is_meet = True
-            for condition in elif_condition.condition:
+            def predicate(state: BaseModel) -> bool:
+                for item in items:
+                    if not item(state):
+                        return False
+                return True
 
-                operand = self.process_reference(condition.operand, state)
+        return predicate
 
-                right_hand = (
-                    condition.value
-                    if condition.source == "input"
-                    else self.process_reference(condition.reference, state)
-                )
+    def compile_item(self, item: ConditionItem) -> Predicate:
+        judge = OPERATORS[item.operator]
+        get_operand = self.compile_reference(item.operand)
 
-                logic = self.exec_judgment(condition.operator, operand, right_hand)
-                if elif_condition.logic_operator == "or" and logic:
-                    return elif_condition.next
-                if elif_condition.logic_operator == "and" and not logic:
-                    is_meet = False
-                    break
+        if item.source == "input":
+            right_hand = coerce_value(item.value, item.op_type)
+            return lambda state: judge(get_operand(state), right_hand)
 
-            if is_meet:
-                return elif_condition.next
-        return self.config.else_express
+        get_right_hand = self.compile_reference(item.reference)
+        return lambda state: judge(get_operand(state), get_right_hand(state))
 
     def exec_judgment(self, operator: str, operand: Any, right_hand: Any) -> bool:
-
-        if operator == "eq":
-            return operand == right_hand
-        elif operator == "ne":
-            return operand != right_hand
-        elif operator == "lt":
-            return operand < right_hand
-        elif operator == "gt":
-            return operand > right_hand
-        elif operator == "le":
-            return operand <= right_hand
-        elif operator == "ge":
-            return operand >= right_hand
-        elif operator == "ct":
-            return operand in right_hand
-        elif operator == "nc":
-            return not operand in right_hand
-        elif operator == "sw":
-            return str(operand).startswith(right_hand)
-        elif operator == "ew":
-            return str(operand).endswith(right_hand)
-        elif operator == "em":
-            return True if operand else False
-        elif operator == "nem":
-            return False if operand else True
+        return OPERATORS[operator](operand, right_hand)
@@ -0,0 +1,116 @@
+import asyncio
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
+
+from imind_ai.agent.workflow.pipeline.context import RunContext
+from imind_ai.utils.tracing import get_tracer
+
+if TYPE_CHECKING:
+    from imind_ai.agent.workflow.graph.node import Node
+
+
+tracer = get_tracer(__name__)
+
+
+class FanOut:
+    """Branches started together by the list `next` of one node
+
+    Built by the Planner and shared by every run of the plan, the state of
+    one execution lives in a `FanOutRun` kept in the `RunContext`.
+    """
+
+    def __init__(self, source: str, branches: List[str], limit: int | None = None):
+        self.source = source
+        self.branches = branches
+        self.limit = limit
+        # set by the join node waiting for the branches, if any
+        self.wait = "all"
+        self.k = len(branches)
+
+    def start(self, ctx: RunContext) -> "FanOutRun":
+        """The execution of the fan-out in the run, started by its first branch"""
+        run = ctx.fan_outs.get(self.source)
+        if run is None:
+            run = ctx.fan_outs.setdefault(self.source, FanOutRun(self))
+        return run
+
+
+class FanOutRun:
+    """One execution of a fan-out: concurrency limit, completed branches and
+    their timings"""
+
+    def __init__(self, fan_out: FanOut):
+        self.fan_out = fan_out
+        self.semaphore = asyncio.Semaphore(fan_out.limit) if fan_out.limit else None
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.completed: List[str] = []
+        self.failed: Dict[str, str] = {}
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self.done = False
+
+    async def run(
+        self, node: "Node", ctx: RunContext, state: BaseModel, config: RunnableConfig
+    ) -> Dict[str, Any]:
+        """Run a branch within the concurrency limit
+
+        Branches left running once the join has enough results are cancelled,
+        timed out branches, and failed ones when the join does not wait for
+        all of them, are reported to the join instead of failing the run.
+        """
+        queued = perf_counter()
+        if self.semaphore is not None:
+            await self.semaphore.acquire()
+        start = perf_counter()
+        status = "ok"
+        update = None
+        try:
+            if self.done:
+                status = "cancelled"
+            else:
+                task = asyncio.create_task(node.execute(ctx, state, config))
+                self.tasks[node.id] = task
+                try:
+                    update = await task
+                except asyncio.CancelledError:
+                    if asyncio.current_task().cancelling():
+                        raise
+                    status = "cancelled"
+                except TimeoutError:
+                    status = "timeout"
+                except Exception as e:
+                    if self.fan_out.wait == "all":
+                        raise
+                    tracer.warning("branch %s failed: %s", node.id, e)
+                    status = "error"
+                finally:
+                    self.tasks.pop(node.id, None)
+        finally:
+            if self.semaphore is not None:
+                self.semaphore.release()
+
+        timing = {
+            "queued_seconds": start - queued,
+            "seconds": perf_counter() - start,
+            "status": status,
+        }
+        self.timings[node.id] = timing
+        if ctx.metrics is not None:
+            ctx.metrics.fan_out(self.fan_out.source)[node.id] = timing
+
+        if status != "ok":
+            self.failed[node.id] = status
+            return {f"{node.id}_output": {"_error": status}}
+
+        self.completed.append(node.id)
+        if self.fan_out.wait != "all" and len(self.completed) >= self.fan_out.k:
+            self.cancel()
+        return update
+
+    def cancel(self):
+        """Stop the branches still queued or running"""
+        self.done = True
+        for task in self.tasks.values():
+            task.cancel()
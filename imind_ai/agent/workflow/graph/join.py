@@ -0,0 +1,70 @@
+from typing import Any, Dict, List, Set
+
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
+from imind_ai.agent.config.base import JoinNodeConfig
+from imind_ai.agent.config.reference import state_field
+from imind_ai.agent.workflow.graph.fan_out import FanOut
+from imind_ai.agent.workflow.graph.node import Node
+from imind_ai.agent.workflow.pipeline.context import RunContext
+
+
+class JoinNode(Node):
+    """Waits for the branches of a fan-out and collects their outputs
+
+    The graph runs the join once all branches returned, with `wait: any` or
+    `first_k` the branches still running after the first k results are
+    cancelled so they return early.
+    """
+
+    def __init__(self, config: JoinNodeConfig):
+        super().__init__(config)
+        # set by the Planner
+        self.branches: List[Node] = []
+        self.joined: FanOut | None = None
+
+    async def run(self, state: BaseModel, config: RunnableConfig):
+        ctx = RunContext.from_config(config)
+        run = None
+        if self.joined is not None:
+            # the next round of a loop starts a new execution of the fan-out
+            run = ctx.fan_outs.pop(self.joined.source, None)
+
+        if run is not None:
+            completed = run.completed
+            failed = run.failed
+            timings = run.timings
+        else:
+            completed = [
+                node.id
+                for node in self.branches
+                if getattr(state, state_field(node.id)) is not None
+            ]
+            failed = {}
+            timings = {}
+
+        if self.config.wait == "any":
+            completed = completed[:1]
+        elif self.config.wait == "first_k":
+            completed = completed[: self.config.k]
+
+        results: Dict[str, Any] = {
+            branch: getattr(state, state_field(branch)) for branch in completed
+        }
+
+        return {
+            f"{self.id}_output": {
+                "results": results,
+                "completed": completed,
+                "failed": failed,
+                "timings": timings,
+            }
+        }
+
+    def output_fields(self) -> Set[str] | None:
+        return {"results", "completed", "failed", "timings"}
+
+    def state_reads(self) -> Set[str]:
+        return super().state_reads() | {
+            state_field(branch.id) for branch in self.branches
+        }
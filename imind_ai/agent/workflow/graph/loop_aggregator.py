@@ -1,53 +1,63 @@
-from typing import cast
+from typing import List, Set
 
+from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel
 from imind_ai.agent.config.base import LoopAggregationNodeConfig
+from imind_ai.agent.workflow.graph.aggregation import create_accumulator
 from imind_ai.agent.workflow.graph.node import Node
 from imind_ai.agent.workflow.graph.node_mixin import NodeMixin
-from imind_ai.agent.workflow.pipeline.context import Context
 
 
 class LoopAggregationNode(Node, NodeMixin):
 
-    def __init__(self, config: LoopAggregationNodeConfig, ctx: Context):
+    def __init__(self, config: LoopAggregationNodeConfig):
         super().__init__(config)
 
-        self.ctx = ctx
-
-    async def __call__(self, state: BaseModel):
-
-        print("LoopAggregationNode state", type(state))
+        self.accumulators = {
+            key: create_accumulator(value) for key, value in config.aggregation.items()
+        }
+        self.references = {
+            key: self.compile_reference(value.reference)
+            for key, value in config.aggregation.items()
+        }
 
+    async def run(self, state: BaseModel, config: RunnableConfig):
         la_state = getattr(state, f"{self.id}_output") or {}
 
         counter = la_state.get("counter", 1)
-        agg_items = la_state.get("agg_items")
-        if agg_items is None:
-            agg_items = {}
+        previous = la_state.get("agg_state")
+        if previous is None:
+            previous = {}
         else:
             counter += 1
 
+        # a new state, the previous one belongs to the workflow state
+        agg_state = {}
         aggregation = {}
-        for key, value in self.config.aggregation.items():
-            agg_type = value.agg_type
-            reference = self.process_reference(value.reference, state)
-            items = agg_items.get(key, [])
+        for key, accumulator in self.accumulators.items():
+            reference = self.references[key](state)
+            acc = previous.get(key)
+            if acc is None:
+                acc = accumulator.init()
             if reference is not None:
-                items.append(reference)
-                agg_items[key] = items
-
-            if agg_type == "sum":
-                ret = sum(items)
-            elif agg_type == "mean":
-                ret = sum(items) / len(items)
-            elif agg_type == "list":
-                ret = items
-            aggregation[key] = ret
+                acc = accumulator.add(acc, reference)
+            agg_state[key] = acc
+            aggregation[key] = accumulator.result(acc)
 
         return {
             f"{self.id}_output": {
                 "counter": counter,
-                "agg_items": agg_items,
+                "agg_state": agg_state,
                 "aggregation": aggregation,
             }
         }
+
+    def get_references(self) -> List[str]:
+        return [value.reference for value in self.config.aggregation.values()]
+
+    def output_fields(self) -> Set[str] | None:
+        return {"counter", "agg_state", "aggregation"}
+
+    def state_reads(self) -> Set[str]:
+        # the accumulators of the previous laps
+        return super().state_reads() | {f"{self.id}_output"}
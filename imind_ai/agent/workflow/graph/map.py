@@ -0,0 +1,100 @@
+import asyncio
+from typing import Any, Dict, List, Set
+
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
+from imind_ai.agent.config.base import MapNodeConfig
+from imind_ai.agent.config.reference import ITEM_ENTITY, parse_reference
+from imind_ai.agent.workflow.graph.base_agent import BaseAgentNode
+from imind_ai.agent.workflow.pipeline.context import RunContext
+from imind_ai.utils.tracing import get_tracer
+
+
+tracer = get_tracer(__name__)
+
+
+class MapNode(BaseAgentNode):
+    """Runs the agent of the node on every element of a list
+
+    The input references the current element as `item` (`item.name` for a
+    list of dicts). A pool of `max_concurrency` workers takes the elements in
+    order, results keep the order of the list and `on_error` decides what a
+    failed element turns into.
+    """
+
+    def __init__(self, config: MapNodeConfig):
+        super().__init__(config)
+        self.items = parse_reference(config.items)
+        self.depends = [depend for depend in self.depends if depend != ITEM_ENTITY]
+
+    async def run(self, state: BaseModel, config: RunnableConfig):
+        if self.config.mcp is not None:
+            await self.build_agent()
+
+        items = self.items.resolve(state)
+        if items is None:
+            items = []
+        if not isinstance(items, (list, tuple)):
+            raise ValueError(f"{self.id}: {self.config.items} 引用的值不是列表")
+
+        ctx = RunContext.from_config(config)
+        params = self.params(state)
+        inputs: List[Dict[str, Any] | None] = [None] * len(items)
+        results: List[Dict[str, Any] | None] = [None] * len(items)
+        errors: Dict[str, str] = {}
+        # the workers share the iterator, each element is taken once
+        indices = iter(range(len(items)))
+
+        async def worker(worker_id: int):
+            for idx in indices:
+                try:
+                    input = self.config.build_input(**params, item=items[idx])
+                    inputs[idx] = input.dict()
+                    output = await self.chat(
+                        input,
+                        self.item_context(ctx, idx),
+                        track=f"{self.id}[{worker_id}]",
+                    )
+                    results[idx] = output.dict()
+                except Exception as e:
+                    if self.config.on_error == "fail":
+                        raise
+                    tracer.warning("%s item %d failed: %s", self.id, idx, e)
+                    errors[str(idx)] = str(e)
+
+        workers = min(len(items), self.config.max_concurrency or len(items))
+        try:
+            # a failing worker cancels the others
+            async with asyncio.TaskGroup() as group:
+                for worker_id in range(workers):
+                    group.create_task(worker(worker_id))
+        except ExceptionGroup as e:
+            raise e.exceptions[0]
+
+        if self.config.on_error == "skip":
+            results = [
+                result for idx, result in enumerate(results) if str(idx) not in errors
+            ]
+
+        return {
+            f"{self.id}_input": {"items": inputs},
+            f"{self.id}_output": {"results": results, "errors": errors},
+        }
+
+    def item_context(self, ctx: RunContext, idx: int) -> RunContext:
+        """Context of the agent call for one element, every element has its
+        own conversation thread"""
+        item_ctx = ctx.model_copy()
+        item_ctx.session_id = f"{ctx.session_id}-{idx}"
+        return item_ctx
+
+    def get_references(self) -> List[str]:
+        refs = [
+            ref
+            for ref in self.config.get_input_references()
+            if parse_reference(ref).entity != ITEM_ENTITY
+        ]
+        return [self.config.items, *refs]
+
+    def output_fields(self) -> Set[str] | None:
+        return {"results", "errors"}
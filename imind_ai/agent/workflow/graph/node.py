@@ -1,10 +1,126 @@
+import asyncio
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Dict, List, Set
+
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
 from imind_ai.agent.config.base import BaseNodeConfig
+from imind_ai.agent.config.reference import parse_reference, state_field
+from imind_ai.agent.workflow.pipeline.context import RunContext
+from imind_ai.agent.workflow.pipeline.run_metrics import NodeStats, state_size
+from imind_ai.utils.tracing import get_tracer
+
+if TYPE_CHECKING:
+    from imind_ai.agent.workflow.graph.fan_out import FanOut
+
+
+tracer = get_tracer(__name__)
 
 
 class Node:
+    # routes to the next nodes rather than running as a node of the graph,
+    # planned as the conditional edge of its `prev`
+    conditional: bool = False
 
     def __init__(self, config: BaseNodeConfig):
         self.id = config.id
         self.name = config.name
         self.type = config.type
         self.config = config
+        # set by the Planner when the node is a branch of a list `next`
+        self.fan_out: "FanOut | None" = None
+        # set by the Planner: writes nothing reads and fields dead after the
+        # node, left out of the state and set to None
+        self.drops: Set[str] = set()
+        self.clears: Set[str] = set()
+
+    async def __call__(self, state: BaseModel, config: RunnableConfig):
+        ctx = RunContext.from_config(config)
+        with tracer.span("node", node=self.id, type=self.type):
+            if self.fan_out is not None:
+                return await self.fan_out.start(ctx).run(self, ctx, state, config)
+            return await self.execute(ctx, state, config)
+
+    async def execute(
+        self, ctx: RunContext, state: BaseModel, config: RunnableConfig
+    ) -> Dict[str, Any]:
+        """Run the node within its timeout, measured when the run has metrics
+        or a trace recorder"""
+        if ctx.metrics is None and ctx.recorder is None:
+            update = await self.run_with_timeout(state, config)
+            return self.prune(state, update)
+
+        start = perf_counter()
+        try:
+            update = await self.run_with_timeout(state, config)
+        finally:
+            end = perf_counter()
+            if ctx.recorder is not None:
+                ctx.recorder.complete(self.id, self.id, start, end, self.type)
+            if ctx.metrics is not None:
+                stats = ctx.metrics.node(self.id, self.type)
+                stats.calls += 1
+                stats.wall_seconds += end - start
+        if ctx.metrics is None:
+            return self.prune(state, update)
+        update = self.prune(state, update, stats)
+        stats.state_bytes += state_size(update)
+        return update
+
+    def prune(
+        self,
+        state: BaseModel,
+        update: Dict[str, Any],
+        stats: NodeStats | None = None,
+    ) -> Dict[str, Any]:
+        """Leave the dropped fields out of the update and clear the dead ones
+
+        The pruned values are serialized to count the bytes kept out of the
+        state only when `stats` is given, i.e. the run is measured.
+        """
+        if not self.drops and not self.clears:
+            return update
+
+        pruned: Dict[str, Any] = {}
+        kept: Dict[str, Any] = {}
+        for key, value in update.items():
+            if key in self.drops:
+                pruned[key] = value
+            else:
+                kept[key] = value
+        for key in self.clears:
+            value = getattr(state, key, None)
+            if value is not None:
+                pruned[key] = value
+                kept[key] = None
+
+        if stats is not None and pruned:
+            stats.pruned_bytes += state_size(pruned)
+        return kept
+
+    async def run_with_timeout(
+        self, state: BaseModel, config: RunnableConfig
+    ) -> Dict[str, Any]:
+        if self.config.timeout is None:
+            return await self.run(state, config)
+        return await asyncio.wait_for(self.run(state, config), self.config.timeout)
+
+    async def run(self, state: BaseModel, config: RunnableConfig) -> Dict[str, Any]:
+        """Execute the node, returns the update of the workflow state"""
+        raise NotImplementedError
+
+    def get_references(self) -> List[str]:
+        """References read by the node"""
+        return []
+
+    def output_fields(self) -> Set[str] | None:
+        """Top level fields of the node output, None when they are not known"""
+        return None
+
+    def state_reads(self) -> Set[str]:
+        """Workflow state fields read by the node"""
+        return {parse_reference(ref).field for ref in self.get_references()}
+
+    def state_writes(self) -> Set[str]:
+        """Workflow state fields written by the node"""
+        return {state_field(self.id)}
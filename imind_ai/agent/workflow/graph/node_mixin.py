@@ -1,32 +1,17 @@
-from ctypes import cast
-from typing import Any
+from typing import Any, Callable
 
 from pydantic import BaseModel
 
+from imind_ai.agent.config.reference import parse_reference
+
 
 class NodeMixin:
     def process_reference(self, ref: str, state: BaseModel) -> Any:
         """取出引用对象的值
-        引用对象不存在时抛出异常
+        引用的实体不在状态中时抛出异常，路径不存在时返回None
         """
-        infos = ref.split(".")
-        entity = infos.pop(0)
-        entity = f"{entity}_input" if entity == "workflow" else f"{entity}_output"
-        print(entity, state)
-        if not hasattr(state, entity):
-            raise ValueError(f"引用的值不正确，请核实{ref}, {str(state)}")
-
-        item = getattr(state, entity)
+        return parse_reference(ref).resolve(state)
 
-        while len(infos) > 0:
-            key = infos.pop(0)
-            if isinstance(item, dict):
-                item = item.get(key)
-                if item is None:
-                    raise ValueError(f"引用的值不正确，请核实{ref}")
-            else:
-                if hasattr(item, key):
-                    item = getattr(item, key)
-                else:
-                    raise ValueError(f"引用的值不正确，请核实{ref}")
-        return item
+    def compile_reference(self, ref: str) -> Callable[[BaseModel], Any]:
+        """Parse the reference once, returns an accessor taking the state"""
+        return parse_reference(ref).resolve
@@ -0,0 +1,28 @@
+from typing import Dict, Type
+
+from imind_ai.agent.config.base import BaseNodeConfig, register_node_config
+from imind_ai.agent.workflow.graph.base_agent import BaseAgentNode
+from imind_ai.agent.workflow.graph.condition import ConditionNode
+from imind_ai.agent.workflow.graph.join import JoinNode
+from imind_ai.agent.workflow.graph.loop_aggregator import LoopAggregationNode
+from imind_ai.agent.workflow.graph.map import MapNode
+from imind_ai.agent.workflow.graph.node import Node
+
+
+# node class planned for each `type:`, types without one are parsed but skipped
+NODE_TYPES: Dict[str, Type[Node]] = {
+    "base_agent": BaseAgentNode,
+    "map": MapNode,
+    "condition": ConditionNode,
+    "loop_aggregation": LoopAggregationNode,
+    "join": JoinNode,
+}
+
+
+def register_node_type(
+    type: str, config: Type[BaseNodeConfig], node: Type[Node]
+) -> None:
+    """Plug a node type into parsing and planning: nodes with `type:` are
+    validated with `config` and planned as `node`"""
+    register_node_config(type, config)
+    NODE_TYPES[type] = node
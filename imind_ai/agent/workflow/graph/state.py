@@ -35,5 +35,4 @@ def new_state_cls(nodes: List[Node]) -> Type[BaseModel]:
                 Optional[Union[str, Dict[str, Any]]],
                 None,
             )
-    print(f"{schema_dict=}")
     return create_model("State", __config__=model_config, **schema_dict)
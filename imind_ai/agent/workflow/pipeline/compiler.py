@@ -0,0 +1,132 @@
+import argparse
+import os
+import pickle
+from hashlib import sha256
+from pathlib import Path
+from typing import List
+
+import pydantic
+from pydantic import BaseModel
+
+from imind_ai.agent.config import base, helper, reference, schema, value_type
+from imind_ai.agent.config.base import Config
+from imind_ai.agent.workflow.pipeline.graph_cache import GraphCache
+from imind_ai.utils import read_yaml
+from imind_ai.utils.tracing import get_tracer
+
+
+tracer = get_tracer(__name__)
+
+
+# bump when the layout of `Artifact` changes
+ARTIFACT_VERSION = 1
+
+
+class Artifact(BaseModel):
+    """Validated workflow config compiled ahead of time
+
+    Holds the config as validated by pydantic and its plan fingerprint, so
+    loading a workflow is a single unpickling instead of parsing YAML and
+    validating every node. Nodes, compiled conditions, edges and the state
+    class hold models and closures and are still built by the `Planner`,
+    which then starts from the cached fingerprint.
+    """
+
+    version: str
+    source_hash: str
+    fingerprint: str
+    config: Config
+
+
+class Compiler:
+    """Compile `workflow.yaml` into `workflow.yaml.compiled`
+
+    An artifact is only used while the hash of its source and the version of
+    the config models match, `Parser` recompiles stale artifacts. Artifacts
+    are pickles, load only artifacts you compiled yourself.
+    """
+
+    _version: str | None = None
+
+    @classmethod
+    def version(cls) -> str:
+        """Artifact layout, pydantic and config model versions, a change of
+        any of them invalidates the artifacts"""
+        if cls._version is None:
+            digest = sha256()
+            for module in (base, helper, reference, schema, value_type):
+                digest.update(Path(module.__file__).read_bytes())
+            cls._version = (
+                f"{ARTIFACT_VERSION}:{pydantic.VERSION}:{digest.hexdigest()[:16]}"
+            )
+        return cls._version
+
+    @classmethod
+    def artifact_path(cls, source: Path) -> Path:
+        return source.with_name(source.name + ".compiled")
+
+    @classmethod
+    def source_hash(cls, source: Path) -> str:
+        return sha256(source.read_bytes()).hexdigest()
+
+    @classmethod
+    def compile(cls, source: Path, output: Path | None = None) -> Artifact:
+        """Parse and validate `source` and write its artifact"""
+        source_hash = cls.source_hash(source)
+        config = Config.from_dict(read_yaml(source))
+        artifact = Artifact(
+            version=cls.version(),
+            source_hash=source_hash,
+            fingerprint=GraphCache.fingerprint(config),
+            config=config,
+        )
+
+        output = output or cls.artifact_path(source)
+        # write then rename, concurrent workers never read a partial artifact
+        tmp = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(pickle.dumps(artifact, protocol=pickle.HIGHEST_PROTOCOL))
+        os.replace(tmp, output)
+
+        tracer.debug("compiled %s to %s", source, output)
+        return artifact
+
+    @classmethod
+    def load(cls, source: Path, path: Path | None = None) -> Artifact | None:
+        """The artifact of `source`, None when missing, unreadable or stale"""
+        path = path or cls.artifact_path(source)
+        try:
+            artifact = pickle.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            tracer.warning("工作流编译产物%s无法读取: %s", path, e)
+            return None
+
+        if not isinstance(artifact, Artifact) or artifact.version != cls.version():
+            tracer.info("stale artifact %s: version changed", path)
+            return None
+        if artifact.source_hash != cls.source_hash(source):
+            tracer.info("stale artifact %s: %s changed", path, source)
+            return None
+        return artifact
+
+
+def main(argv: List[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description="compile workflow configs ahead of time"
+    )
+    parser.add_argument(
+        "sources", nargs="*", type=Path, default=[Path("workflow.yaml")]
+    )
+    args = parser.parse_args(argv)
+
+    for source in args.sources:
+        artifact = Compiler.compile(source)
+        print(
+            f"{source} -> {Compiler.artifact_path(source)} "
+            f"({len(artifact.config.nodes)} nodes, {artifact.fingerprint[:12]})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,21 @@
 from enum import Enum
-from typing import Any, Callable, List, Tuple, Dict
+from typing import TYPE_CHECKING, Any, Dict
 
-from langgraph.graph.state import CompiledStateGraph
-from pydantic import BaseModel
+from langchain_core.runnables import RunnableConfig
 from pydantic_settings import BaseSettings
 
 from imind_ai.agent.config.base import Config
-from imind_ai.agent.workflow.graph.node import Node
+from imind_ai.agent.workflow.pipeline.run_metrics import RunMetrics
+from imind_ai.agent.workflow.pipeline.trace_recorder import TraceRecorder
 from imind_ai.utils.context import BaseContext
 
+if TYPE_CHECKING:
+    from imind_ai.agent.workflow.pipeline.compiler import Artifact
+    from imind_ai.agent.workflow.pipeline.plan import Plan
+
+
+RUN_CONTEXT_KEY = "run_context"
+
 
 class Phase(Enum):
     INITIAL = 0
@@ -22,15 +29,14 @@ class Phase(Enum):
 
 
 class Context(BaseContext):
+    """Build context of a workflow, filled in by Parser and Planner"""
+
     _phase: Phase = Phase.INITIAL
     _config: Config | None = None
-    _nodes: List[Node] = []
-    _state: BaseModel | None = None
-    _edges: List[Tuple[str, str]] = []
-    _conditional_edges: List[Dict] = []
-    _graph: CompiledStateGraph | None = None
     _settings: BaseSettings | None = None
     _kwargs: Dict[str, Any] | None = None
+    _artifact: "Artifact | None" = None
+    _plan: "Plan | None" = None
 
     @property
     def phase(self) -> Phase:
@@ -49,57 +55,83 @@ class Context(BaseContext):
         self.set("_config", config)
 
     @property
-    def nodes(self) -> List[Node]:
-        return self._nodes
+    def settings(self) -> BaseSettings | None:
+        return self._settings
 
-    @nodes.setter
-    def nodes(self, nodes: List[Node]) -> None:
-        self.set("_nodes", nodes)
+    @settings.setter
+    def settings(self, settings: BaseSettings) -> None:
+        self.set("_settings", settings)
 
     @property
-    def state(self) -> BaseModel | None:
-        return self._state
+    def kwargs(self) -> Dict[str, Any] | None:
+        return self._kwargs
 
-    @state.setter
-    def state(self, state: BaseModel) -> None:
-        self.set("_state", state)
+    @kwargs.setter
+    def kwargs(self, kwargs: Dict[str, Any]) -> None:
+        self.set("_kwargs", kwargs)
 
     @property
-    def edges(self) -> List[Tuple[str, str]]:
-        return self._edges
+    def artifact(self) -> "Artifact | None":
+        """The compiled artifact the config was loaded from, if any"""
+        return self._artifact
 
-    @edges.setter
-    def edges(self, edges: List[Tuple[str, str]]) -> None:
-        self.set("_edges", edges)
+    @artifact.setter
+    def artifact(self, artifact: "Artifact") -> None:
+        self.set("_artifact", artifact)
 
     @property
-    def conditional_edges(self) -> List[Dict]:
-        return self._conditional_edges
+    def plan(self) -> "Plan | None":
+        return self._plan
 
-    @conditional_edges.setter
-    def conditional_edges(self, conditional_edges: List[Dict]) -> None:
-        self.set("_conditional_edges", conditional_edges)
+    @plan.setter
+    def plan(self, plan: "Plan") -> None:
+        self.set("_plan", plan)
+
+
+class RunContext(BaseContext):
+    """Per-invocation context of a workflow: session, user, store, phase,
+    the metrics of the run, an optional trace recorder and the running
+    fan-outs"""
+
+    _phase: Phase = Phase.INITIAL
+    _metrics: RunMetrics | None = None
+    _recorder: TraceRecorder | None = None
+    _fan_outs: Dict[str, Any] | None = None
 
     @property
-    def graph(self) -> CompiledStateGraph | None:
-        return self._graph
+    def phase(self) -> Phase:
+        return self._phase
 
-    @graph.setter
-    def graph(self, graph: CompiledStateGraph) -> None:
-        self.set("_graph", graph)
+    @phase.setter
+    def phase(self, phase: Phase) -> None:
+        self.set("_phase", phase)
 
     @property
-    def settings(self) -> BaseSettings | None:
-        return self._settings
+    def metrics(self) -> RunMetrics | None:
+        return self._metrics
 
-    @settings.setter
-    def settings(self, settings: BaseSettings) -> None:
-        self.set("_settings", settings)
+    @metrics.setter
+    def metrics(self, metrics: RunMetrics) -> None:
+        self.set("_metrics", metrics)
 
     @property
-    def kwargs(self) -> Dict[str, Any] | None:
-        return self._kwargs
+    def recorder(self) -> TraceRecorder | None:
+        return self._recorder
 
-    @kwargs.setter
-    def kwargs(self, kwargs: Dict[str, Any]) -> None:
-        self.set("_kwargs", kwargs)
+    @recorder.setter
+    def recorder(self, recorder: TraceRecorder) -> None:
+        self.set("_recorder", recorder)
+
+    @property
+    def fan_outs(self) -> Dict[str, Any]:
+        """Executions of the fan-outs of the run by source node"""
+        if self._fan_outs is None:
+            self.set("_fan_outs", {})
+        return self._fan_outs
+
+    @classmethod
+    def from_config(cls, config: RunnableConfig | None) -> "RunContext":
+        """Take the run context out of a langgraph runnable config"""
+        configurable = (config or {}).get("configurable", {})
+        ctx = configurable.get(RUN_CONTEXT_KEY)
+        return ctx if ctx is not None else cls()
@@ -1,68 +1,154 @@
-from typing import Any, Dict
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple, Type
 from uuid import uuid4
-from imind_ai.agent.workflow.pipeline.context import Context, Phase
+from imind_ai.agent.workflow.graph.node import Node
+from imind_ai.agent.workflow.pipeline.context import RUN_CONTEXT_KEY, Phase, RunContext
 from imind_ai.agent.workflow.graph.state import new_state_cls
+from imind_ai.agent.workflow.pipeline.graph_cache import GraphCache
+from imind_ai.agent.workflow.pipeline.plan import Plan
+from imind_ai.agent.workflow.pipeline.result_cache import ResultCache
+from imind_ai.agent.workflow.pipeline.run_metrics import RunMetrics
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.constants import CONFIG_KEY_CHECKPOINTER, CONFIG_KEY_STORE
 from langgraph.graph import StateGraph
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.types import Checkpointer
+from pydantic import BaseModel
 
+from imind_ai.agent.config.reference import state_field
 from imind_ai.agent.config.schema import Input, Output
+from imind_ai.utils.tracing import Lazy, get_tracer
 
 
-class Executor:
-    @classmethod
-    async def execute(cls, context: Context, input: Input):
-        context.phase = Phase.EXECUTING
-
-        cls.build_graph(context)
+tracer = get_tracer(__name__)
 
-        context.session_id = context.session_id or str(uuid4())
 
-        config = {
-            "configurable": {
-                "thread_id": context.session_id,
-                "checkpoint_ns": context.config.agent.id,
-            }
+class Executor:
+    @classmethod
+    async def execute(
+        cls, plan: Plan, input: Input, ctx: RunContext | None = None
+    ) -> Output:
+        """Run one invocation of a planned workflow
+
+        The plan is only read, all per-request data is kept in `ctx`, so the
+        same plan can serve concurrent executions.
+
+        Runs are measured when the workflow sets `metrics` or the caller
+        passes a `ctx` with `metrics` set, the summary is then attached to
+        the output.
+        """
+        ctx = ctx or RunContext()
+        ctx.phase = Phase.EXECUTING
+        ctx.session_id = ctx.session_id or str(uuid4())
+        if ctx.metrics is None and plan.config.metrics:
+            ctx.metrics = RunMetrics()
+
+        cache = ResultCache.get_cache(plan)
+        if cache is not None:
+            key = ResultCache.key(plan, input)
+            cached = cache.get(key)
+            if cached is not None:
+                output = Output(**cached)
+                if ctx.metrics is not None:
+                    ctx.metrics.cached = True
+                    ctx.metrics.wall_seconds = perf_counter() - ctx.metrics.start
+                    output._metrics = ctx.metrics.summary()
+                ctx.phase = Phase.EXECUTED
+                return output
+
+        configurable: Dict[str, Any] = {
+            "thread_id": ctx.session_id,
+            "checkpoint_ns": plan.config.agent.id,
+            RUN_CONTEXT_KEY: ctx,
         }
+        if ctx.user_id:
+            configurable["user_id"] = ctx.user_id
+        if ctx.store is not None:
+            configurable[CONFIG_KEY_STORE] = ctx.store
+        checkpointer = plan.graph.checkpointer
+        if checkpointer is None:
+            # without a shared checkpointer the checkpoints live for the run
+            checkpointer = InMemorySaver()
+            configurable[CONFIG_KEY_CHECKPOINTER] = checkpointer
+        if ctx.recorder is not None:
+            configurable[CONFIG_KEY_CHECKPOINTER] = ctx.recorder.checkpointer(
+                checkpointer, "workflow checkpoints"
+            )
+
+        config: Dict[str, Any] = {"configurable": configurable}
+        if plan.config.max_concurrency:
+            config["max_concurrency"] = plan.config.max_concurrency
 
         inputs = {
             "workflow_input": input.dict(),
         }
-
-        state = await context.graph.ainvoke(inputs, config)
-        print(f"{state=}")
-
-        params: Dict[str, Any] = {}
-        agent = context.config.agent
-        depends = agent.get_output_depends()
-        for depend in depends:
-            param = state.get(depend)
-            if param is not None:
-                params[depend] = param
-
-        output = agent.build_output(**params)
-        print(f"output", output.dict())
-
-        context.phase = Phase.EXECUTED
+        if plan.graph.checkpointer is not None:
+            # the shared checkpointer resumes the session from the state the
+            # previous run left, start the nodes of this run afresh
+            inputs.update(
+                (name, None) for name in plan.state.model_fields if name not in inputs
+            )
+
+        agent = plan.config.agent
+        with tracer.span("workflow", agent=agent.id, session=ctx.session_id):
+            start = perf_counter()
+            state = await plan.graph.ainvoke(inputs, config)
+            if ctx.recorder is not None:
+                ctx.recorder.complete(
+                    "workflow", "workflow", start, perf_counter(), "workflow"
+                )
+            tracer.debug("final state %s", state)
+
+            params: Dict[str, Any] = {}
+            depends = agent.get_output_depends()
+            for depend in depends:
+                param = state.get(state_field(depend))
+                if param is not None:
+                    params[depend] = param
+
+            output = agent.build_output(**params)
+            tracer.debug("output %s", Lazy(output.dict))
+
+        if ctx.metrics is not None:
+            ctx.metrics.finish(agent.id, state)
+            output._metrics = ctx.metrics.summary()
+        if cache is not None:
+            cache.set(key, dict(output.dict()))
+
+        ctx.phase = Phase.EXECUTED
 
         return output
 
     @classmethod
-    def build_graph(cls, context: Context):
-        State = new_state_cls(context.nodes)
-        print(f"{State=}")
-
-        context.state = State
+    def build_graph(
+        cls,
+        nodes: List[Node],
+        edges: List[Tuple[str | Tuple[str, ...], str]],
+        conditional_edges: List[Tuple[str, Callable]],
+        *,
+        checkpointer: Checkpointer | None = None,
+    ) -> Tuple[Type[BaseModel], CompiledStateGraph]:
+        """Compile the workflow graph, returns the state class and the graph"""
+        State = new_state_cls(nodes)
 
         builder = StateGraph(State)
 
-        for node in context.nodes:
+        for node in nodes:
             builder.add_node(node.name, node)
 
-        for edge in context.edges:
-            builder.add_edge(edge[0], edge[1])
+        for source, target in edges:
+            # a tuple of sources waits for all of them, see the join node
+            builder.add_edge(
+                list(source) if isinstance(source, tuple) else source, target
+            )
+
+        for source, path in conditional_edges:
+            builder.add_conditional_edges(source, path)
 
-        for edge in context.conditional_edges:
-            builder.add_conditional_edges(**edge)
+        return State, builder.compile(checkpointer=checkpointer)
 
-        memory = MemorySaver()
-        context.graph = builder.compile(checkpointer=memory)
+    @classmethod
+    def invalidate(cls, plan: Plan):
+        """Drop the cached plan, e.g. after its workflow config changed"""
+        GraphCache.invalidate(plan.fingerprint)
+        ResultCache.invalidate(plan.fingerprint)
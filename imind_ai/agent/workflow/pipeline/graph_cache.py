@@ -0,0 +1,76 @@
+from hashlib import sha256
+from threading import Lock
+from typing import Callable, Dict
+
+from langgraph.types import Checkpointer
+
+from imind_ai.agent.config.base import Config
+from imind_ai.agent.workflow.pipeline.plan import Plan
+
+
+class GraphCache:
+    """Process-wide cache of compiled workflow plans and their graphs.
+
+    Plans are keyed by the fingerprint of the workflow config, so planning the
+    same workflow twice reuses the plan compiled the first time.
+
+    By default the graphs have no checkpointer and the checkpoints of a run
+    are dropped with it. `set_checkpointer` opts into one checkpointer shared
+    by all graphs, which keeps the checkpoints of every run under the thread
+    of its session until they are deleted.
+    """
+
+    _plans: Dict[str, Plan] = {}
+    _checkpointer: Checkpointer | None = None
+    _lock = Lock()
+
+    @classmethod
+    def fingerprint(cls, config: Config) -> str:
+        """Stable hash of a workflow config"""
+        data = config.model_dump_json(by_alias=True, exclude_none=True)
+        return sha256(data.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get(cls, fingerprint: str) -> Plan | None:
+        return cls._plans.get(fingerprint)
+
+    @classmethod
+    def get_or_build(
+        cls,
+        fingerprint: str,
+        build: Callable[[Checkpointer | None], Plan],
+    ) -> Plan:
+        """Return the cached plan, building it with `build` on a miss"""
+        plan = cls._plans.get(fingerprint)
+        if plan is not None:
+            return plan
+
+        with cls._lock:
+            plan = cls._plans.get(fingerprint)
+            if plan is None:
+                plan = build(cls._checkpointer)
+                cls._plans[fingerprint] = plan
+        return plan
+
+    @classmethod
+    def invalidate(cls, fingerprint: str | None = None) -> None:
+        """Drop one cached plan, or all of them when no fingerprint is given"""
+        with cls._lock:
+            if fingerprint is None:
+                cls._plans.clear()
+            else:
+                cls._plans.pop(fingerprint, None)
+
+    @classmethod
+    def get_checkpointer(cls) -> Checkpointer | None:
+        return cls._checkpointer
+
+    @classmethod
+    def set_checkpointer(cls, checkpointer: Checkpointer | None) -> None:
+        """Replace the shared checkpointer, `None` turns persistence off
+
+        Plans compiled against the previous checkpointer are dropped.
+        """
+        with cls._lock:
+            cls._checkpointer = checkpointer
+            cls._plans.clear()
@@ -0,0 +1,52 @@
+from typing import Dict, Iterable, List, Set
+
+
+def live_fields(
+    successors: Dict[str, List[str]],
+    uses: Dict[str, Set[str]],
+    defs: Dict[str, Set[str]],
+) -> Dict[str, Set[str]]:
+    """State fields live after each vertex of a graph, i.e. read on some
+    path leaving the vertex before being written again
+
+    Backward dataflow iterated to a fixpoint, so loops are handled.
+    """
+    vertices = set(successors) | set(uses) | set(defs)
+    for targets in successors.values():
+        vertices.update(targets)
+
+    live_in: Dict[str, Set[str]] = {vertex: set() for vertex in vertices}
+    live_out: Dict[str, Set[str]] = {vertex: set() for vertex in vertices}
+
+    changed = True
+    while changed:
+        changed = False
+        for vertex in vertices:
+            out: Set[str] = set()
+            for target in successors.get(vertex, ()):
+                out |= live_in[target]
+            inp = uses.get(vertex, set()) | (out - defs.get(vertex, set()))
+            if out != live_out[vertex] or inp != live_in[vertex]:
+                live_out[vertex] = out
+                live_in[vertex] = inp
+                changed = True
+    return live_out
+
+
+def reachable(
+    successors: Dict[str, List[str]], starts: Iterable[str], stop: Set[str]
+) -> Set[str]:
+    """Vertices reachable from `starts` without passing through `stop`"""
+    seen: Set[str] = set()
+    pending = [start for start in starts if start not in stop]
+    while pending:
+        vertex = pending.pop()
+        if vertex in seen:
+            continue
+        seen.add(vertex)
+        pending.extend(
+            target
+            for target in successors.get(vertex, ())
+            if target not in stop and target not in seen
+        )
+    return seen
@@ -1,11 +1,16 @@
 from pathlib import Path
-from turtle import setup
 from typing import Dict
 
 
 from imind_ai.agent.config.base import Config
+from imind_ai.agent.workflow.pipeline.compiler import Compiler
 from imind_ai.agent.workflow.pipeline.context import Context, Phase
+from imind_ai.agent.workflow.pipeline.graph_cache import GraphCache
 from imind_ai.utils.settings import build_settings_from_schema, update_schema
+from imind_ai.utils.tracing import get_tracer
+
+
+tracer = get_tracer(__name__)
 
 
 class Parser:
@@ -25,18 +30,38 @@ class Parser:
             config = Config.from_dict(values)
         else:
             values = values or Path("./workflow.yaml")
-            config = Config.from_file(values)
+            config = cls.load_compiled(context, values)
+            if config is None:
+                config = Config.from_file(values)
 
-        print(f"{config=}")
+        tracer.debug("config %s", config)
 
         schema = config.agent.env
         schema = update_schema(schema, env)
+        if env and context.artifact is not None:
+            # the overrides changed the config the plan is cached by
+            context.artifact.fingerprint = GraphCache.fingerprint(config)
 
         setting_cls = build_settings_from_schema(schema)
 
         settings = setting_cls()
-        print(f"{settings=}")
+        tracer.debug("settings %s", settings)
 
         context.config = config
         context.settings = settings
         context.kwargs = kwargs
+
+    @classmethod
+    def load_compiled(cls, context: Context, source: Path) -> Config | None:
+        """Config of the artifact compiled from `source`, a stale artifact is
+        recompiled, without an artifact the source is parsed as usual"""
+        path = Compiler.artifact_path(source)
+        if not path.exists():
+            return None
+
+        artifact = Compiler.load(source, path)
+        if artifact is None:
+            artifact = Compiler.compile(source, path)
+
+        context.artifact = artifact
+        return artifact.config
@@ -0,0 +1,28 @@
+from typing import Callable, Tuple, Type
+
+from langgraph.graph.state import CompiledStateGraph
+from pydantic import BaseModel, ConfigDict
+from pydantic_settings import BaseSettings
+
+from imind_ai.agent.config.base import Config
+from imind_ai.agent.workflow.graph.node import Node
+
+
+class Plan(BaseModel):
+    """Compiled plan of a workflow produced by Parser + Planner
+
+    A plan is immutable and holds no per-request data, so a single plan can be
+    shared by any number of concurrent executions. Everything that belongs to
+    one invocation lives in `RunContext` instead.
+    """
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    fingerprint: str
+    config: Config
+    settings: BaseSettings | None = None
+    nodes: Tuple[Node, ...]
+    edges: Tuple[Tuple[str | Tuple[str, ...], str], ...]
+    conditional_edges: Tuple[Tuple[str, Callable], ...]
+    state: Type[BaseModel]
+    graph: CompiledStateGraph
@@ -1,48 +1,315 @@
-from imind_ai.agent.workflow.graph.loop_aggregator import LoopAggregationNode
+import asyncio
+from typing import Callable, Dict, List, Set, Tuple
+
+from imind_ai.agent.config.base import Config
+from imind_ai.agent.config.reference import (
+    WORKFLOW_ENTITY,
+    parse_reference,
+    state_field,
+)
+from imind_ai.agent.workflow.graph.fan_out import FanOut
+from imind_ai.agent.workflow.graph.join import JoinNode
+from imind_ai.agent.workflow.graph.node import Node
+from imind_ai.agent.workflow.graph.registry import NODE_TYPES
 from imind_ai.agent.workflow.pipeline.context import Context, Phase
 from imind_ai.agent.workflow.graph.condition import ConditionNode
 from imind_ai.agent.workflow.graph.base_agent import BaseAgentNode
+from imind_ai.agent.workflow.pipeline.executor import Executor
+from imind_ai.agent.workflow.pipeline.graph_cache import GraphCache
+from imind_ai.agent.workflow.pipeline.liveness import live_fields, reachable
+from imind_ai.agent.workflow.pipeline.plan import Plan
 
-from langgraph.graph import START
+from langgraph.graph import END, START
+from langgraph.types import Checkpointer
 
 
 class Planner:
 
     @classmethod
-    def plan(cls, context: Context):
+    def plan(cls, context: Context) -> Plan:
+        """Plan the parsed workflow of the context
+
+        Planning is done once per workflow config, later calls with the same
+        config return the cached plan.
+        """
         context.phase = Phase.PLANNING
 
+        artifact = context.artifact
+        if artifact is not None and artifact.config is context.config:
+            fingerprint = artifact.fingerprint
+        else:
+            fingerprint = GraphCache.fingerprint(context.config)
+
+        plan = GraphCache.get_or_build(
+            fingerprint,
+            lambda checkpointer: cls.build_plan(context, fingerprint, checkpointer),
+        )
+
+        context.plan = plan
+        context.phase = Phase.PLANNED
+
+        return plan
+
+    @classmethod
+    async def prewarm(cls, plan: Plan):
+        """Connect the MCP servers and build the agents of MCP nodes ahead of
+        the first request"""
+        await asyncio.gather(
+            *[
+                node.build_agent()
+                for node in plan.nodes
+                if isinstance(node, BaseAgentNode) and node.config.mcp is not None
+            ]
+        )
+
+    @classmethod
+    def build_plan(
+        cls, context: Context, fingerprint: str, checkpointer: Checkpointer | None
+    ) -> Plan:
         config = context.config
 
-        for idx, item in enumerate(config.nodes):
-            # if idx == 0:
-            #     context.edges.append((START, item.name))
-
-            if item.type == "base_agent":
-                node = BaseAgentNode(item, context)
-                context.nodes.append(node)
-                if item.prev == "__start__":
-                    context.edges.append((START, item.name))
-                if item.next_type is None or item.next_type != "condition":
-                    next = item.next
-                    if isinstance(next, list):
-                        for n in next:
-                            context.edges.append((item.name, n))
-                    elif isinstance(next, str):
-                        context.edges.append((item.name, next))
-
-            elif item.type == "loop_aggregation":
-                node = LoopAggregationNode(item, context)
-                context.nodes.append(node)
-                if item.next_type is None or item.next_type != "condition":
-                    next = item.next
-                    if isinstance(next, list):
-                        for n in next:
-                            context.edges.append((item.name, n))
-                    elif isinstance(next, str):
-                        context.edges.append((item.name, next))
-
-            elif item.type == "condition":
-                node = ConditionNode(item, context)
-                print(node)
-                context.conditional_edges.append({"source": node.prev, "path": node})
+        nodes: List[Node] = []
+        edges: List[Tuple[str | Tuple[str, ...], str]] = []
+        conditional_edges: List[Tuple[str, Callable]] = []
+        condition_nodes: List[ConditionNode] = []
+        successors: Dict[str, List[str]] = {}
+
+        for item in config.nodes:
+            node_cls = NODE_TYPES.get(item.type)
+            if node_cls is None:
+                continue
+
+            node = node_cls(item)
+            if node.conditional:
+                condition_nodes.append(node)
+                conditional_edges.append((node.prev, node))
+                continue
+
+            nodes.append(node)
+            if getattr(item, "prev", None) == START:
+                edges.append((START, item.name))
+
+            if getattr(item, "next_type", None) != "condition":
+                next = getattr(item, "next", None)
+                if isinstance(next, list):
+                    successors[item.name] = list(next)
+                elif isinstance(next, str):
+                    successors[item.name] = [next]
+
+        edges.extend(cls.plan_fan_outs(nodes, condition_nodes, successors))
+
+        cls.validate_references(config, nodes + condition_nodes)
+
+        if config.cache is not None:
+            for node in nodes:
+                if isinstance(node, BaseAgentNode):
+                    node.workflow_cached = True
+                    # agents of MCP nodes are checked once they are built
+                    if node.agent is not None:
+                        node.check_cache(node.agent)
+
+        if config.prune_state:
+            cls.plan_state_pruning(config, nodes, condition_nodes, edges)
+
+        State, graph = Executor.build_graph(
+            nodes, edges, conditional_edges, checkpointer=checkpointer
+        )
+
+        return Plan(
+            fingerprint=fingerprint,
+            config=config,
+            settings=context.settings,
+            nodes=tuple(nodes),
+            edges=tuple(edges),
+            conditional_edges=tuple(conditional_edges),
+            state=State,
+            graph=graph,
+        )
+
+    @classmethod
+    def plan_fan_outs(
+        cls,
+        nodes: List[Node],
+        condition_nodes: List[ConditionNode],
+        successors: Dict[str, List[str]],
+    ) -> List[Tuple[str | Tuple[str, ...], str]]:
+        """Edges between the nodes, the branches of a list `next` share a
+        `FanOut` and a join node gets one edge waiting for all of its sources"""
+        by_name = {node.name: node for node in nodes}
+        sources = {node.name: node for node in [*nodes, *condition_nodes]}
+
+        groups: Dict[str, List[str]] = {
+            source: targets
+            for source, targets in successors.items()
+            if len(targets) > 1
+        }
+        for node in condition_nodes:
+            # a condition starts the branches of the list it routes to
+            targets: List[str] = []
+            for _, next in node.branches:
+                if isinstance(next, list) and len(next) > 1:
+                    targets.extend(n for n in next if n not in targets)
+            if targets:
+                groups[node.name] = targets
+
+        for source, targets in groups.items():
+            config = sources[source].config
+            fan_out = FanOut(
+                config.id,
+                [by_name[target].id for target in targets if target in by_name],
+                config.max_concurrency,
+            )
+            for target in targets:
+                node = by_name.get(target)
+                if node is None:
+                    continue
+                if node.fan_out is not None and node.fan_out.source != fan_out.source:
+                    raise ValueError(
+                        f"节点{node.id}同时属于{node.fan_out.source}和{source}的并行分支"
+                    )
+                node.fan_out = fan_out
+
+        edges: List[Tuple[str | Tuple[str, ...], str]] = []
+        join_sources: Dict[str, List[str]] = {}
+        for source, targets in successors.items():
+            for target in targets:
+                if isinstance(by_name.get(target), JoinNode):
+                    join_sources.setdefault(target, []).append(source)
+                else:
+                    edges.append((source, target))
+
+        for name, names in join_sources.items():
+            join = by_name[name]
+            join.branches = [by_name[source] for source in names]
+            edges.append((tuple(names) if len(names) > 1 else names[0], name))
+
+            fan_outs = {id(branch.fan_out) for branch in join.branches}
+            fan_out = join.branches[0].fan_out
+            if fan_out is not None and len(fan_outs) == 1:
+                join.joined = fan_out
+                fan_out.wait = join.config.wait
+                fan_out.k = {
+                    "all": len(fan_out.branches),
+                    "any": 1,
+                    "first_k": join.config.k,
+                }[join.config.wait]
+
+        return edges
+
+    @classmethod
+    def plan_state_pruning(
+        cls,
+        config: Config,
+        nodes: List[Node],
+        condition_nodes: List[ConditionNode],
+        edges: List[Tuple[str | Tuple[str, ...], str]],
+    ):
+        """Liveness of the state fields over the graph: every node drops the
+        writes no later node, condition or the workflow output reads, and
+        clears the fields that are dead once it runs
+
+        Nodes that may run in parallel with others only drop the fields
+        nothing reads at all and clear none, a field dead on the path of one
+        branch may still be read by another.
+        """
+        successors: Dict[str, List[str]] = {}
+        for source, target in edges:
+            for name in source if isinstance(source, tuple) else (source,):
+                successors.setdefault(name, []).append(target)
+
+        branches = [
+            target
+            for targets in successors.values()
+            if len(targets) > 1
+            for target in targets
+        ]
+
+        uses: Dict[str, Set[str]] = {
+            END: {
+                parse_reference(ref).field
+                for ref in config.agent.get_output_references()
+            }
+        }
+        defs: Dict[str, Set[str]] = {START: {state_field(WORKFLOW_ENTITY)}}
+
+        for node in condition_nodes:
+            targets: List[str] = []
+            for next in [
+                *(next for _, next in node.branches),
+                node.config.else_express,
+            ]:
+                if isinstance(next, list):
+                    targets.extend(next)
+                    if len(next) > 1:
+                        branches.extend(next)
+                elif next is not None:
+                    targets.append(next)
+            successors.setdefault(node.prev, []).append(node.name)
+            successors[node.name] = targets
+            uses[node.name] = node.state_reads()
+
+        for node in nodes:
+            uses[node.name] = node.state_reads()
+            defs[node.name] = node.state_writes()
+            # the run ends after a node without next nodes
+            successors.setdefault(node.name, [END])
+
+        live_out = live_fields(successors, uses, defs)
+        read = set().union(*uses.values())
+        joins = {node.name for node in nodes if isinstance(node, JoinNode)}
+        parallel = reachable(successors, branches, joins | {END})
+
+        predecessors: Dict[str, List[str]] = {}
+        for source, targets in successors.items():
+            for target in targets:
+                predecessors.setdefault(target, []).append(source)
+
+        for node in nodes:
+            writes = defs[node.name]
+            if node.name in parallel:
+                node.drops = writes - read
+                node.clears = set()
+                continue
+
+            live = live_out[node.name]
+            node.drops = writes - live
+            live_before = set().union(
+                *(live_out[source] for source in predecessors.get(node.name, []))
+            )
+            # the workflow input is a required field of the state
+            node.clears = live_before - live - writes - defs[START]
+
+    @classmethod
+    def validate_references(cls, config: Config, nodes: List[Node]):
+        """Check that every reference points to the workflow input or to an
+        existing output of a node"""
+        outputs: Dict[str, Set[str] | None] = {
+            WORKFLOW_ENTITY: set(config.agent.input),
+        }
+        for node in nodes:
+            outputs[node.id] = node.output_fields()
+
+        errors: List[str] = []
+
+        def check(owner: str, ref: str):
+            reference = parse_reference(ref)
+            if reference.entity not in outputs:
+                errors.append(f"{owner}: {ref} 引用的节点{reference.entity}不存在")
+                return
+
+            fields = outputs[reference.entity]
+            if fields is None or not reference.path:
+                return
+            if reference.path[0][0] not in fields:
+                errors.append(
+                    f"{owner}: {ref} 引用的字段不存在, 可选: {', '.join(sorted(fields))}"
+                )
+
+        for ref in config.agent.get_output_references():
+            check(WORKFLOW_ENTITY, ref)
+        for node in nodes:
+            for ref in node.get_references():
+                check(node.id, ref)
+
+        if errors:
+            raise ValueError("引用校验失败:\n" + "\n".join(errors))
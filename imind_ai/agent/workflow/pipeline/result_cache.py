@@ -0,0 +1,54 @@
+from threading import Lock
+from typing import Dict
+
+from imind_ai.agent.config.schema import Input
+from imind_ai.agent.workflow.pipeline.plan import Plan
+from imind_ai.utils.cache import Cache, cache_key, canonicalize, create_cache
+
+
+class ResultCache:
+    """Process-wide caches of workflow outputs, enabled by `cache:` in the
+    workflow config
+
+    Outputs are keyed by the fingerprint of the workflow config and the
+    canonicalized workflow input, so editing the workflow never serves stale
+    outputs. The graph is skipped on a hit, so the planner rejects workflows
+    with multi-turn agents, see `BaseAgentNode.check_cache`.
+    """
+
+    _caches: Dict[str, Cache] = {}
+    _lock = Lock()
+
+    @classmethod
+    def get_cache(cls, plan: Plan) -> Cache | None:
+        config = plan.config.cache
+        if config is None:
+            return None
+
+        cache = cls._caches.get(plan.fingerprint)
+        if cache is None:
+            with cls._lock:
+                cache = cls._caches.get(plan.fingerprint)
+                if cache is None:
+                    cache = create_cache(
+                        "workflow_result", config.backend, **config.options()
+                    )
+                    cls._caches[plan.fingerprint] = cache
+        return cache
+
+    @classmethod
+    def key(cls, plan: Plan, input: Input) -> str:
+        return cache_key(plan.fingerprint, canonicalize(input.dict()))
+
+    @classmethod
+    def invalidate(cls, fingerprint: str | None = None) -> None:
+        """Drop the cache of one workflow, or all of them
+
+        Keys include the config fingerprint, so this frees memory rather than
+        stale outputs, SQLite entries stay until they expire or are evicted.
+        """
+        with cls._lock:
+            if fingerprint is None:
+                cls._caches.clear()
+            else:
+                cls._caches.pop(fingerprint, None)
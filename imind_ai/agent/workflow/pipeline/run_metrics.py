@@ -0,0 +1,251 @@
+from time import perf_counter
+from typing import Any, Dict, List
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from imind_ai.utils.metrics import BYTES_BUCKETS, TOKENS_BUCKETS, registry
+
+
+serde = JsonPlusSerializer()
+
+run_seconds = registry.histogram(
+    "workflow_run_seconds", "wall time of workflow runs", labelnames=("agent",)
+)
+node_seconds = registry.histogram(
+    "workflow_node_seconds",
+    "wall time of workflow nodes per run",
+    labelnames=("agent", "node", "type"),
+)
+node_llm_seconds = registry.histogram(
+    "workflow_node_llm_seconds",
+    "time spent in LLM calls per node and run",
+    labelnames=("agent", "node"),
+)
+node_tool_seconds = registry.histogram(
+    "workflow_node_tool_seconds",
+    "time spent in tool calls per node and run",
+    labelnames=("agent", "node"),
+)
+node_tokens = registry.histogram(
+    "workflow_node_tokens",
+    "LLM tokens per node and run",
+    buckets=TOKENS_BUCKETS,
+    labelnames=("agent", "node", "kind"),
+)
+node_state_bytes = registry.histogram(
+    "workflow_node_state_bytes",
+    "serialized size of the state updates written by a node per run",
+    buckets=BYTES_BUCKETS,
+    labelnames=("agent", "node"),
+)
+run_state_bytes = registry.histogram(
+    "workflow_state_bytes",
+    "serialized size of the final workflow state",
+    buckets=BYTES_BUCKETS,
+    labelnames=("agent",),
+)
+run_pruned_bytes = registry.histogram(
+    "workflow_pruned_state_bytes",
+    "serialized size of the dead state fields kept out of the state per run",
+    buckets=BYTES_BUCKETS,
+    labelnames=("agent",),
+)
+
+
+def state_size(values: Any) -> int:
+    """Size of values as written by the checkpointer"""
+    try:
+        return len(serde.dumps_typed(values)[1])
+    except Exception:
+        return 0
+
+
+class NodeStats:
+    """Measurements of one node during one run, summed over its executions"""
+
+    __slots__ = (
+        "node",
+        "type",
+        "calls",
+        "wall_seconds",
+        "llm_seconds",
+        "tool_seconds",
+        "llm_calls",
+        "tool_calls",
+        "tool_iterations",
+        "prompt_tokens",
+        "completion_tokens",
+        "state_bytes",
+        "cache_hits",
+        "llm_cache_hits",
+        "pruned_bytes",
+    )
+
+    def __init__(self, node: str, type: str):
+        self.node = node
+        self.type = type
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.llm_seconds = 0.0
+        self.tool_seconds = 0.0
+        self.llm_calls = 0
+        self.tool_calls = 0
+        self.tool_iterations = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.state_bytes = 0
+        self.cache_hits = 0
+        self.llm_cache_hits = 0
+        # serialized size of the writes and fields pruned from the state,
+        # only measured in runs with metrics
+        self.pruned_bytes = 0
+
+    def dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class RunMetrics:
+    """Per-node measurements of one workflow run"""
+
+    def __init__(self):
+        self.nodes: Dict[str, NodeStats] = {}
+        self.fan_outs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.wall_seconds = 0.0
+        self.state_bytes = 0
+        self.pruned_bytes = 0
+        # answered from the result cache without running the graph
+        self.cached = False
+        self.start = perf_counter()
+
+    def node(self, node: str, type: str) -> NodeStats:
+        stats = self.nodes.get(node)
+        if stats is None:
+            stats = self.nodes.setdefault(node, NodeStats(node, type))
+        return stats
+
+    def fan_out(self, source: str) -> Dict[str, Dict[str, Any]]:
+        """Timings of the branches started by `source`"""
+        return self.fan_outs.setdefault(source, {})
+
+    def finish(self, agent: str, state: Any = None) -> None:
+        """Stop the run clock and record the run in the process-wide histograms"""
+        self.wall_seconds = perf_counter() - self.start
+        if state is not None:
+            self.state_bytes = state_size(state)
+            run_state_bytes.observe(self.state_bytes, agent=agent)
+        self.pruned_bytes = sum(stats.pruned_bytes for stats in self.nodes.values())
+        run_pruned_bytes.observe(self.pruned_bytes, agent=agent)
+        run_seconds.observe(self.wall_seconds, agent=agent)
+
+        for stats in self.nodes.values():
+            node_seconds.observe(
+                stats.wall_seconds, agent=agent, node=stats.node, type=stats.type
+            )
+            node_state_bytes.observe(stats.state_bytes, agent=agent, node=stats.node)
+            if stats.llm_calls:
+                node_llm_seconds.observe(
+                    stats.llm_seconds, agent=agent, node=stats.node
+                )
+                node_tokens.observe(
+                    stats.prompt_tokens, agent=agent, node=stats.node, kind="prompt"
+                )
+                node_tokens.observe(
+                    stats.completion_tokens,
+                    agent=agent,
+                    node=stats.node,
+                    kind="completion",
+                )
+            if stats.tool_calls:
+                node_tool_seconds.observe(
+                    stats.tool_seconds, agent=agent, node=stats.node
+                )
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "cached": self.cached,
+            "wall_seconds": self.wall_seconds,
+            "state_bytes": self.state_bytes,
+            "pruned_bytes": self.pruned_bytes,
+            "nodes": {node: stats.dict() for node, stats in self.nodes.items()},
+            "fan_outs": self.fan_outs,
+        }
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Collect LLM and tool timings and token usage of an agent into the
+    stats of its node"""
+
+    # called in the task of the agent, not in a thread pool
+    run_inline = True
+
+    def __init__(self, stats: NodeStats):
+        self.stats = stats
+        self._starts: Dict[UUID, float] = {}
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: List[Any], *, run_id: UUID, **kwargs
+    ) -> None:
+        self._starts[run_id] = perf_counter()
+
+    def on_llm_start(
+        self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs
+    ) -> None:
+        self._starts[run_id] = perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs) -> None:
+        self._end_llm(run_id)
+        prompt_tokens, completion_tokens = 0, 0
+        for generations in response.generations:
+            for generation in generations:
+                if not isinstance(generation, ChatGeneration):
+                    continue
+                if generation.message.response_metadata.get("cached"):
+                    # answered by the LLM cache, no tokens were spent
+                    self.stats.llm_cache_hits += 1
+                    continue
+                usage = generation.message.usage_metadata
+                if usage:
+                    prompt_tokens += usage.get("input_tokens", 0)
+                    completion_tokens += usage.get("output_tokens", 0)
+        if not prompt_tokens and not completion_tokens and response.llm_output:
+            usage = response.llm_output.get("token_usage") or {}
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+        self.stats.prompt_tokens += prompt_tokens
+        self.stats.completion_tokens += completion_tokens
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        self._end_llm(run_id)
+
+    def _end_llm(self, run_id: UUID) -> None:
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            self.stats.llm_seconds += perf_counter() - start
+        self.stats.llm_calls += 1
+
+    def on_tool_start(
+        self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs
+    ) -> None:
+        self._starts[run_id] = perf_counter()
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs) -> None:
+        self._end_tool(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        self._end_tool(run_id)
+
+    def _end_tool(self, run_id: UUID) -> None:
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            self.stats.tool_seconds += perf_counter() - start
+        self.stats.tool_calls += 1
+
+    def on_chain_start(
+        self, serialized: Dict[str, Any], inputs: Any, *, run_id: UUID, **kwargs
+    ) -> None:
+        # one execution of the tools node of the agent graph is one tool loop
+        if kwargs.get("name") == "tools":
+            self.stats.tool_iterations += 1
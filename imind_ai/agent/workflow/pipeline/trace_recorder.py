@@ -0,0 +1,258 @@
+import json
+import os
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+
+
+class TraceRecorder:
+    """Records a workflow run as Chrome trace events, viewable in Perfetto
+    or chrome://tracing
+
+    Opt-in per run through `RunContext.recorder`. Every workflow node gets
+    its own track, with the steps, LLM calls and tool calls of its agent
+    nested in it. Checkpoint writes go to separate tracks because langgraph
+    writes them in the background.
+    """
+
+    def __init__(self):
+        self.origin = perf_counter()
+        self.pid = os.getpid()
+        self.events: List[Dict[str, Any]] = []
+        self._tracks: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def track(self, name: str) -> int:
+        tid = self._tracks.get(name)
+        if tid is None:
+            with self._lock:
+                tid = self._tracks.get(name)
+                if tid is None:
+                    tid = self._tracks[name] = len(self._tracks) + 1
+                    self.events.append(
+                        {
+                            "name": "thread_name",
+                            "ph": "M",
+                            "pid": self.pid,
+                            "tid": tid,
+                            "args": {"name": name},
+                        }
+                    )
+        return tid
+
+    def complete(
+        self,
+        name: str,
+        track: str,
+        start: float,
+        end: float,
+        cat: str,
+        args: Dict[str, Any] | None = None,
+    ) -> None:
+        """Add a span, `start` and `end` are `perf_counter` values"""
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (start - self.origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": self.pid,
+            "tid": self.track(track),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def callback_handler(self, track: str) -> "RecorderCallbackHandler":
+        return RecorderCallbackHandler(self, track)
+
+    def checkpointer(
+        self, checkpointer: BaseCheckpointSaver, track: str
+    ) -> "RecordingCheckpointer":
+        return RecordingCheckpointer(checkpointer, self, track)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+    def save(self, path: str | Path) -> None:
+        Path(path).write_text(json.dumps(self.to_dict(), default=str), "utf-8")
+
+
+class RecorderCallbackHandler(BaseCallbackHandler):
+    """Records the graph steps, LLM calls and tool calls of an agent"""
+
+    run_inline = True
+
+    def __init__(self, recorder: TraceRecorder, track: str):
+        self.recorder = recorder
+        self.track = track
+        self._starts: Dict[UUID, tuple] = {}
+
+    def _start(self, run_id: UUID, name: str, cat: str) -> None:
+        self._starts[run_id] = (name, cat, perf_counter())
+
+    def _end(self, run_id: UUID, error: BaseException | None = None) -> None:
+        started = self._starts.pop(run_id, None)
+        if started is None:
+            return
+        name, cat, start = started
+        args = {"error": repr(error)} if error is not None else None
+        self.recorder.complete(name, self.track, start, perf_counter(), cat, args)
+
+    def on_chain_start(
+        self,
+        serialized: Dict[str, Any],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ) -> None:
+        # only the nodes of the agent graph, not the runnables inside them
+        name = kwargs.get("name")
+        if name is not None and (metadata or {}).get("langgraph_node") == name:
+            self._start(run_id, name, "agent")
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        self._end(run_id, error)
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: List[Any], *, run_id: UUID, **kwargs
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name") or "llm"
+        self._start(run_id, name, "llm")
+
+    def on_llm_start(
+        self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name") or "llm"
+        self._start(run_id, name, "llm")
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs) -> None:
+        self._end(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        self._end(run_id, error)
+
+    def on_tool_start(
+        self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self._start(run_id, name, "tool")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        self._end(run_id, error)
+
+
+class RecordingCheckpointer(BaseCheckpointSaver):
+    """Delegates to a checkpointer and records the duration of its writes"""
+
+    def __init__(
+        self, checkpointer: BaseCheckpointSaver, recorder: TraceRecorder, track: str
+    ):
+        super().__init__(serde=checkpointer.serde)
+        self.checkpointer = checkpointer
+        self.recorder = recorder
+        self.track = track
+
+    @property
+    def config_specs(self) -> list:
+        return self.checkpointer.config_specs
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return self.checkpointer.get_tuple(config)
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await self.checkpointer.aget_tuple(config)
+
+    def list(self, config: RunnableConfig | None, **kwargs) -> Iterator:
+        return self.checkpointer.list(config, **kwargs)
+
+    def alist(self, config: RunnableConfig | None, **kwargs):
+        return self.checkpointer.alist(config, **kwargs)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        start = perf_counter()
+        try:
+            return self.checkpointer.put(config, checkpoint, metadata, new_versions)
+        finally:
+            self._record("put", start, {"step": metadata.get("step")})
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        start = perf_counter()
+        try:
+            return await self.checkpointer.aput(
+                config, checkpoint, metadata, new_versions
+            )
+        finally:
+            self._record("put", start, {"step": metadata.get("step")})
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        start = perf_counter()
+        try:
+            self.checkpointer.put_writes(config, writes, task_id, task_path)
+        finally:
+            self._record("put_writes", start, {"writes": len(writes)})
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        start = perf_counter()
+        try:
+            await self.checkpointer.aput_writes(config, writes, task_id, task_path)
+        finally:
+            self._record("put_writes", start, {"writes": len(writes)})
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.checkpointer.delete_thread(thread_id)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.checkpointer.adelete_thread(thread_id)
+
+    def get_next_version(self, current: Any, channel: None) -> Any:
+        return self.checkpointer.get_next_version(current, channel)
+
+    def _record(self, name: str, start: float, args: Dict[str, Any]) -> None:
+        self.recorder.complete(
+            name, self.track, start, perf_counter(), "checkpoint", args
+        )
@@ -1,5 +1,7 @@
+import json
+from hashlib import sha256
 from pathlib import Path
-from typing import Any, Dict, Type, Union
+from typing import Any, Dict, Optional, Tuple, Type, Union
 from pydantic import BaseModel, Field, create_model
 import yaml
 
@@ -39,7 +41,8 @@ def read_yaml(file_path: Path, encoding: str = "utf-8") -> Dict:
     if not file_path.exists():
         return {}
     with open(file_path, "r", encoding=encoding) as file:
-        return yaml.safe_load(file)
+        # the libyaml loader is an order of magnitude faster where available
+        return yaml.load(file, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
 
 
 type_mapping = {
@@ -59,52 +62,79 @@ type_mapping = {
 }
 
 
+FieldSpec = Tuple[str, bool, Any, Optional[str], Optional[str]]
+
+
+def field_spec(value: Union[BaseModel, Dict]) -> FieldSpec:
+    """(type, required, default, description, alias) of a schema entry"""
+    if isinstance(value, BaseModel):
+        required = value.required is None or value.required
+        return (
+            value.type,
+            required,
+            value.default,
+            value.description,
+            getattr(value, "alias", None),
+        )
+
+    required = value.get("required", True)
+    return (
+        value["type"],
+        required,
+        value.get("default", None) if required else None,
+        value.get("description", None),
+        value.get("alias", None),
+    )
+
+
+def schema_fingerprint(schema: Dict[str, Union[BaseModel, Dict]]) -> str:
+    """Stable hash of the fields a schema defines"""
+    specs = {key: field_spec(value) for key, value in schema.items()}
+    data = json.dumps(specs, sort_keys=True, ensure_ascii=False, default=str)
+    return sha256(data.encode("utf-8")).hexdigest()
+
+
+# models by schema fingerprint, equal schemas share one model class
+_dynamic_models: Dict[str, Type[BaseModel]] = {}
+
+
 def create_dynamic_model(schema: Dict[str, Union[BaseModel, Dict]]) -> Type[BaseModel]:
+    fingerprint = schema_fingerprint(schema)
+    model = _dynamic_models.get(fingerprint)
+    if model is None:
+        model = _dynamic_models.setdefault(fingerprint, build_dynamic_model(schema))
+    return model
+
+
+def build_dynamic_model(schema: Dict[str, Union[BaseModel, Dict]]) -> Type[BaseModel]:
     schema_dict = {}
     for key, value in schema.items():
-        if isinstance(value, BaseModel):
-            alias = value.alias if hasattr(value, "alias") else None
-            description = value.description
-            if value.required is None or value.required:
-                if value.default is not None:
-                    schema_dict[key] = (
-                        type_mapping[value.type],
-                        Field(
-                            description=description, default=value.default, alias=alias
-                        ),
-                    )
-                else:
-                    schema_dict[key] = (
-                        type_mapping[value.type],
-                        Field(description=description, alias=alias),
-                    )
-            else:
+        type_, required, default, description, alias = field_spec(value)
+        if required:
+            if default is not None:
                 schema_dict[key] = (
-                    type_mapping[value.type] | None,
-                    Field(description=description, default=value.default, alias=alias),
+                    type_mapping[type_],
+                    Field(description=description, default=default, alias=alias),
                 )
-        else:
-            alias = value.get("alias", None)
-            description = value.get("description", None)
-            required = value.get("required", True)
-            default = value.get("default", None)
-            if required:
-                if default is None:
-                    schema_dict[key] = (
-                        type_mapping[value["type"]],
-                        Field(description=description, alias=alias),
-                    )
-                else:
-                    schema_dict[key] = (
-                        type_mapping[value["type"]],
-                        Field(description=description, default=default, alias=alias),
-                    )
             else:
                 schema_dict[key] = (
-                    type_mapping[value["type"]] | None,
-                    Field(description=description, default=None, alias=alias),
+                    type_mapping[type_],
+                    Field(description=description, alias=alias),
                 )
+        else:
+            schema_dict[key] = (
+                type_mapping[type_] | None,
+                Field(description=description, default=default, alias=alias),
+            )
 
     DynamicModel: Type[BaseModel] = create_model("DynamicModel", **schema_dict)
 
     return DynamicModel
+
+
+def clear_schema_caches() -> None:
+    """Forget the memoized dynamic models and settings classes"""
+    from imind_ai.utils import settings
+
+    _dynamic_models.clear()
+    settings.clear_settings_caches()
@@ -0,0 +1,287 @@
+import inspect
+import json
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import OrderedDict
+from hashlib import sha256
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Set, Tuple, Type
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from imind_ai.utils.metrics import registry
+
+
+serde = JsonPlusSerializer()
+
+
+def canonicalize(value: Any) -> Any:
+    """Normalized copy of a JSON-like value: NFC strings without surrounding
+    whitespace, so equivalent inputs get the same cache key"""
+    if isinstance(value, str):
+        return unicodedata.normalize("NFC", value).strip()
+    if isinstance(value, dict):
+        return {str(key): canonicalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(item) for item in value]
+    return value
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable hash of JSON-like parts"""
+    data = json.dumps(
+        parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return sha256(data.encode("utf-8")).hexdigest()
+
+
+class Cache:
+    """Key/value cache with expiry and LRU eviction
+
+    Backends implement `_get`, `_set`, `delete`, `clear` and `__len__`, hits,
+    misses and evictions are counted in the metrics registry as
+    `<name>_cache_hits_total` and so on.
+    """
+
+    def __init__(self, name: str, ttl: float | None = None, max_entries: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = registry.counter(
+            f"{name}_cache_hits_total", f"hits of the {name} cache"
+        )
+        self.misses = registry.counter(
+            f"{name}_cache_misses_total", f"misses of the {name} cache"
+        )
+        self.evictions = registry.counter(
+            f"{name}_cache_evictions_total", f"entries evicted from the {name} cache"
+        )
+
+    def get(self, key: str) -> Any | None:
+        """Cached value, None when missing or expired"""
+        value = self._get(key)
+        if value is None:
+            self.misses.inc()
+        else:
+            self.hits.inc()
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """Store a value, expiring after `ttl` seconds or the cache TTL"""
+        ttl = ttl if ttl is not None else self.ttl
+        self._set(key, value, time.time() + ttl if ttl else None)
+
+    def _get(self, key: str) -> Any | None:
+        raise NotImplementedError
+
+    def _set(self, key: str, value: Any, expires: float | None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCache(Cache):
+    """In-process LRU cache, bounded by entries and optionally serialized bytes
+
+    Values are stored serialized, every read returns a new copy so callers
+    can not change the cached value.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float | None = None,
+        max_entries: int = 1024,
+        max_bytes: int | None = None,
+    ):
+        super().__init__(name, ttl, max_entries)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        # key -> (expires, type, data), least recently used first
+        self._entries: OrderedDict[str, Tuple[float | None, str, bytes]] = OrderedDict()
+        self._lock = Lock()
+
+    def _get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, type_, data = entry
+            if expires is not None and expires <= time.time():
+                del self._entries[key]
+                self.bytes -= len(data)
+                return None
+            self._entries.move_to_end(key)
+        return serde.loads_typed((type_, data))
+
+    def _set(self, key: str, value: Any, expires: float | None) -> None:
+        type_, data = serde.dumps_typed(value)
+        if self.max_bytes and len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= len(previous[2])
+            self._entries[key] = (expires, type_, data)
+            self.bytes += len(data)
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes and self.bytes > self.max_bytes
+            ):
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions.inc()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= len(entry[2])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(Cache):
+    """Cache in a local SQLite file, shared by the processes of a host
+
+    Values are serialized with the langgraph checkpoint serializer, the least
+    recently read entries are evicted past `max_entries`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float | None = None,
+        max_entries: int = 1024,
+        path: str | Path = ".cache/imind.sqlite",
+    ):
+        super().__init__(name, ttl, max_entries)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.table = "cache_" + re.sub(r"\W", "_", name)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, type TEXT, value BLOB, expires REAL, accessed REAL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table}_accessed "
+            f"ON {self.table} (accessed)"
+        )
+
+    def _get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT type, value, expires FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[2] is not None and row[2] <= now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key)
+            )
+        return serde.loads_typed((row[0], row[1]))
+
+    def _set(self, key: str, value: Any, expires: float | None) -> None:
+        type_, data = serde.dumps_typed(value)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?, ?)",
+                (key, type_, data, expires, time.time()),
+            )
+            (count,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM {self.table}"
+            ).fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM "
+                    f"{self.table} ORDER BY accessed LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                self.evictions.inc(count - self.max_entries)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[
+                0
+            ]
+
+
+CACHE_BACKENDS: Dict[str, Type[Cache]] = {
+    "memory": MemoryCache,
+    "sqlite": SQLiteCache,
+}
+
+
+def register_cache_backend(backend: str, cls: Type[Cache]) -> None:
+    """Register a cache class for `backend:` in cache configs"""
+    CACHE_BACKENDS[backend] = cls
+
+
+def create_cache(name: str, backend: str = "memory", **options: Any) -> Cache:
+    cls = CACHE_BACKENDS.get(backend)
+    if cls is None:
+        raise ValueError(f"不支持的缓存类型: {backend}")
+    return cls(name, **options)
+
+
+def backend_options(backend: str) -> Set[str] | None:
+    """Options taken by the class of a backend besides the cache name, None
+    when it takes any keyword"""
+    cls = CACHE_BACKENDS.get(backend)
+    if cls is None:
+        raise ValueError(f"不支持的缓存类型: {backend}")
+    parameters = list(inspect.signature(cls.__init__).parameters.values())[2:]
+    if any(parameter.kind is parameter.VAR_KEYWORD for parameter in parameters):
+        return None
+    return {parameter.name for parameter in parameters}
+
+
+_shared: Dict[str, Cache] = {}
+_shared_lock = Lock()
+
+
+def shared_cache(name: str, backend: str = "memory", **options: Any) -> Cache:
+    """The process-wide cache with these settings, created on first use
+
+    Lets caches outlive the objects using them, e.g. the nodes of a plan
+    rebuilt after its workflow changed.
+    """
+    key = cache_key(name, backend, options)
+    cache = _shared.get(key)
+    if cache is None:
+        with _shared_lock:
+            cache = _shared.get(key)
+            if cache is None:
+                cache = _shared[key] = create_cache(name, backend, **options)
+    return cache
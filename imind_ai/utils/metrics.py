@@ -0,0 +1,224 @@
+import os
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock, Thread
+from time import perf_counter
+from typing import Dict, Iterator, List, Sequence, Tuple, Union
+
+
+class Counter:
+    """Monotonically increasing counter"""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self.value: float = 0
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Timer:
+    """Accumulated duration and number of timed sections"""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self.count: int = 0
+        self.total: float = 0.0
+        self._lock = Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start)
+
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+BYTES_BUCKETS: Tuple[float, ...] = tuple(float(2**i) for i in range(8, 25, 2))
+
+TOKENS_BUCKETS: Tuple[float, ...] = (16, 64, 256, 1024, 4096, 16384, 65536)
+
+
+class Histogram:
+    """Bucketed distribution of observed values, optionally split by labels
+
+    Buckets are upper bounds, the `+Inf` bucket is implicit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        labelnames: Sequence[str] = (),
+    ):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # label values -> (bucket counts, sum, count)
+        self.series: Dict[Tuple[str, ...], Tuple[List[int], float, int]] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts, total, count = series
+            counts[index] += 1
+            self.series[key] = (counts, total + value, count + 1)
+
+
+Metric = Union[Counter, Timer, Histogram]
+
+
+class MetricsRegistry:
+    """In-process registry of named metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = Lock()
+
+    def _get(self, cls: type, name: str, description: str, **kwargs) -> Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(
+                    name, cls(name, description, **kwargs)
+                )
+        if not isinstance(metric, cls):
+            raise ValueError(f"metric {name} is already registered as another type")
+        return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        """Get the counter with the given name, creating it on first use"""
+        return self._get(Counter, name, description)
+
+    def timer(self, name: str, description: str = "") -> Timer:
+        """Get the timer with the given name, creating it on first use"""
+        return self._get(Timer, name, description)
+
+    def histogram(
+        self,
+        name: str,
+        description: str = "",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        labelnames: Sequence[str] = (),
+    ) -> Histogram:
+        """Get the histogram with the given name, creating it on first use"""
+        return self._get(
+            Histogram, name, description, buckets=buckets, labelnames=labelnames
+        )
+
+    def collect(self) -> Dict[str, float]:
+        values: Dict[str, float] = {}
+        for name, metric in self._metrics.items():
+            if isinstance(metric, Timer):
+                values[f"{name}_count"] = metric.count
+                values[f"{name}_sum"] = metric.total
+            elif isinstance(metric, Histogram):
+                values[f"{name}_count"] = sum(s[2] for s in metric.series.values())
+                values[f"{name}_sum"] = sum(s[1] for s in metric.series.values())
+            else:
+                values[name] = metric.value
+        return values
+
+    def to_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for name, metric in list(self._metrics.items()):
+            if metric.description:
+                lines.append(f"# HELP {name} {metric.description}")
+            if isinstance(metric, Counter):
+                lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name} {metric.value}")
+            elif isinstance(metric, Timer):
+                lines.append(f"# TYPE {name} summary")
+                lines.append(f"{name}_sum {metric.total}")
+                lines.append(f"{name}_count {metric.count}")
+            else:
+                lines.append(f"# TYPE {name} histogram")
+                with metric._lock:
+                    series = list(metric.series.items())
+                for key, (counts, total, count) in series:
+                    labels = [
+                        f'{label}="{escape_label(value)}"'
+                        for label, value in zip(metric.labelnames, key)
+                    ]
+                    cumulative = 0
+                    for bound, bucket in zip((*metric.buckets, "+Inf"), counts):
+                        cumulative += bucket
+                        le = ",".join([*labels, f'le="{bound}"'])
+                        lines.append(f"{name}_bucket{{{le}}} {cumulative}")
+                    suffix = "{" + ",".join(labels) + "}" if labels else ""
+                    lines.append(f"{name}_sum{suffix} {total}")
+                    lines.append(f"{name}_count{suffix} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str | Path) -> None:
+        """Write the metrics to a file, e.g. for the node exporter textfile
+        collector. The file is replaced atomically."""
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.to_prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def serve_prometheus(
+        self, port: int = 9464, host: str = "127.0.0.1"
+    ) -> ThreadingHTTPServer:
+        """Serve the metrics over HTTP from a daemon thread"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
@@ -1,4 +1,5 @@
-from typing import Any, Dict, Type
+from pathlib import Path
+from typing import Any, Dict, Tuple, Type
 
 from pydantic import BaseModel, Field, create_model
 from pydantic_settings import (
@@ -8,11 +9,35 @@ from pydantic_settings import (
     YamlConfigSettingsSource,
 )
 
-from imind_ai.utils import create_dynamic_model
+from imind_ai.utils import create_dynamic_model, schema_fingerprint
+
+
+# settings classes by schema fingerprint
+_settings_classes: Dict[str, Type[BaseSettings]] = {}
+# parsed YAML files by path, with the mtime and size they were read at
+_yaml_files: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+
+
+class CachedYamlConfigSettingsSource(YamlConfigSettingsSource):
+    """YAML settings source parsing each file once until it changes on disk"""
+
+    def _read_file(self, file_path: Path) -> Dict[str, Any]:
+        stat = file_path.stat()
+        key = str(file_path.resolve())
+        cached = _yaml_files.get(key)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            cached = (stat.st_mtime_ns, stat.st_size, super()._read_file(file_path))
+            _yaml_files[key] = cached
+        return dict(cached[2])
+
+
+def clear_settings_caches() -> None:
+    _settings_classes.clear()
+    _yaml_files.clear()
 
 
 def build_settings_from_schema(schema: Dict[str, Any]) -> Type[BaseSettings]:
-    """Dynamically creates a Settings class from a given schema configuration.
+    """Settings class of a schema, created once per distinct schema
 
     Args:
         schema: Dictionary defining the configuration structure and validation rules
@@ -20,6 +45,17 @@ def build_settings_from_schema(schema: Dict[str, Any]) -> Type[BaseSettings]:
     Returns:
         Custom Settings class configured to load from multiple sources
     """
+    fingerprint = schema_fingerprint(schema)
+    settings_cls = _settings_classes.get(fingerprint)
+    if settings_cls is None:
+        settings_cls = _settings_classes.setdefault(
+            fingerprint, create_settings_cls(schema)
+        )
+    return settings_cls
+
+
+def create_settings_cls(schema: Dict[str, Any]) -> Type[BaseSettings]:
+    """Dynamically creates a Settings class from a given schema configuration."""
 
     # Create a dynamic Pydantic model based on the provided schema
     DynamicModel: Type[BaseModel] = create_dynamic_model(schema)
@@ -53,7 +89,11 @@ def build_settings_from_schema(schema: Dict[str, Any]) -> Type[BaseSettings]:
 
             Note: Dotenv and file secret sources are excluded from this configuration.
             """
-            return init_settings, env_settings, YamlConfigSettingsSource(settings_cls)
+            return (
+                init_settings,
+                env_settings,
+                CachedYamlConfigSettingsSource(settings_cls),
+            )
 
     return Settings
 
@@ -0,0 +1,176 @@
+import logging
+import os
+from contextvars import ContextVar, Token
+from time import perf_counter
+from typing import Any, Callable, Dict
+from uuid import uuid4
+
+
+LOG_LEVEL_ENV = "IMIND_LOG_LEVEL"
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(trace_id)s:%(span_id)s] %(message)s"
+
+
+class Lazy:
+    """Defer an expensive log argument until the record is formatted
+
+    `tracer.debug("schema %s", Lazy(model.model_json_schema))` only builds
+    the schema when debug logging is enabled.
+    """
+
+    __slots__ = ("func",)
+
+    def __init__(self, func: Callable[[], Any]):
+        self.func = func
+
+    def __str__(self) -> str:
+        return str(self.func())
+
+    __repr__ = __str__
+
+
+class Span:
+    """A timed section of a run, nested spans share the trace id of the run"""
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "attrs",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start",
+        "duration",
+        "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        parent = _current_span.get()
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.trace_id = parent.trace_id if parent is not None else new_id()
+        self.span_id = new_id()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start = 0.0
+        self.duration = 0.0
+        self._token: Token | None = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attrs[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = perf_counter() - self.start
+        if exc is not None:
+            self.attrs["error"] = repr(exc)
+        self.tracer.end(self)
+        _current_span.reset(self._token)
+
+
+class NoopSpan:
+    """Returned by `Tracer.span` when tracing is disabled"""
+
+    __slots__ = ()
+
+    trace_id = None
+    span_id = None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+_current_span: ContextVar[Span | None] = ContextVar("imind_span", default=None)
+
+
+def new_id() -> str:
+    return uuid4().hex[:16]
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+class SpanFilter(logging.Filter):
+    """Add the trace and span ids of the current span to log records"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = _current_span.get()
+        record.trace_id = span.trace_id if span is not None else "-"
+        record.span_id = span.span_id if span is not None else "-"
+        return True
+
+
+class Tracer:
+    """Leveled logging and spans on top of the `logging` module
+
+    Everything is logged at debug level, when it is disabled `span` returns a
+    shared no-op span and the log methods return before touching their
+    arguments.
+    """
+
+    def __init__(self, name: str):
+        self.logger = logging.getLogger(name)
+
+    @property
+    def enabled(self) -> bool:
+        return self.logger.isEnabledFor(logging.DEBUG)
+
+    def span(self, name: str, **attrs: Any) -> Span | NoopSpan:
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def end(self, span: Span) -> None:
+        self.logger.debug(
+            "span %s %.3fms %s", span.name, span.duration * 1000, span.attrs
+        )
+
+    def debug(self, msg: str, *args: Any) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(msg, *args)
+
+    def info(self, msg: str, *args: Any) -> None:
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(msg, *args)
+
+    def warning(self, msg: str, *args: Any) -> None:
+        self.logger.warning(msg, *args)
+
+    def error(self, msg: str, *args: Any, exc_info: bool = False) -> None:
+        self.logger.error(msg, *args, exc_info=exc_info)
+
+
+def get_tracer(name: str) -> Tracer:
+    return Tracer(name)
+
+
+def configure_logging(level: str | int | None = None) -> None:
+    """Log the `imind_ai` loggers to stderr with the ids of the current span
+
+    The level defaults to the `IMIND_LOG_LEVEL` environment variable, then
+    WARNING, so debug logs and spans are off unless asked for.
+    """
+    level = level or os.environ.get(LOG_LEVEL_ENV) or logging.WARNING
+    if isinstance(level, str):
+        level = level.upper()
+
+    handler = logging.StreamHandler()
+    handler.addFilter(SpanFilter())
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    logger = logging.getLogger("imind_ai")
+    logger.handlers = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
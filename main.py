@@ -58,12 +58,16 @@ from imind_ai.agent.workflow.pipeline.context import Context
 from imind_ai.agent.workflow.pipeline.executor import Executor
 from imind_ai.agent.workflow.pipeline.parser import Parser
 from imind_ai.agent.workflow.pipeline.planner import Planner
+from imind_ai.utils.tracing import configure_logging
+
+
+configure_logging()
 
 
 context = Context()
 
 Parser.parse(context)
-Planner.plan(context)
+plan = Planner.plan(context)
 
 
 async def main():
@@ -71,7 +75,7 @@ async def main():
         "query": "讲个笑话",
     }
     input = Input(**data)
-    resp = await Executor.execute(context, input)
+    resp = await Executor.execute(plan, input)
     print("resp", resp.dict()["content"]["aigc"], len(resp.dict()["content"]["aigc"]))
 
 
@@ -0,0 +1,19 @@
+import os
+
+# agents read their settings from the environment, run them against the
+# local fake model and without Postgres
+os.environ.setdefault("MODEL", "fake:test")
+os.environ["POSTGRES_DSN"] = ""
+
+import pytest
+
+from benchmarks.fake_llm import use_fake_chat_model
+from imind_ai.agent.base.llm import unregister_chat_model
+
+
+@pytest.fixture
+def fake_model():
+    """Plug the fake chat model in for `model: fake:*`, called with the
+    fields of the model"""
+    yield use_fake_chat_model
+    unregister_chat_model("fake")
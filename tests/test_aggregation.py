@@ -0,0 +1,79 @@
+import copy
+import random
+import statistics
+from typing import Any, List
+
+import pytest
+
+from imind_ai.agent.config.base import Aggregation
+from imind_ai.agent.workflow.graph.aggregation import (
+    ACCUMULATORS,
+    Accumulator,
+    create_accumulator,
+)
+
+
+def accumulate(agg_type: str, values: List[Any], **options: Any) -> Any:
+    accumulator = create_accumulator(
+        Aggregation(reference="x", agg_type=agg_type, **options)
+    )
+    acc = accumulator.init()
+    for value in values:
+        acc = accumulator.add(acc, value)
+    return accumulator.result(acc)
+
+
+VALUES = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0]
+
+
+@pytest.mark.parametrize(
+    "agg_type, expected",
+    [
+        ("list", VALUES),
+        ("count", len(VALUES)),
+        ("sum", sum(VALUES)),
+        ("mean", statistics.fmean(VALUES)),
+        ("min", min(VALUES)),
+        ("max", max(VALUES)),
+        ("variance", statistics.variance(VALUES)),
+    ],
+)
+def test_exact(agg_type, expected):
+    assert accumulate(agg_type, VALUES) == pytest.approx(expected)
+
+
+def test_top_k():
+    assert accumulate("top_k", VALUES, k=3) == [9.0, 6.0, 5.0]
+    assert accumulate("top_k", VALUES[:2], k=3) == [3.0, 1.0]
+
+
+def test_quantile():
+    assert accumulate("quantile", [1.0, 2.0, 3.0], quantile=0.5) == 2.0
+    random.seed(0)
+    values = [random.random() for _ in range(5000)]
+    estimate = accumulate("quantile", values, quantile=0.9)
+    assert estimate == pytest.approx(statistics.quantiles(values, n=10)[-1], abs=0.02)
+
+
+def test_empty():
+    assert accumulate("mean", []) is None
+    assert accumulate("quantile", []) is None
+    assert accumulate("variance", [1.0]) == 0.0
+
+
+@pytest.mark.parametrize("agg_type", sorted(ACCUMULATORS))
+def test_add_leaves_the_state_unchanged(agg_type):
+    accumulator: Accumulator = create_accumulator(
+        Aggregation(reference="x", agg_type=agg_type, k=3)
+    )
+    acc = accumulator.init()
+    for value in VALUES:
+        before = copy.deepcopy(acc)
+        new = accumulator.add(acc, value)
+        assert acc == before
+        acc = new
+
+
+def test_unknown_type():
+    with pytest.raises(ValueError, match="不支持的聚合类型"):
+        create_accumulator(Aggregation(reference="x", agg_type="nope"))
@@ -0,0 +1,82 @@
+import pytest
+
+from imind_ai.agent.config.base import CacheConfig
+from imind_ai.utils.cache import (
+    CACHE_BACKENDS,
+    MemoryCache,
+    SQLiteCache,
+    backend_options,
+    create_cache,
+    register_cache_backend,
+)
+
+
+def test_memory_options():
+    config = CacheConfig(backend="memory", ttl=10, max_bytes=1000)
+    assert config.options() == {"ttl": 10, "max_entries": 1024, "max_bytes": 1000}
+    assert isinstance(
+        create_cache("test", config.backend, **config.options()), MemoryCache
+    )
+
+
+def test_sqlite_options(tmp_path):
+    config = CacheConfig(backend="sqlite", path=str(tmp_path / "cache.sqlite"))
+    cache = create_cache("test", config.backend, **config.options())
+    assert isinstance(cache, SQLiteCache)
+
+
+@pytest.mark.parametrize(
+    "values, option",
+    [
+        ({"backend": "memory", "path": "cache.sqlite"}, "path"),
+        ({"backend": "sqlite", "max_bytes": 1000}, "max_bytes"),
+    ],
+)
+def test_unsupported_options(values, option):
+    with pytest.raises(ValueError, match=option):
+        CacheConfig(**values)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="不支持的缓存类型"):
+        CacheConfig(backend="nope")
+
+
+def test_registered_backend():
+    class AnyOptionsCache(MemoryCache):
+        def __init__(self, name: str, **options):
+            super().__init__(name)
+
+    register_cache_backend("any", AnyOptionsCache)
+    try:
+        assert backend_options("any") is None
+        CacheConfig(backend="any", path="x", max_bytes=10)
+    finally:
+        CACHE_BACKENDS.pop("any")
+
+
+def test_memory_cache_returns_copies():
+    cache = MemoryCache("test")
+    value = {"items": [1]}
+    cache.set("key", value)
+    value["items"].append(2)
+    cached = cache.get("key")
+    assert cached == {"items": [1]}
+    cached["items"].append(3)
+    assert cache.get("key") == {"items": [1]}
+
+
+def test_memory_cache_bounds():
+    cache = MemoryCache("test", max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    assert cache.get("a") is None
+    assert len(cache) == 2
+
+    cache = MemoryCache("test", max_bytes=64)
+    cache.set("big", "x" * 100)
+    assert cache.get("big") is None
+    cache.set("small", "x")
+    assert cache.bytes > 0
+    cache.delete("small")
+    assert cache.bytes == 0
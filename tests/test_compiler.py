@@ -0,0 +1,38 @@
+import shutil
+from pathlib import Path
+
+from benchmarks.common import ROOT
+from imind_ai.agent.config import helper, schema, value_type
+from imind_ai.agent.workflow.pipeline.compiler import Compiler
+from imind_ai.agent.workflow.pipeline.context import Context
+from imind_ai.agent.workflow.pipeline.parser import Parser
+from imind_ai.agent.workflow.pipeline.planner import Planner
+
+
+def test_version_covers_the_config_modules(monkeypatch, tmp_path: Path):
+    version = Compiler.version()
+    for module in (helper, schema, value_type):
+        copy = tmp_path / Path(module.__file__).name
+        copy.write_bytes(Path(module.__file__).read_bytes() + b"\n# changed\n")
+        monkeypatch.setattr(module, "__file__", str(copy))
+        monkeypatch.setattr(Compiler, "_version", None)
+        assert Compiler.version() != version
+        monkeypatch.undo()
+
+
+def test_env_overrides_get_their_own_plan(fake_model, tmp_path: Path):
+    fake_model()
+    source = tmp_path / "workflow.yaml"
+    shutil.copy(ROOT / "workflow.yaml", source)
+    Compiler.compile(source)
+
+    plans = []
+    for base_url in ("http://a:11434", "http://b:11434", "http://a:11434"):
+        context = Context()
+        Parser.parse(context, values=source, env={"base_url": {"default": base_url}})
+        assert context.artifact is not None
+        plans.append(Planner.plan(context))
+
+    assert plans[0] is not plans[1]
+    assert plans[0] is plans[2]
+    assert plans[1].settings.base_url == "http://b:11434"
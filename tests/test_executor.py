@@ -0,0 +1,60 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+
+from benchmarks.common import ROOT, plan_workflow
+from imind_ai.agent.config.base import Config
+from imind_ai.agent.config.schema import Input
+from imind_ai.agent.workflow.pipeline.context import RunContext
+from imind_ai.agent.workflow.pipeline.executor import Executor
+from imind_ai.agent.workflow.pipeline.graph_cache import GraphCache
+
+
+def loop_workflow(name: str) -> Dict[str, Any]:
+    values = Config.from_file(ROOT / "workflow.yaml").model_dump(by_alias=True)
+    return {**values, "agent": {**values["agent"], "id": name}}
+
+
+def run_session(values: Dict[str, Any], session_id: str, runs: int) -> List[Any]:
+    plan = plan_workflow(values)
+
+    async def main():
+        outputs = []
+        for _ in range(runs):
+            ctx = RunContext()
+            ctx.session_id = session_id
+            output = await Executor.execute(plan, Input(query="q"), ctx)
+            outputs.append(output.dict()["content"]["aigc"])
+        return outputs
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def shared_checkpointer():
+    saver = InMemorySaver()
+    GraphCache.set_checkpointer(saver)
+    yield saver
+    GraphCache.set_checkpointer(None)
+
+
+def test_no_checkpoints_kept_by_default(fake_model):
+    fake_model(structured={"result": "r"})
+    assert GraphCache.get_checkpointer() is None
+
+    plan = plan_workflow(loop_workflow("executor-default"))
+    assert plan.graph.checkpointer is None
+    for aigc in run_session(loop_workflow("executor-default"), "s1", 3):
+        assert aigc == ["r", "r", "r"]
+
+
+def test_shared_checkpointer_starts_each_run_afresh(fake_model, shared_checkpointer):
+    fake_model(structured={"result": "r"})
+
+    for aigc in run_session(loop_workflow("executor-shared"), "s1", 3):
+        assert aigc == ["r", "r", "r"]
+    run_session(loop_workflow("executor-shared"), "s2", 1)
+    # one thread per session, not per run
+    assert set(shared_checkpointer.storage) == {"s1", "s2"}
@@ -0,0 +1,61 @@
+import asyncio
+
+from langchain_core.tools import tool
+from pydantic import BaseModel
+
+from benchmarks.common import ROOT, plan_workflow
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.workflow_bench import chain_workflow
+from imind_ai.agent.config.base import Config
+from imind_ai.agent.config.schema import Input
+from imind_ai.agent.workflow.pipeline.executor import Executor
+
+
+class Answer(BaseModel):
+    """The final answer"""
+
+    result: str
+    score: int
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look a query up"""
+    return f"found {query}"
+
+
+def test_structured_output_without_structured_args():
+    answer = FakeChatModel().with_structured_output(Answer).invoke("question")
+    assert answer == Answer(result="text", score=0)
+
+
+def test_any_tool_choice():
+    message = FakeChatModel().bind_tools([lookup], tool_choice="any").invoke("q")
+    assert message.tool_calls[0]["name"] == "lookup"
+    assert message.tool_calls[0]["args"] == {"query": "text"}
+
+    llm = FakeChatModel(structured={"result": "r", "score": 1})
+    message = llm.bind_tools([lookup, Answer], tool_choice="any").invoke("q")
+    assert [call["name"] for call in message.tool_calls] == ["Answer"]
+
+    # no tool to pick among several, the tool loop ends
+    message = FakeChatModel().bind_tools([lookup, Answer], tool_choice="any")
+    assert message.invoke("q").content == "ok"
+
+
+def test_workflow_outputs_with_the_default_fake_model(fake_model):
+    fake_model()
+    chain = chain_workflow(3)
+    chain["agent"]["id"] = "fake-llm-chain"
+    loop = Config.from_file(ROOT / "workflow.yaml").model_dump(by_alias=True)
+    loop["agent"]["id"] = "fake-llm-loop"
+
+    async def main():
+        return [
+            (await Executor.execute(plan_workflow(values), Input(query="q"))).dict()
+            for values in (chain, loop)
+        ]
+
+    chain_output, loop_output = asyncio.run(main())
+    assert chain_output["content"] == "text"
+    assert loop_output["content"] == {"aigc": ["text", "text", "text"]}
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any, Dict
+
+import pytest
+
+from benchmarks.common import plan_workflow
+from benchmarks.workflow_bench import fan_out_workflow
+from imind_ai.agent.config.schema import Input
+from imind_ai.agent.workflow.pipeline.executor import Executor
+
+
+def workflow(name: str, **join: Any) -> Dict[str, Any]:
+    """An agent fanning out to three agents joined with `join` settings"""
+    values = fan_out_workflow(3)
+    values["agent"]["id"] = name
+    values["agent"]["output"] = {
+        key: {"type": type, "source": "reference", "reference": f"join.{key}"}
+        for key, type in (
+            ("results", "dict"),
+            ("completed", "list[str]"),
+            ("failed", "dict"),
+        )
+    }
+    values["nodes"][-1].update(join)
+    return values
+
+
+def run(values: Dict[str, Any]) -> Dict[str, Any]:
+    plan = plan_workflow(values)
+    return asyncio.run(Executor.execute(plan, Input(query="q"))).dict()
+
+
+@pytest.fixture(autouse=True)
+def slow_model(fake_model):
+    # branches take long enough for the join to cancel the late ones
+    fake_model(structured={"result": "r"}, latency=0.01)
+
+
+BRANCHES = {"agent_1", "agent_2", "agent_3"}
+
+
+def test_wait_all():
+    output = run(workflow("join-all"))
+    assert set(output["results"]) == BRANCHES
+    assert set(output["completed"]) == BRANCHES
+    assert output["failed"] == {}
+    for result in output["results"].values():
+        assert result["result"] == "r"
+
+
+def test_wait_any():
+    output = run(workflow("join-any", wait="any"))
+    assert len(output["results"]) == 1
+    assert output["completed"] == list(output["results"])
+    assert set(output["completed"]) <= BRANCHES
+
+
+def test_wait_first_k():
+    output = run(workflow("join-first-k", wait="first_k", k=2))
+    assert len(output["results"]) == 2
+    assert set(output["results"]) <= BRANCHES
+
+
+def test_wait_first_k_cancels_the_rest():
+    values = workflow("join-first-k-cancel", wait="first_k", k=2)
+    # one branch at a time, the last one is still queued after two are done
+    values["nodes"][0]["max_concurrency"] = 1
+    output = run(values)
+    assert len(output["completed"]) == 2
+    (left,) = BRANCHES - set(output["completed"])
+    assert output["failed"] == {left: "cancelled"}
@@ -0,0 +1,133 @@
+import asyncio
+from typing import Any, Dict
+
+import pytest
+
+from benchmarks.common import ROOT, plan_workflow
+from benchmarks.workflow_bench import chain_workflow, fan_out_workflow
+from imind_ai.agent.config.base import Config
+from imind_ai.agent.config.schema import Input
+from imind_ai.agent.workflow.pipeline.executor import Executor
+from imind_ai.agent.workflow.pipeline.liveness import live_fields, reachable
+
+
+def test_chain():
+    # a writes x, b reads x and writes y, c reads y
+    live = live_fields(
+        {"a": ["b"], "b": ["c"]},
+        {"b": {"x"}, "c": {"y"}},
+        {"a": {"x"}, "b": {"y"}},
+    )
+    assert live["a"] == {"x"}
+    assert live["b"] == {"y"}
+    assert live["c"] == set()
+
+
+def test_written_again_before_read():
+    live = live_fields(
+        {"a": ["b"], "b": ["c"]},
+        {"c": {"x"}},
+        {"a": {"x"}, "b": {"x"}},
+    )
+    # the value of a is overwritten by b before c reads it
+    assert live["a"] == set()
+    assert live["b"] == {"x"}
+
+
+def test_loop():
+    # a runs, c reads what a wrote and loops back to a, which reads its own
+    # output of the previous lap
+    successors = {"start": ["a"], "a": ["c"], "c": ["a", "end"]}
+    uses = {"a": {"acc"}, "c": {"acc"}, "end": {"result"}}
+    defs = {"a": {"acc"}, "c": {"result"}}
+    live = live_fields(successors, uses, defs)
+    # result is written again by c before the end reads it
+    assert live["a"] == {"acc"}
+    # live around the loop, the next lap reads acc
+    assert live["c"] == {"acc", "result"}
+    assert live["start"] == {"acc"}
+    assert live["end"] == set()
+
+
+def test_parallel_branches():
+    # s fans out to x and y, joined by j which reads both outputs
+    successors = {"s": ["x", "y"], "x": ["j"], "y": ["j"], "j": ["end"]}
+    uses = {"x": {"s"}, "y": {"s"}, "j": {"x", "y"}, "end": {"j"}}
+    defs = {"s": {"s"}, "x": {"x"}, "y": {"y"}, "j": {"j"}}
+    live = live_fields(successors, uses, defs)
+    # per path: the join reads x after y, which does not write it, so the
+    # planner only drops what nothing reads in parallel regions
+    assert live["s"] == {"s", "x", "y"}
+    # the output of the other branch is still read by the join
+    assert live["x"] == {"x", "y"}
+    assert live["y"] == {"x", "y"}
+    assert live["j"] == {"j"}
+
+
+def test_reachable():
+    successors = {"s": ["x", "y"], "x": ["j"], "y": ["z"], "z": ["j"], "j": ["e"]}
+    assert reachable(successors, ["x", "y"], {"j"}) == {"x", "y", "z"}
+    assert reachable(successors, ["j"], {"j"}) == set()
+    # loops terminate
+    assert reachable({"a": ["b"], "b": ["a"]}, ["a"], set()) == {"a", "b"}
+
+
+@pytest.fixture(autouse=True)
+def structured(fake_model):
+    fake_model(structured={"result": "r" * 100})
+
+
+def named(values: Dict[str, Any], name: str, **extra: Any) -> Dict[str, Any]:
+    return {**values, "agent": {**values["agent"], "id": name}, **extra}
+
+
+def test_plan_chain():
+    plan = plan_workflow(named(chain_workflow(3), "liveness-chain"))
+    nodes = {node.id: node for node in plan.nodes}
+    assert nodes["agent_0"].drops == {"agent_0_input"}
+    assert nodes["agent_0"].clears == set()
+    # dead once the next agent read it
+    assert nodes["agent_1"].clears == {"agent_0_output"}
+    assert nodes["agent_2"].clears == {"agent_1_output"}
+    # read by the workflow output
+    assert "agent_2_output" not in nodes["agent_2"].drops
+
+
+def test_plan_parallel_branches():
+    plan = plan_workflow(named(fan_out_workflow(2), "liveness-fan-out"))
+    nodes = {node.id: node for node in plan.nodes}
+    for branch in ("agent_1", "agent_2"):
+        assert nodes[branch].drops == {f"{branch}_input"}
+        assert nodes[branch].clears == set()
+    assert nodes["join"].drops == set()
+
+
+def test_plan_loop():
+    values = Config.from_file(ROOT / "workflow.yaml").model_dump(by_alias=True)
+    plan = plan_workflow(named(values, "liveness-loop"))
+    nodes = {node.id: node for node in plan.nodes}
+    # the accumulators of the previous laps stay in the state
+    assert "loop_agg_output" not in nodes["loop_agg"].drops
+    assert "loop_agg_output" not in nodes["base_agent"].clears
+
+
+def run(values: Dict[str, Any]) -> Dict[str, Any]:
+    plan = plan_workflow(values)
+    return asyncio.run(Executor.execute(plan, Input(query="q"))).dict()
+
+
+@pytest.mark.parametrize(
+    "name, values",
+    [
+        ("chain", chain_workflow(4)),
+        ("fan-out", fan_out_workflow(3)),
+        (
+            "loop",
+            Config.from_file(ROOT / "workflow.yaml").model_dump(by_alias=True),
+        ),
+    ],
+)
+def test_pruning_keeps_the_output(name, values):
+    pruned = run(named(values, f"pruned-{name}", prune_state=True))
+    kept = run(named(values, f"kept-{name}", prune_state=False))
+    assert pruned == kept
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage
+
+from benchmarks.fake_llm import FakeChatModel
+from imind_ai.agent.base.agent import BaseAgent
+from imind_ai.agent.base.llm import LLMCache
+from imind_ai.agent.config.schema import Input
+from imind_ai.utils.cache import MemoryCache, SQLiteCache
+
+
+def cached(llm: FakeChatModel, prompt: str = "question") -> bool:
+    """Whether the answer to the prompt came from the cache"""
+    return llm.invoke(prompt).response_metadata.get("cached", False)
+
+
+def test_key_ignores_ids_and_metadata():
+    cache = LLMCache(MemoryCache("llm-key"))
+    first = [
+        HumanMessage(content="hi", id="1"),
+        AIMessage(content="hello", id="2", response_metadata={"model": "a"}),
+    ]
+    second = [
+        HumanMessage(content="hi", id="3"),
+        AIMessage(
+            content="hello",
+            id="4",
+            usage_metadata={"input_tokens": 1, "output_tokens": 1, "total_tokens": 2},
+        ),
+    ]
+    assert cache.key(dumps(first), "llm") == cache.key(dumps(second), "llm")
+    assert cache.key(dumps(first), "llm") != cache.key(dumps(first), "other")
+    assert cache.key(dumps(first), "llm") != cache.key(dumps(first[:1]), "llm")
+
+
+def test_cached_completion():
+    llm = FakeChatModel(response="answer", cache=LLMCache(MemoryCache("llm-hit")))
+    assert not cached(llm)
+    assert cached(llm)
+    assert llm.invoke("question").content == "answer"
+    assert not cached(llm, "another question")
+    # other model settings are other completions
+    assert not cached(llm.model_copy(update={"response": "other"}))
+
+
+def test_ttl():
+    llm = FakeChatModel(cache=LLMCache(MemoryCache("llm-ttl", ttl=0.05)))
+    assert not cached(llm)
+    assert cached(llm)
+    time.sleep(0.1)
+    assert not cached(llm)
+
+
+def test_max_entries():
+    cache = MemoryCache("llm-size", max_entries=2)
+    llm = FakeChatModel(cache=LLMCache(cache))
+    for prompt in ("a", "b", "c"):
+        cached(llm, prompt)
+    assert len(cache) == 2
+    assert not cached(llm, "a")
+    assert cached(llm, "c")
+
+
+def test_sqlite_backend(tmp_path):
+    path = tmp_path / "llm.sqlite"
+    llm = FakeChatModel(cache=LLMCache(SQLiteCache("llm-sqlite", path=path)))
+    assert not cached(llm)
+    assert cached(llm)
+    # another process opening the file sees the completion
+    other = FakeChatModel(cache=LLMCache(SQLiteCache("llm-sqlite", path=path)))
+    assert cached(other)
+    assert other.invoke("question").content == "ok"
+
+
+def test_stream_cached_answer(fake_model):
+    fake_model(response="streamed answer")
+    agent = BaseAgent(
+        env={
+            "llm_cache": {"default": "memory"},
+            "multi_turn": {"default": False},
+        }
+    )
+    hits = agent.llm.cache.cache.hits
+
+    async def stream():
+        return [
+            chunk
+            async for chunk in agent.achat_stream(Input(content="stream question"))
+        ]
+
+    before = hits.value
+    first = asyncio.run(stream())
+    second = asyncio.run(stream())
+    assert first == second == ["streamed answer"]
+    assert hits.value == before + 1
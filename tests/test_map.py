@@ -0,0 +1,91 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+from pydantic import BaseModel
+
+from imind_ai.agent.config.base import MapNodeConfig
+from imind_ai.agent.config.schema import Input, Output
+from imind_ai.agent.workflow.graph.map import MapNode
+from imind_ai.agent.workflow.pipeline.context import RunContext
+
+
+class State(BaseModel):
+    workflow_input: Dict[str, Any] = {}
+    source_output: Dict[str, Any] | None = None
+
+
+def map_node(**extra: Any) -> MapNode:
+    config = MapNodeConfig(
+        id="mapped",
+        items="source.items",
+        input={"content": {"type": "str", "source": "reference", "reference": "item"}},
+        output={"result": {"type": "str"}},
+        **extra,
+    )
+    return MapNode(config)
+
+
+@pytest.fixture
+def node_factory(fake_model, monkeypatch):
+    """Map nodes answering every item upper-cased and failing on "bad" """
+    fake_model(structured={"result": "r"})
+
+    async def chat(self, input: Input, ctx: RunContext, track: str = "") -> Output:
+        await asyncio.sleep(0)
+        if input.content == "bad":
+            raise RuntimeError("bad item")
+        return Output(result=input.content.upper())
+
+    monkeypatch.setattr(MapNode, "chat", chat)
+    return map_node
+
+
+def run(node: MapNode, items: List[Any]) -> Dict[str, Any]:
+    state = State(source_output={"items": items})
+    return asyncio.run(node.run(state, {}))["mapped_output"]
+
+
+ITEMS = ["a", "bad", "c"]
+
+
+def test_results_keep_the_order(node_factory):
+    output = run(node_factory(max_concurrency=2), ["a", "b", "c", "d"])
+    assert [result["result"] for result in output["results"]] == ["A", "B", "C", "D"]
+    assert output["errors"] == {}
+
+
+def test_on_error_fail(node_factory):
+    with pytest.raises(RuntimeError, match="bad item"):
+        run(node_factory(on_error="fail"), ITEMS)
+
+
+def test_on_error_skip(node_factory):
+    output = run(node_factory(on_error="skip"), ITEMS)
+    assert [result["result"] for result in output["results"]] == ["A", "C"]
+    assert output["errors"] == {"1": "bad item"}
+
+
+def test_on_error_null(node_factory):
+    output = run(node_factory(on_error="null"), ITEMS)
+    assert output["results"][0]["result"] == "A"
+    assert output["results"][1] is None
+    assert output["results"][2]["result"] == "C"
+    assert output["errors"] == {"1": "bad item"}
+
+
+def test_missing_list_maps_nothing(node_factory):
+    node = node_factory()
+    update = asyncio.run(node.run(State(source_output={}), {}))
+    assert update["mapped_output"] == {"results": [], "errors": {}}
+
+
+def test_not_a_list(node_factory):
+    with pytest.raises(ValueError):
+        run(node_factory(), "abc")
+
+
+def test_with_the_agent(fake_model):
+    fake_model(structured={"result": "r"})
+    output = run(map_node(), ["a", "b"])
+    assert output["results"] == [{"result": "r"}, {"result": "r"}]
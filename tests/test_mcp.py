@@ -0,0 +1,64 @@
+import asyncio
+import sys
+
+from benchmarks.common import ROOT
+from imind_ai.agent.base.mcp import MCPManager
+
+# the local fake MCP server over stdio
+CONNECTION = {
+    "transport": "stdio",
+    "command": sys.executable,
+    "args": ["-m", "benchmarks.fake_mcp_server"],
+    "cwd": str(ROOT),
+}
+
+
+async def echo(text: str):
+    tools, version = await MCPManager.get_server_tools(CONNECTION)
+    tool = next(tool for tool in tools if tool.name == "echo")
+    return await tool.ainvoke({"text": text}), version
+
+
+def test_cached_listing():
+    async def main():
+        try:
+            first = await MCPManager.get_server_tools(CONNECTION)
+            second = await MCPManager.get_server_tools(CONNECTION)
+            return first, second
+        finally:
+            await MCPManager.close()
+
+    (tools, version), (cached, cached_version) = asyncio.run(main())
+    assert {tool.name for tool in tools} == {"echo", "add", "get_weather"}
+    assert cached is tools
+    assert cached_version == version
+
+
+def test_reconnects_a_dead_session():
+    async def main():
+        try:
+            answer, version = await echo("first")
+            assert answer == "first"
+
+            # e.g. the server exited, the cached listing is bound to it
+            key = next(iter(MCPManager._loop_registry(MCPManager._sessions)))
+            await MCPManager._loop_registry(MCPManager._sessions)[key].close()
+
+            answer, reconnected = await echo("second")
+            assert answer == "second"
+            assert reconnected != version
+        finally:
+            await MCPManager.close()
+
+    asyncio.run(main())
+
+
+def test_sessions_per_event_loop():
+    async def main():
+        # the session of the previous loop died with it, it is not closed
+        return await echo("hello")
+
+    first = asyncio.run(main())
+    second = asyncio.run(main())
+    assert first[0] == second[0] == "hello"
+    assert first[1] != second[1]
@@ -0,0 +1,43 @@
+import asyncio
+from typing import Any, Dict
+
+import pytest
+
+from benchmarks.common import plan_workflow
+from benchmarks.workflow_bench import chain_workflow
+from imind_ai.agent.config.schema import Input
+from imind_ai.agent.workflow.pipeline.context import RunContext
+from imind_ai.agent.workflow.pipeline.executor import Executor
+from imind_ai.agent.workflow.pipeline.run_metrics import RunMetrics
+
+
+def workflow(name: str, multi_turn: bool) -> Dict[str, Any]:
+    values = chain_workflow(1)
+    values["agent"]["id"] = name
+    values["nodes"][0]["cache"] = {"backend": "memory"}
+    values["nodes"][0]["env"] = {"multi_turn": {"type": "bool", "default": multi_turn}}
+    return values
+
+
+@pytest.fixture(autouse=True)
+def structured(fake_model):
+    fake_model(structured={"result": "r"})
+
+
+def test_cached_output():
+    plan = plan_workflow(workflow("node-cache", multi_turn=False))
+    hits = []
+    for _ in range(2):
+        ctx = RunContext()
+        ctx.metrics = RunMetrics()
+        output = asyncio.run(
+            Executor.execute(plan, Input(query="node cache test"), ctx)
+        )
+        assert output.content == "r"
+        hits.append(output.metrics["nodes"]["agent_0"]["cache_hits"])
+    assert hits == [0, 1]
+
+
+def test_rejected_with_multi_turn():
+    with pytest.raises(ValueError, match="multi_turn"):
+        plan_workflow(workflow("node-cache-multi-turn", multi_turn=True))
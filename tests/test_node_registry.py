@@ -0,0 +1,105 @@
+import asyncio
+from typing import Any, Dict, Literal
+
+import pytest
+
+from benchmarks.common import plan_workflow
+from benchmarks.parse_bench import large_workflow
+from imind_ai.agent.config.base import (
+    NODE_CONFIGS,
+    BaseAgentNodeConfig,
+    Config,
+    ConditionNodeConfig,
+    JoinNodeConfig,
+    LoopAggregationNodeConfig,
+    MapNodeConfig,
+    NodeConfig,
+    validate_node_config,
+)
+from imind_ai.agent.config.schema import Input
+from imind_ai.agent.workflow.graph.node import Node
+from imind_ai.agent.workflow.graph.registry import NODE_TYPES, register_node_type
+from imind_ai.agent.workflow.pipeline.executor import Executor
+
+
+def test_unknown_type():
+    with pytest.raises(ValueError, match="不支持的节点类型: nope"):
+        validate_node_config({"id": "x", "type": "nope"})
+
+
+def test_unknown_type_in_config():
+    values = large_workflow(5)
+    values["nodes"][2]["type"] = "nope"
+    with pytest.raises(ValueError, match="不支持的节点类型"):
+        Config.from_dict(values)
+
+
+def test_not_a_dict():
+    with pytest.raises(ValueError):
+        validate_node_config(["base_agent"])
+
+
+def test_default_type():
+    config = validate_node_config({"id": "x"})
+    assert type(config) is BaseAgentNodeConfig
+    assert config.type == "base_agent"
+
+
+def test_dispatch_on_type():
+    config = Config.from_dict(large_workflow(5))
+    assert [type(node) for node in config.nodes] == [
+        BaseAgentNodeConfig,
+        MapNodeConfig,
+        LoopAggregationNodeConfig,
+        ConditionNodeConfig,
+        JoinNodeConfig,
+    ]
+
+
+def test_round_trip():
+    config = Config.from_dict(large_workflow(5))
+    again = Config.from_dict(config.model_dump(by_alias=True))
+    assert again == config
+
+
+def test_field_errors_of_the_type():
+    values = large_workflow(5)
+    del values["nodes"][1]["items"]
+    with pytest.raises(ValueError, match="items"):
+        Config.from_dict(values)
+
+
+class EchoNodeConfig(NodeConfig):
+    type: Literal["echo"] = "echo"
+    text: str
+
+
+class EchoNode(Node):
+    async def run(self, state, config) -> Dict[str, Any]:
+        return {f"{self.id}_output": {"text": self.config.text}}
+
+
+@pytest.fixture
+def echo_type():
+    register_node_type("echo", EchoNodeConfig, EchoNode)
+    yield
+    NODE_CONFIGS.pop("echo")
+    NODE_TYPES.pop("echo")
+
+
+def test_register_node_type(echo_type):
+    values = {
+        "agent": {
+            "id": "echo-workflow",
+            "env": {},
+            "input": {"query": {"type": "str"}},
+            "output": {
+                "text": {"type": "str", "source": "reference", "reference": "echo.text"}
+            },
+        },
+        "nodes": [{"id": "echo", "type": "echo", "prev": "__start__", "text": "hi"}],
+    }
+    plan = plan_workflow(values)
+    assert isinstance(plan.config.nodes[0], EchoNodeConfig)
+    output = asyncio.run(Executor.execute(plan, Input(query="q")))
+    assert output.dict() == {"text": "hi"}
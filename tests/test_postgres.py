@@ -0,0 +1,115 @@
+import asyncio
+import logging
+
+import pytest
+
+from imind_ai.agent.base import postgres
+from imind_ai.agent.base.agent import BaseAgent
+from imind_ai.agent.base.postgres import PostgresPoolRegistry
+
+
+class FakePool:
+    """Connection pool that never connects"""
+
+    check_connection = None
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.closed = False
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeSaver:
+    """Checkpointer of a fake pool"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.setups = 0
+
+    async def setup(self):
+        self.setups += 1
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    monkeypatch.setattr(postgres, "AsyncConnectionPool", FakePool)
+    monkeypatch.setattr(postgres, "AsyncPostgresSaver", FakeSaver)
+
+
+def test_one_pool_per_event_loop(pools):
+    async def main():
+        pool = await PostgresPoolRegistry.get_pool("dsn")
+        assert await PostgresPoolRegistry.get_pool("dsn") is pool
+        return pool
+
+    first = asyncio.run(main())
+    # pools are bound to their loop, a new loop opens its own
+    second = asyncio.run(main())
+    assert first is not second
+    assert first.kwargs["max_size"] == 20
+
+
+def test_one_checkpointer_per_event_loop(pools):
+    async def main():
+        checkpointer = await PostgresPoolRegistry.get_checkpointer("dsn")
+        assert await PostgresPoolRegistry.get_checkpointer("dsn") is checkpointer
+        assert checkpointer.pool is await PostgresPoolRegistry.get_pool("dsn")
+        return checkpointer
+
+    first = asyncio.run(main())
+    second = asyncio.run(main())
+    assert first is not second
+    assert first.setups == second.setups == 1
+
+
+def test_concurrent_first_use(pools):
+    async def main():
+        return await asyncio.gather(
+            *(PostgresPoolRegistry.get_pool("dsn") for _ in range(5))
+        )
+
+    first, *others = asyncio.run(main())
+    assert all(pool is first for pool in others)
+
+
+def test_warns_on_other_sizes(pools, caplog):
+    async def main():
+        await PostgresPoolRegistry.get_pool("dsn", max_size=5)
+        with caplog.at_level(logging.WARNING):
+            return await PostgresPoolRegistry.get_pool("dsn", max_size=10)
+
+    pool = asyncio.run(main())
+    assert pool.kwargs["max_size"] == 5
+    assert "max_size=10" in caplog.text
+
+
+def test_close(pools):
+    async def main():
+        pool = await PostgresPoolRegistry.get_pool("dsn")
+        await PostgresPoolRegistry.close("dsn")
+        assert pool.closed
+        assert await PostgresPoolRegistry.get_pool("dsn") is not pool
+
+    asyncio.run(main())
+
+
+def test_clone_is_deprecated(fake_model):
+    fake_model()
+    agent = BaseAgent()
+    with pytest.warns(DeprecationWarning, match="shutdown"):
+        asyncio.run(agent.clone())
+
+
+def test_agent_checkpointer_of_the_running_loop(pools, fake_model, monkeypatch):
+    fake_model()
+    monkeypatch.setenv("POSTGRES_DSN", "user@host/db")
+    agent = BaseAgent()
+    first = asyncio.run(agent.init_checkpointer())
+    second = asyncio.run(agent.init_checkpointer())
+    assert first is not second
+    assert first.pool.kwargs["conninfo"] == "postgresql://user@host/db"
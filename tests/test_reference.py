@@ -0,0 +1,89 @@
+from typing import Any, Dict
+
+import pytest
+from pydantic import BaseModel
+
+from imind_ai.agent.config.helper import process_params, process_references
+from imind_ai.agent.config.reference import Reference, parse_reference
+from imind_ai.agent.config.schema import AgentOutput
+
+
+class State(BaseModel):
+    workflow_input: Dict[str, Any] = {}
+    agent_output: Dict[str, Any] | None = None
+
+
+OUTPUT = {"items": [{"name": "a"}, {"name": "b"}], "count": 2}
+
+
+@pytest.mark.parametrize(
+    "ref, expected",
+    [
+        ("agent.count", 2),
+        ("agent.items.0.name", "a"),
+        ("agent.items.-1.name", "b"),
+        ("agent.items", OUTPUT["items"]),
+    ],
+)
+def test_get(ref, expected):
+    assert parse_reference(ref).get(OUTPUT) == expected
+
+
+@pytest.mark.parametrize(
+    "ref",
+    [
+        "agent.missing",
+        "agent.missing.name",
+        "agent.items.2",
+        "agent.items.-3.name",
+        "agent.items.0.missing",
+        "agent.count.value",
+    ],
+)
+def test_get_missing_path(ref):
+    assert parse_reference(ref).get(OUTPUT) is None
+
+
+def test_get_attributes():
+    assert parse_reference("agent.agent_output").get(State(agent_output={})) == {}
+    assert parse_reference("agent.nothing").get(State()) is None
+
+
+def test_resolve():
+    state = State(workflow_input={"query": "q"}, agent_output=OUTPUT)
+    assert parse_reference("workflow.query").resolve(state) == "q"
+    assert parse_reference("agent.items.1.name").resolve(state) == "b"
+    assert parse_reference("agent.items.1.name").resolve(state.model_dump()) == "b"
+    # the node has not run yet
+    assert parse_reference("agent.count").resolve(State()) is None
+
+
+def test_resolve_unknown_entity():
+    with pytest.raises(ValueError):
+        parse_reference("other.count").resolve(State())
+    with pytest.raises(ValueError):
+        parse_reference("other.count").resolve({})
+
+
+@pytest.mark.parametrize("ref", ["", "agent.", ".count", "agent..count"])
+def test_invalid(ref):
+    with pytest.raises(ValueError):
+        Reference(ref)
+
+
+def test_parsed_once():
+    assert parse_reference("agent.count") is parse_reference("agent.count")
+
+
+def test_nested_value_schema():
+    config = {
+        "result": AgentOutput(
+            type="dict",
+            value_schema={
+                "name": {"type": "str", "source": "reference", "reference": "a.n"},
+                "size": {"type": "int", "default": 3},
+            },
+        )
+    }
+    assert process_references(config) == ["a.n"]
+    assert process_params(config, a={"n": "x"}) == {"result": {"name": "x", "size": 3}}
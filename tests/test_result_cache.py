@@ -0,0 +1,45 @@
+import asyncio
+from typing import Any, Dict
+
+import pytest
+
+from benchmarks.common import plan_workflow
+from benchmarks.workflow_bench import chain_workflow
+from imind_ai.agent.config.schema import Input
+from imind_ai.agent.workflow.pipeline.context import RunContext
+from imind_ai.agent.workflow.pipeline.executor import Executor
+from imind_ai.agent.workflow.pipeline.run_metrics import RunMetrics
+
+
+def workflow(name: str, multi_turn: bool | None) -> Dict[str, Any]:
+    values = chain_workflow(2)
+    values["agent"]["id"] = name
+    values["cache"] = {"backend": "memory"}
+    if multi_turn is not None:
+        for node in values["nodes"]:
+            node["env"] = {"multi_turn": {"type": "bool", "default": multi_turn}}
+    return values
+
+
+@pytest.fixture(autouse=True)
+def structured(fake_model):
+    fake_model(structured={"result": "r"})
+
+
+def test_cached_output():
+    plan = plan_workflow(workflow("result-cache", multi_turn=False))
+    cached = []
+    for session_id in ("s1", "s2"):
+        ctx = RunContext()
+        ctx.session_id = session_id
+        ctx.metrics = RunMetrics()
+        output = asyncio.run(Executor.execute(plan, Input(query="cached"), ctx))
+        assert output.content == "r"
+        cached.append(output.metrics["cached"])
+    assert cached == [False, True]
+
+
+@pytest.mark.parametrize("multi_turn", [None, True])
+def test_rejected_with_multi_turn(multi_turn):
+    with pytest.raises(ValueError, match="multi_turn"):
+        plan_workflow(workflow(f"result-cache-{multi_turn}", multi_turn=multi_turn))
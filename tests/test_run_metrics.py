@@ -0,0 +1,48 @@
+import asyncio
+from typing import Any, Dict
+
+import pytest
+
+from benchmarks.common import plan_workflow
+from benchmarks.workflow_bench import chain_workflow
+from imind_ai.agent.config.schema import Input
+from imind_ai.agent.workflow.pipeline.context import RunContext
+from imind_ai.agent.workflow.pipeline.executor import Executor
+from imind_ai.agent.workflow.pipeline.run_metrics import RunMetrics
+
+
+def workflow(name: str, **extra: Any) -> Dict[str, Any]:
+    values = chain_workflow(2)
+    values["agent"]["id"] = name
+    return {**values, **extra}
+
+
+@pytest.fixture(autouse=True)
+def structured(fake_model):
+    fake_model(structured={"result": "r"})
+
+
+def test_off_by_default():
+    plan = plan_workflow(workflow("metrics-off"))
+    output = asyncio.run(Executor.execute(plan, Input(query="q")))
+    assert output.metrics is None
+    assert output.content == "r"
+
+
+def test_enabled_by_config():
+    plan = plan_workflow(workflow("metrics-config", metrics=True))
+    metrics = asyncio.run(Executor.execute(plan, Input(query="q"))).metrics
+    assert set(metrics["nodes"]) == {"agent_0", "agent_1"}
+    assert metrics["nodes"]["agent_0"]["calls"] == 1
+    assert metrics["nodes"]["agent_0"]["llm_calls"] >= 1
+    assert metrics["nodes"]["agent_0"]["state_bytes"] > 0
+    assert metrics["state_bytes"] > 0
+
+
+def test_enabled_by_context():
+    plan = plan_workflow(workflow("metrics-context"))
+    ctx = RunContext()
+    ctx.metrics = RunMetrics()
+    output = asyncio.run(Executor.execute(plan, Input(query="q"), ctx))
+    assert output.metrics is not None
+    assert output.metrics["nodes"]["agent_1"]["calls"] == 1
@@ -0,0 +1,54 @@
+import os
+
+from pydantic_settings import YamlConfigSettingsSource
+
+from imind_ai.utils import create_dynamic_model
+from imind_ai.utils.settings import build_settings_from_schema
+
+
+def schema(default: str = "x") -> dict:
+    return {
+        "imind_test_option": {"type": "str", "default": default},
+        "imind_test_size": {"type": "int", "default": 1, "description": "size"},
+    }
+
+
+def test_dynamic_model_memoized():
+    model = create_dynamic_model(schema())
+    assert create_dynamic_model(schema()) is model
+    assert create_dynamic_model(schema("y")) is not model
+    assert model().imind_test_option == "x"
+
+
+def test_settings_class_memoized():
+    settings_cls = build_settings_from_schema(schema())
+    assert build_settings_from_schema(schema()) is settings_cls
+    other = build_settings_from_schema(schema("y"))
+    assert other is not settings_cls
+    assert other().imind_test_option == "y"
+
+
+def test_yaml_read_until_changed(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    reads = []
+    read_file = YamlConfigSettingsSource._read_file
+
+    def counting_read_file(self, file_path):
+        reads.append(file_path)
+        return read_file(self, file_path)
+
+    monkeypatch.setattr(YamlConfigSettingsSource, "_read_file", counting_read_file)
+
+    path = tmp_path / "settings.yaml"
+    path.write_text("imind_test_option: a\n", "utf-8")
+    settings_cls = build_settings_from_schema(schema())
+    assert settings_cls().imind_test_option == "a"
+    assert settings_cls().imind_test_option == "a"
+    assert len(reads) == 1
+
+    # same size, a later mtime
+    path.write_text("imind_test_option: b\n", "utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert settings_cls().imind_test_option == "b"
+    assert len(reads) == 2
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import tool
+from pydantic import BaseModel
+
+from benchmarks.fake_llm import FakeChatModel
+from imind_ai.agent.base.config import Config
+from imind_ai.agent.base.graph import create_base_agent, structured_output_fallbacks
+
+
+class Answer(BaseModel):
+    """The final answer"""
+
+    result: str
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look a query up"""
+    return f"found {query}"
+
+
+def run(script: List[Dict[str, Any]]) -> Dict[str, Any]:
+    llm = FakeChatModel(structured={"result": "done"}, script=script)
+    agent = create_base_agent(
+        llm,
+        settings=Config.default(),
+        tools=[lookup],
+        output_schema=Answer,
+        structured_output_mode="single_call",
+    )
+    return asyncio.run(agent.ainvoke({"user_input": "question"}))
+
+
+def unanswered(messages) -> set:
+    calls = {
+        call["id"]
+        for message in messages
+        if isinstance(message, AIMessage)
+        for call in message.tool_calls
+    }
+    return calls - {m.tool_call_id for m in messages if isinstance(m, ToolMessage)}
+
+
+def test_response_tool_alone():
+    fallbacks = structured_output_fallbacks.value
+    state = run([])
+    assert state["llm_output"] == Answer(result="done")
+    assert unanswered(state["messages"]) == set()
+    assert structured_output_fallbacks.value == fallbacks
+
+
+def test_tools_then_response():
+    state = run([{"tool_calls": [{"name": "lookup", "args": {"query": "a"}}]}])
+    assert state["llm_output"] == Answer(result="done")
+    tool_messages = [m for m in state["messages"] if isinstance(m, ToolMessage)]
+    assert tool_messages[0].content == "found a"
+    assert unanswered(state["messages"]) == set()
+
+
+def test_response_tool_with_other_tools():
+    state = run(
+        [
+            {
+                "tool_calls": [
+                    {"name": "lookup", "args": {"query": "a"}},
+                    {"name": "Answer", "args": {"result": "early"}},
+                ]
+            }
+        ]
+    )
+    # the real tool ran and the early answer was not taken as final
+    assert state["llm_output"] == Answer(result="done")
+    contents = [m.content for m in state["messages"] if isinstance(m, ToolMessage)]
+    assert "found a" in contents
+    assert unanswered(state["messages"]) == set()
+
+
+@pytest.mark.parametrize(
+    "step",
+    [
+        # the response tool called with args not matching the schema
+        {"tool_calls": [{"name": "Answer", "args": {"answer": "early"}}]},
+        # a plain text answer instead of the response tool
+        {"content": "the answer is done"},
+    ],
+)
+def test_fallback_call(step):
+    fallbacks = structured_output_fallbacks.value
+    state = run([step])
+    # answered by the second, with_structured_output call
+    assert state["llm_output"] == Answer(result="done")
+    assert structured_output_fallbacks.value == fallbacks + 1
+    assert unanswered(state["messages"]) == set()
@@ -0,0 +1,73 @@
+import asyncio
+import json
+from typing import Any, Dict, List
+
+from benchmarks.common import plan_workflow
+from benchmarks.workflow_bench import chain_workflow
+from imind_ai.agent.config.schema import Input
+from imind_ai.agent.workflow.pipeline.context import RunContext
+from imind_ai.agent.workflow.pipeline.executor import Executor
+from imind_ai.agent.workflow.pipeline.trace_recorder import TraceRecorder
+
+
+def spans(trace: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """The complete events of a trace by the name of their track"""
+    tracks = {
+        event["tid"]: event["args"]["name"]
+        for event in trace["traceEvents"]
+        if event["ph"] == "M"
+    }
+    by_track: Dict[str, List[Dict[str, Any]]] = {}
+    for event in trace["traceEvents"]:
+        if event["ph"] == "X":
+            by_track.setdefault(tracks[event["tid"]], []).append(event)
+    return by_track
+
+
+def within(inner: Dict[str, Any], outer: Dict[str, Any]) -> bool:
+    # the timestamps are floats in microseconds
+    return (
+        outer["ts"] - 1 <= inner["ts"]
+        and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"] + 1
+    )
+
+
+def test_recorded_run(fake_model, tmp_path):
+    fake_model(structured={"result": "r"})
+    values = chain_workflow(2)
+    values["agent"]["id"] = "trace-recorder"
+    plan = plan_workflow(values)
+
+    ctx = RunContext()
+    ctx.recorder = TraceRecorder()
+    output = asyncio.run(Executor.execute(plan, Input(query="q"), ctx))
+    assert output.content == "r"
+
+    path = tmp_path / "trace.json"
+    ctx.recorder.save(path)
+    trace = json.loads(path.read_text("utf-8"))
+    assert trace == json.loads(json.dumps(ctx.recorder.to_dict(), default=str))
+    by_track = spans(trace)
+
+    [workflow] = by_track["workflow"]
+    for node in ("agent_0", "agent_1"):
+        events = by_track[node]
+        [span] = [event for event in events if event["cat"] == "base_agent"]
+        assert within(span, workflow)
+
+        steps = {event["name"] for event in events if event["cat"] == "agent"}
+        assert {"llm_caller", "post_processor"} <= steps
+        llm_calls = [event for event in events if event["cat"] == "llm"]
+        # the answer and the structured output call
+        assert len(llm_calls) == 2
+        for event in events:
+            assert within(event, span)
+
+        # the multi-turn agent keeps its history in memory
+        assert {event["cat"] for event in by_track[f"{node} checkpoints"]} == {
+            "checkpoint"
+        }
+
+    writes = by_track["workflow checkpoints"]
+    assert {event["name"] for event in writes} == {"put", "put_writes"}
+    assert all(event["cat"] == "checkpoint" for event in writes)